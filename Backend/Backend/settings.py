@@ -221,6 +221,15 @@ CELERY_BEAT_SCHEDULE = {
         # every day @ 2 AM
         'schedule': crontab(hour=2, minute=0),
     },
+    'flush-device-heartbeats': {
+        'task': 'TicketAppB.tasks.flush_device_heartbeats',
+        'schedule': 30.0,  # every 30 seconds
+    },
+    'reconcile-daily-revenue': {
+        'task': 'TicketAppB.tasks.reconcile_daily_revenue',
+        # every day @ 3 AM — after the 2 AM cleanup, before the day's traffic
+        'schedule': crontab(hour=3, minute=0),
+    },
     'sweep-stale-sessions': {
         'task': 'TicketAppB.tasks.sweep_stale_sessions',
         'schedule': 600,  # every 10 minutes
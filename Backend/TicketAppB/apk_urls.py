@@ -48,6 +48,7 @@ urlpatterns = [
     path('device/expenses',    _premium(apk_download_views.get_expenses_file)),
     # Route group — individual files or single bundled ZIP
     path('device/masterdata',  _premium(apk_download_views.get_masterdata_bundle)),
+    path('device/manifest',    _premium(apk_download_views.get_manifest)),
     path('device/routelst',    _premium(apk_download_views.get_routelst_file)),
     path('device/stagelst',    _premium(apk_download_views.get_stagelst_file)),
     path('device/languagedat', _premium(apk_download_views.get_languagedat_file)),
@@ -9,9 +9,10 @@ request.user  → the authenticated CustomUser instance
 request.auth  → SessionInfo(session_uid, device_type)
 
 Per-request cost (normal path):
-  1 x Redis GET  (cache hit → user_id)
-  1 x DB  GET    (User with select_related company/dealer — hot PK row)
-  1 x Redis SET  (TTL reset, only if >60s since last reset — see _maybe_extend_ttl)
+  1 x Redis EVALSHA (_SESSION_SCRIPT: revocation check, session read, TTL
+                     reset and last-seen debounce — one round trip)
+  0 x DB         (user + company/dealer from principal_cache — a per-process
+                  LRU, else one Redis get_many; the DB only on a miss)
 
 On Redis miss (cold start, cache eviction, Redis restart):
   1 x DB  GET    (UserSession with is_active=True)
@@ -20,18 +21,22 @@ On Redis miss (cold start, cache eviction, Redis restart):
 
 On force-logout or natural expiry:
   Cache miss → DB lookup → is_active=False → 401. No stale state possible.
+
+The session keys are read by a Lua script, so they are written as plain
+"user_id:device_type" strings through the raw Redis client rather than
+pickled through django.core.cache. Always go through the helpers below.
 """
 
 from collections import namedtuple
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.utils import timezone
+from django_redis import get_redis_connection
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
 from .models import UserSession, UserRole, UserTier
+from . import principal_cache
 
 # Carried on request.auth for all authenticated requests.
 # session_uid  — the opaque session identifier (UUID string)
@@ -41,16 +46,56 @@ from .models import UserSession, UserRole, UserTier
 SessionInfo = namedtuple('SessionInfo', ['session_uid', 'device_type'])
 
 
-User=get_user_model()
-
 COOKIE_NAME = 'pqr_session'
 _CACHE_KEY_PREFIX = 'pqr:session:'
 _REVOKED_KEY_PREFIX = 'pqr:revoked:'
+_SEEN_KEY_PREFIX = 'pqr:seen:'
 
 # How long to keep the revocation marker in Redis after a session is killed.
 # Covers any in-flight requests that already passed the cache check.
 _REVOKED_TTL = 60  # seconds
 
+# The session TTL is reset once it has run down by this much, not on every
+# request — idle logout stays accurate to within a minute.
+_EXTEND_AFTER = 60  # seconds
+
+# last_seen_at is written at most once per this window per session.
+_SEEN_DEBOUNCE = 300  # seconds
+
+# KEYS: session, revoked marker, last-seen debounce
+# ARGV: web timeout, APK timeout, _EXTEND_AFTER, _SEEN_DEBOUNCE
+# Returns {-1} revoked (session key dropped), {0} miss, or
+# {1, "user_id:device_type", last_seen_due}.
+_SESSION_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('DEL', KEYS[1])
+    return {-1}
+end
+local value = redis.call('GET', KEYS[1])
+if not value then
+    return {0}
+end
+local device_type = string.match(value, ':(.*)$')
+local timeout = tonumber(ARGV[1])
+if device_type == 'android' or device_type == 'ios' then
+    timeout = tonumber(ARGV[2])
+end
+local ttl = redis.call('TTL', KEYS[1])
+if ttl >= 0 and ttl < timeout - tonumber(ARGV[3]) then
+    redis.call('EXPIRE', KEYS[1], timeout)
+end
+local seen_due = 0
+if redis.call('SET', KEYS[3], 1, 'NX', 'EX', ARGV[4]) then
+    seen_due = 1
+end
+return {1, value, seen_due}
+"""
+
+_session_script = None
+
+
+def _redis():
+    return get_redis_connection('default')
 
 
 
@@ -62,6 +107,10 @@ def _revoked_key(session_uid: str) -> str:
     return f'{_REVOKED_KEY_PREFIX}{session_uid}'
 
 
+def _seen_key(session_uid: str) -> str:
+    return f'{_SEEN_KEY_PREFIX}{session_uid}'
+
+
 def get_session_timeout(device_type: str = None) -> int:
     """
     Returns the idle timeout in seconds for the given device type.
@@ -81,10 +130,10 @@ def set_session_cache(session_uid: str, user_id: int, device_type: str = 'web_de
     without an extra DB read.
     Called at login, keepalive, and on a cache miss during auth.
     """
-    cache.set(
+    _redis().set(
         _cache_key(session_uid),
         f'{user_id}:{device_type}',
-        timeout=get_session_timeout(device_type),
+        ex=get_session_timeout(device_type),
     )
 
 
@@ -94,17 +143,17 @@ def delete_session_cache(session_uid: str) -> None:
     Called at logout and force-logout. After this call, the session is dead
     on the next request regardless of what the DB says.
     """
-    cache.delete(_cache_key(session_uid))
+    _redis().delete(_cache_key(session_uid))
 
 
 def set_session_revoked(session_uid: str) -> None:
     """
     Write a short-lived revocation marker before deleting the session cache key.
-    Blocks _maybe_extend_ttl from re-adding the session to Redis on any
-    in-flight request that already passed the cache-hit check — preventing
-    a killed session from being silently resurrected for the TTL window.
+    While it exists _SESSION_SCRIPT refuses the session and drops its key,
+    so an in-flight request that raced the kill cannot keep it alive by
+    resetting its TTL — a killed session is never silently resurrected.
     """
-    cache.set(_revoked_key(session_uid), '1', timeout=_REVOKED_TTL)
+    _redis().set(_revoked_key(session_uid), '1', ex=_REVOKED_TTL)
 
 
 def kill_session(session) -> None:
@@ -112,7 +161,7 @@ def kill_session(session) -> None:
     Canonical session termination used by auth.py, sessions.py, and signals.py.
     Order matters:
       1. DB: is_active = False  (source of truth — survives Redis restart)
-      2. Revocation marker set  (blocks _maybe_extend_ttl resurrection for 60s)
+      2. Revocation marker set  (refused by _SESSION_SCRIPT for 60s)
       3. Cache key deleted      (instant 401 on next request)
     """
     session.is_active = False
@@ -126,41 +175,49 @@ def session_key_exists(session_uid: str) -> bool:
     Returns True if the Redis cache key for this session is still alive.
     Used at login to detect ghost sessions: DB shows is_active=True but the
     Redis TTL already expired, meaning the user was auto-logged out and the
-    Celery sweep hasn't run yet. One cache.get() — no DB hit.
+    Celery sweep hasn't run yet. One Redis EXISTS — no DB hit.
     """
-    return bool(cache.get(_cache_key(session_uid)))
+    return bool(_redis().exists(_cache_key(session_uid)))
 
 
-def _maybe_extend_ttl(session_uid: str, user_id: int, device_type: str) -> None:
+def _lookup_session(session_uid: str):
     """
-    Reset the Redis TTL for this session using the correct timeout for its device type.
-    Checks the revocation marker first — if the session was killed mid-flight,
-    do not write the key back and accidentally resurrect it.
+    Run _SESSION_SCRIPT for this session — one round trip.
+    Returns (state, value, last_seen_due) where state is -1 (revoked),
+    0 (not cached) or 1 (value is the cached "user_id:device_type").
     """
-    if cache.get(_revoked_key(session_uid)):
-        return  # session was killed mid-flight — do not resurrect it
-    cache.set(
-        _cache_key(session_uid),
-        f'{user_id}:{device_type}',
-        timeout=get_session_timeout(device_type),
+    global _session_script
+    conn = _redis()
+    if _session_script is None:
+        # register_script only hashes the source; EVALSHA falls back to
+        # EVAL by itself when the server's script cache was flushed.
+        _session_script = conn.register_script(_SESSION_SCRIPT)
+    result = _session_script(
+        keys=[_cache_key(session_uid), _revoked_key(session_uid), _seen_key(session_uid)],
+        args=[get_session_timeout('web_desktop'), get_session_timeout('android'),
+              _EXTEND_AFTER, _SEEN_DEBOUNCE],
+        client=conn,
     )
+    if result[0] != 1:
+        return result[0], None, False
+    value = result[1].decode() if isinstance(result[1], bytes) else result[1]
+    return 1, value, bool(result[2])
 
 
+def _write_last_seen(session_uid: str) -> None:
+    # We don't have the session object, so update() on the queryset directly.
+    UserSession.objects.filter(session_uid=session_uid, is_active=True,).update(last_seen_at=timezone.now())
+
 
 def _update_last_seen(session_uid: str) -> None:
     """
-    Debounced DB write for last_seen_at.
+    Debounced DB write for last_seen_at, for the cache-miss path (the
+    cache-hit path gets the debounce from _SESSION_SCRIPT).
     Updates at most once per 5 minutes per session to keep admin UI current
     without a DB write on every request.
-    Called after a successful cache hit — we don't have the session object,
-    so we use update() on the queryset directly.
     """
-    debounce_key=f'pqr:seen:{session_uid}'
-    if cache.get(debounce_key):
-        return
-    cache.set(debounce_key, 1, timeout=300)  # 5 minute debounce
-
-    UserSession.objects.filter(session_uid=session_uid, is_active=True,).update(last_seen_at=timezone.now())
+    if _redis().set(_seen_key(session_uid), 1, nx=True, ex=_SEEN_DEBOUNCE):
+        _write_last_seen(session_uid)
 
 
 
@@ -178,35 +235,34 @@ class SessionAuthentication(BaseAuthentication):
             return None
         
         # ── Try Redis cache first ─────────────────────────────────────────────
-        cached_value = cache.get(_cache_key(session_uid))
-        if cached_value:
+        # One round trip: revocation check, read, TTL reset, last-seen debounce.
+        state, cached_value, last_seen_due = _lookup_session(session_uid)
+
+        # Revocation marker: set by kill_session for 60s after a force-logout.
+        # The script has already dropped the session key.
+        if state == -1:
+            # Return None (not AuthenticationFailed) so AllowAny views (login,
+            # logout) still work when a user retries with a killed-session cookie.
+            return None
+
+        if state == 1:
             # Parse composite value "user_id:device_type".
             # Backward compat: old-format entries contain only "user_id" (no colon).
             # Treat those as web_desktop so they get the web timeout.
-            parts = str(cached_value).split(':', 1)
+            parts = cached_value.split(':', 1)
             cached_user_id_str = parts[0]
             device_type = parts[1] if len(parts) == 2 else 'web_desktop'
 
-            # Revocation marker: set by kill_session for 60s after a force-logout.
-            # Prevents _maybe_extend_ttl from resurrecting the session on in-flight
-            # requests that already passed the cache check before the kill happened.
-            if cache.get(_revoked_key(session_uid)):
-                delete_session_cache(session_uid)
-                # Return None (not AuthenticationFailed) so AllowAny views (login,
-                # logout) still work when a user retries with a killed-session cookie.
-                return None
-
             try:
-                user = User.objects.select_related('company', 'dealer').get(
-                    pk=int(cached_user_id_str),
-                    is_active=True,
-                )
-            except (User.DoesNotExist, ValueError):
+                user = principal_cache.get_user(int(cached_user_id_str))
+            except ValueError:
+                user = None
+            if user is None:
                 delete_session_cache(session_uid)
                 return None
 
-            _maybe_extend_ttl(session_uid, int(cached_user_id_str), device_type)
-            _update_last_seen(session_uid)
+            if last_seen_due:
+                _write_last_seen(session_uid)
             self._check_tier(user)
             return (user, SessionInfo(session_uid, device_type))
 
@@ -0,0 +1,49 @@
+"""
+Cache version counters
+======================
+The device BUS.DAT and master-data caches, the ingest master snapshot,
+the trip-identity lookups and the report pages all key their entries by
+a counter kept in the cache itself. Bumping the counter retires every
+entry built under the old value; nothing is deleted, the old entries
+just expire.
+
+  current(key)       — the counter's value, seeded if it is missing.
+  current_many(keys) — {key: value} of several counters in one get_many.
+  bump(key)          — advance the counter and return the new value.
+
+Counters are stored without a timeout but can still be evicted. A
+missing counter is therefore seeded from the clock in nanoseconds rather
+than from 1, so a lost key never restarts at a value whose cached
+entries are still alive.
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+def current(key) -> int:
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        # Evicted again straight away — any fresh seed is still safe.
+        value = cache.get(key) or time.time_ns()
+    return int(value)
+
+
+def current_many(keys) -> dict:
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            found[key] = current(key)
+    return found
+
+
+def bump(key) -> int:
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing (never read, or evicted): a fresh seed is past any old value.
+        value = time.time_ns()
+        cache.set(key, value, timeout=None)
+        return value
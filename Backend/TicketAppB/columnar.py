@@ -0,0 +1,88 @@
+"""
+Columnar report responses
+=========================
+Report rows repeat every key name per record — a ticket row carries ~50
+keys — so a large page is mostly key names and the same few route, depot,
+stage and company strings over and over. Report endpoints therefore
+accept ?format=columnar, which rewrites every top-level list of row dicts
+in the payload as
+
+    {
+      "columns": ["id", "route_code", "from_stage_name", ...],
+      "rows":    [[101, 0, 3, ...], [102, 0, 1, ...]],
+      "dicts":   {"route_code": ["R1", ...], "from_stage_name": [...]}
+    }
+
+A column listed in "dicts" holds indexes into its dictionary instead of
+the strings themselves (null stays null). Everything else in the payload
+(message, count, next_cursor, totals, ...) is left as is, so paging and
+error handling work unchanged. The report views are also gzip-negotiated
+(gzip_page), which compounds nicely with the smaller, more repetitive body.
+
+Decoding (Frontend/src/assets/js/columnar.js):
+
+    row[columns[j]] = columns[j] in dicts ? dicts[columns[j]][cell] : cell
+
+Only non-empty top-level lists whose items are all dicts are rewritten
+(an empty list stays []); nested values inside a row are passed through
+untouched.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+
+def _dictionary_encodable(values) -> bool:
+    # Worth it when the column is all strings and mostly repeats.
+    present = [v for v in values if v is not None]
+    return (
+        len(present) > 1
+        and all(isinstance(v, str) for v in present)
+        and len(set(present)) * 2 <= len(present)
+    )
+
+
+def encode_rows(rows) -> dict:
+    """Columnar form of a list of row dicts."""
+    columns = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    columns = list(columns)
+
+    table = [[row.get(key) for key in columns] for row in rows]
+    dicts = {}
+    for j, key in enumerate(columns):
+        if not _dictionary_encodable([cells[j] for cells in table]):
+            continue
+        index = {}
+        for cells in table:
+            if cells[j] is not None:
+                cells[j] = index.setdefault(cells[j], len(index))
+        dicts[key] = list(index)
+
+    return {'columns': columns, 'rows': table, 'dicts': dicts}
+
+
+def encode(payload):
+    """`payload` with every top-level list of row dicts in columnar form."""
+    if not isinstance(payload, dict):
+        return payload
+    return {
+        key: encode_rows(value)
+        if isinstance(value, list) and value and all(isinstance(v, dict) for v in value)
+        else value
+        for key, value in payload.items()
+    }
+
+
+def wants_columnar(request) -> bool:
+    renderer = getattr(request, 'accepted_renderer', None)
+    return getattr(renderer, 'format', None) == ColumnarJSONRenderer.format
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """?format=columnar for views returning a DRF Response."""
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(encode(data), accepted_media_type, renderer_context)
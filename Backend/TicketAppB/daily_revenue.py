@@ -0,0 +1,163 @@
+"""
+Daily revenue summaries
+=======================
+DailyBusRevenue / DailyCompanyRevenue hold one row per (company, day, bus,
+route) and per (company, day), so dashboards and per-date reports sum a
+handful of rows instead of scanning transaction_data.
+
+  record_tickets()      — called by the ticket tasks inside the insert
+                          transaction; one increment per summary row touched.
+  record_trip_closed()  — called by the trip-close tasks the first time a
+                          trip is closed; adds trip_count / total_km.
+  rebuild_day()         — recompute a day from TransactionData / TripData.
+                          Run nightly by reconcile_daily_revenue (late
+                          uploads, manual edits and deletes are picked up
+                          there) and by `manage.py rebuild_daily_revenue`.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction, IntegrityError
+from django.db.models import F, Q, Sum, Count
+
+from .models import TransactionData, TripData, DailyBusRevenue, DailyCompanyRevenue
+
+METRICS = (
+    'collection', 'cash_amount', 'upi_amount', 'ticket_count',
+    'passenger_count', 'trip_count', 'total_km',
+)
+
+
+def _empty():
+    return dict.fromkeys(METRICS, 0)
+
+
+def _increment(model, key, deltas):
+    """Add `deltas` to the row identified by `key`, creating it on first use."""
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another worker created the row first.
+        model.objects.filter(**key).update(**updates)
+
+
+def _apply(bus_deltas):
+    """
+    Fold {(company_id, date, bus_no, route_id): metrics} into both tables.
+    Rows are touched in sorted key order so concurrent batches lock them
+    in the same order.
+    """
+    company_deltas = defaultdict(_empty)
+    for (company_id, day, bus_no, route_id), deltas in sorted(
+        bus_deltas.items(), key=lambda item: (item[0][0], item[0][1], item[0][2], item[0][3] or 0),
+    ):
+        changed = {field: value for field, value in deltas.items() if value}
+        if not changed:
+            continue
+        _increment(
+            DailyBusRevenue,
+            {'company_id': company_id, 'date': day, 'bus_no': bus_no, 'route_id': route_id},
+            changed,
+        )
+        for field, value in changed.items():
+            company_deltas[(company_id, day)][field] += value
+
+    for (company_id, day), deltas in sorted(company_deltas.items()):
+        _increment(DailyCompanyRevenue, {'company_id': company_id, 'date': day}, deltas)
+
+
+# ── Incremental maintenance ───────────────────────────────────────────────────
+
+def record_tickets(tickets):
+    """Add freshly inserted TransactionData rows to the daily summaries."""
+    bus_deltas = defaultdict(_empty)
+    for t in tickets:
+        deltas = bus_deltas[(t.company_code_id, t.ticket_date, t.bus_no or '', t.route_id_id)]
+        deltas['collection'] += t.ticket_amount or 0
+        if t.ticket_status == TransactionData.PaymentMode.CASH:
+            deltas['cash_amount'] += t.ticket_amount or 0
+        elif t.ticket_status == TransactionData.PaymentMode.UPI:
+            deltas['upi_amount'] += t.ticket_amount or 0
+        deltas['ticket_count'] += 1
+        deltas['passenger_count'] += t.total_tickets or 0
+    _apply(bus_deltas)
+
+
+def record_trip_closed(company_id, start_date, bus_no, route_id, total_km):
+    """Count a newly closed trip against its start date."""
+    if not start_date:
+        return
+    deltas = _empty()
+    deltas['trip_count'] = 1
+    deltas['total_km'] = total_km or 0
+    _apply({(company_id, start_date, bus_no or '', route_id): deltas})
+
+
+# ── Reconciliation ────────────────────────────────────────────────────────────
+
+def rebuild_day(day, company_id=None):
+    """
+    Replace the summary rows of `day` (optionally one company) with values
+    recomputed from TransactionData / TripData. Returns the number of
+    DailyBusRevenue rows written.
+    """
+    ticket_scope = Q(ticket_date=day)
+    trip_scope = Q(start_date=day, is_closed=True)
+    summary_scope = Q(date=day)
+    if company_id:
+        ticket_scope &= Q(company_code_id=company_id)
+        trip_scope &= Q(company_code_id=company_id)
+        summary_scope &= Q(company_id=company_id)
+
+    with transaction.atomic():
+        # Lock the existing rows first so ingest increments for this day wait
+        # for the rebuilt values instead of being overwritten by them.
+        list(DailyCompanyRevenue.objects.select_for_update().filter(summary_scope).values_list('pk', flat=True))
+        list(DailyBusRevenue.objects.select_for_update().filter(summary_scope).values_list('pk', flat=True))
+
+        rows = defaultdict(_empty)
+        for r in (
+            TransactionData.objects.filter(ticket_scope)
+            .values('company_code_id', 'bus_no', 'route_id')
+            .annotate(
+                collection=Sum('ticket_amount'),
+                cash_amount=Sum('ticket_amount', filter=Q(ticket_status=TransactionData.PaymentMode.CASH)),
+                upi_amount=Sum('ticket_amount', filter=Q(ticket_status=TransactionData.PaymentMode.UPI)),
+                ticket_count=Count('id'),
+                passenger_count=Sum('total_tickets'),
+            )
+        ):
+            metrics = rows[(r['company_code_id'], r['bus_no'] or '', r['route_id'])]
+            for field in ('collection', 'cash_amount', 'upi_amount', 'ticket_count', 'passenger_count'):
+                metrics[field] += r[field] or 0
+
+        for r in (
+            TripData.objects.filter(trip_scope)
+            .values('company_code_id', 'bus_no', 'route_id')
+            .annotate(trip_count=Count('id'), total_km=Sum('total_km'))
+        ):
+            metrics = rows[(r['company_code_id'], r['bus_no'] or '', r['route_id'])]
+            metrics['trip_count'] += r['trip_count']
+            metrics['total_km'] += r['total_km'] or 0
+
+        company_rows = defaultdict(_empty)
+        for (cid, _, _), metrics in rows.items():
+            for field, value in metrics.items():
+                company_rows[cid][field] += value
+
+        DailyBusRevenue.objects.filter(summary_scope).delete()
+        DailyCompanyRevenue.objects.filter(summary_scope).delete()
+        DailyBusRevenue.objects.bulk_create([
+            DailyBusRevenue(company_id=cid, date=day, bus_no=bus_no, route_id=route_id, **metrics)
+            for (cid, bus_no, route_id), metrics in rows.items()
+        ], batch_size=500)
+        DailyCompanyRevenue.objects.bulk_create([
+            DailyCompanyRevenue(company_id=cid, date=day, **metrics)
+            for cid, metrics in company_rows.items()
+        ], batch_size=500)
+
+    return len(rows)
@@ -0,0 +1,120 @@
+"""
+BUS.DAT blobs
+=============
+BUS.DAT (704 bytes, one per device) is packed from the device's
+SettingsProfile and the company Settings row. Instead of three queries
+and a repack on every GET device/settings, the blobs of a company's
+whole fleet are packed in one batched Celery job
+(tasks.rebuild_busdat_blobs) and cached per device:
+
+  device:busdat:gen:<company>            generation, bumped on any change
+  device:busdat:<company>:<serial>       (generation, state, etag, blob)
+
+  state  'ok'          — blob is the device's BUS.DAT
+         'inactive'    — device is deactivated (403)
+         'no_profile'  — device has no SettingsProfile (404)
+
+lookup() reads both keys in one get_many round trip; an entry from an
+older generation counts as a miss. The etag is a hash of the blob, so a
+rebuild that produces the same bytes keeps the device's 304.
+
+Invalidation: signals.py calls invalidate_busdat() after commit when a
+SettingsProfile or Settings row is saved/deleted, or when a device's
+company / active flag / palmtec_id changes; update() paths call it
+themselves. The bump retires every entry of the company at once and
+enqueues the rebuild. Requests that arrive before the job finishes fall
+back to load(), which reads the DB and stores that one entry.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+
+from . import cache_versions
+
+_GEN_KEY_PREFIX   = 'device:busdat:gen:'
+_ENTRY_KEY_PREFIX = 'device:busdat:'
+
+_ENTRY_TTL = 7 * 86400  # seconds
+
+OK, INACTIVE, NO_PROFILE = 'ok', 'inactive', 'no_profile'
+
+
+def _gen_key(company_id) -> str:
+    return f'{_GEN_KEY_PREFIX}{company_id}'
+
+
+def _entry_key(company_id, serial_number) -> str:
+    return f'{_ENTRY_KEY_PREFIX}{company_id}:{serial_number}'
+
+
+def current_generation(company_id) -> int:
+    return cache_versions.current(_gen_key(company_id))
+
+
+def invalidate_busdat(company_id) -> None:
+    """Retire every cached BUS.DAT of the company and queue the fleet rebuild."""
+    from .tasks import rebuild_busdat_blobs
+
+    gen = cache_versions.bump(_gen_key(company_id))
+    rebuild_busdat_blobs.delay(company_id, gen)
+
+
+def lookup(company_id, serial_number):
+    """(state, etag, blob) for the device, or None on a miss."""
+    gen_key = _gen_key(company_id)
+    entry_key = _entry_key(company_id, serial_number)
+    found = cache.get_many([gen_key, entry_key])
+    entry = found.get(entry_key)
+    if entry is None or found.get(gen_key) is None or entry[0] != int(found[gen_key]):
+        return None
+    return entry[1:]
+
+
+def _entry(device, company_settings):
+    from .views.apk.master_send import _pack_busdat
+
+    if not device.is_active:
+        return (INACTIVE, None, None)
+    profile = getattr(device, 'settings_profile', None)
+    if profile is None:
+        return (NO_PROFILE, None, None)
+    blob = _pack_busdat(profile, company_settings)
+    return (OK, f'"{hashlib.sha256(blob).hexdigest()[:32]}"', blob)
+
+
+def load(company, serial_number):
+    """DB path for a miss: build and store one device's entry. None if no such device."""
+    from .models import ETMDevice, Settings
+
+    gen = current_generation(company.id)
+    device = (
+        ETMDevice.objects.filter(company=company, serial_number=serial_number)
+        .select_related('settings_profile').first()
+    )
+    if device is None:
+        return None
+    entry = _entry(device, Settings.objects.filter(company=company).first())
+    cache.set(_entry_key(company.id, serial_number), (gen, *entry), timeout=_ENTRY_TTL)
+    return entry
+
+
+def rebuild(company_id, generation=None) -> int:
+    """
+    Pack and store the entries of every device of the company: two
+    queries and one set_many. Skipped when `generation` has already been
+    superseded (a newer rebuild is queued). Returns the device count.
+    """
+    from .models import ETMDevice, Settings
+
+    gen = current_generation(company_id)
+    if generation is not None and generation != gen:
+        return 0
+    company_settings = Settings.objects.filter(company_id=company_id).first()
+    devices = ETMDevice.objects.filter(company_id=company_id).select_related('settings_profile')
+    entries = {
+        _entry_key(company_id, device.serial_number): (gen, *_entry(device, company_settings))
+        for device in devices
+    }
+    cache.set_many(entries, timeout=_ENTRY_TTL)
+    return len(entries)
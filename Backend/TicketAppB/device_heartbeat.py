@@ -0,0 +1,141 @@
+"""
+Device heartbeat buffer
+=======================
+Every inbound frame proves its device is alive, but writing
+etm_device.last_seen_at per frame turns a handful of device rows into the
+hottest rows in the database. Instead:
+
+  record_heartbeat()  — HSET device pk → epoch seconds into one Redis hash.
+  flush_heartbeats()  — atomically drain the hash and write every device's
+                        last_seen_at with one bulk UPDATE. Run by the
+                        flush_device_heartbeats beat task.
+  overlay_heartbeats() — listings call this so the admin UI shows the
+                        buffered value before the next flush lands.
+
+The allocation/active check ingest runs before accepting a frame is
+cached here too (get_device_status), keyed by (company, palmtec_id) and
+invalidated from signals.py whenever an ETMDevice row is saved or deleted.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .models import ETMDevice
+
+HEARTBEAT_HASH = 'device:heartbeat'
+
+_STATUS_KEY_PREFIX = 'device:status:'
+_STATUS_TTL        = 3600  # seconds
+_MISSING_TTL       = 60    # seconds — unregistered palmtec_ids retry often
+
+# Cached status values
+DEVICE_MISSING  = 'missing'
+DEVICE_INACTIVE = 'inactive'
+
+
+# ── Allocation / active check ─────────────────────────────────────────────────
+
+def _status_key(company_id, palmtec_id) -> str:
+    return f'{_STATUS_KEY_PREFIX}{company_id}:{palmtec_id}'
+
+
+def get_device_status(company_id, palmtec_id):
+    """
+    Return the pk of the allocated, active device with this palmtec_id under
+    this company, or DEVICE_MISSING / DEVICE_INACTIVE.
+    """
+    key = _status_key(company_id, palmtec_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    row = ETMDevice.objects.filter(
+        palmtec_id=palmtec_id,
+        company_id=company_id,
+        allocation_status=ETMDevice.AllocationStatus.ALLOCATED,
+    ).values_list('pk', 'is_active').first()
+
+    if row is None:
+        cache.set(key, DEVICE_MISSING, timeout=_MISSING_TTL)
+        return DEVICE_MISSING
+
+    value = row[0] if row[1] else DEVICE_INACTIVE
+    cache.set(key, value, timeout=_STATUS_TTL)
+    return value
+
+
+def invalidate_device_status(company_id, palmtec_id):
+    if company_id and palmtec_id is not None:
+        cache.delete(_status_key(company_id, palmtec_id))
+
+
+# ── Heartbeats ────────────────────────────────────────────────────────────────
+
+def record_heartbeat(device_pks):
+    if not device_pks:
+        return
+    now = timezone.now().timestamp()
+    get_redis_connection('default').hset(
+        HEARTBEAT_HASH, mapping={pk: now for pk in device_pks},
+    )
+
+
+def forget_heartbeat(device_pk):
+    """Drop a buffered heartbeat, e.g. when the device is unmapped."""
+    get_redis_connection('default').hdel(HEARTBEAT_HASH, device_pk)
+
+
+def _to_datetime(raw):
+    return datetime.fromtimestamp(float(raw), tz=dt_timezone.utc)
+
+
+def read_heartbeats(device_pks) -> dict:
+    """device pk → buffered last-seen datetime, for the pks that have one."""
+    device_pks = list(device_pks)
+    if not device_pks:
+        return {}
+    values = get_redis_connection('default').hmget(HEARTBEAT_HASH, device_pks)
+    return {pk: _to_datetime(raw) for pk, raw in zip(device_pks, values) if raw is not None}
+
+
+def overlay_heartbeats(devices):
+    """Set last_seen_at on ETMDevice instances to the buffered value when newer."""
+    fresh = read_heartbeats(d.pk for d in devices)
+    for device in devices:
+        seen = fresh.get(device.pk)
+        if seen and (device.last_seen_at is None or seen > device.last_seen_at):
+            device.last_seen_at = seen
+    return devices
+
+
+def flush_heartbeats() -> int:
+    """
+    Drain the heartbeat hash into etm_device.last_seen_at. HGETALL + DEL run
+    in one MULTI so a heartbeat recorded mid-flush lands in the next round
+    instead of being lost.
+    """
+    pipe = get_redis_connection('default').pipeline(transaction=True)
+    pipe.hgetall(HEARTBEAT_HASH)
+    pipe.delete(HEARTBEAT_HASH)
+    entries, _ = pipe.execute()
+    if not entries:
+        return 0
+
+    devices = [
+        ETMDevice(pk=int(pk), last_seen_at=_to_datetime(raw))
+        for pk, raw in entries.items()
+    ]
+    try:
+        ETMDevice.objects.bulk_update(devices, ['last_seen_at'], batch_size=500)
+    except Exception:
+        # Put the drained values back (without clobbering newer ones) so
+        # the next flush retries them.
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        for pk, raw in entries.items():
+            pipe.hsetnx(HEARTBEAT_HASH, pk, raw)
+        pipe.execute()
+        raise
+    return len(devices)
@@ -0,0 +1,131 @@
+"""
+Device master-data cache
+========================
+Devices download their master data (GET device/masterdata and the
+individual ROUTELST.LST / STAGE.LST / RTE.DAT / LANGUAGE.DAT /
+CURRENCY.DAT / CREW.DAT / VEHICLE.DAT / EXPENSEDET.DAT endpoints) at
+shift start, so a whole fleet fetches the same company files within
+minutes. The files only change when the company's master data does, so
+each one is built once per change and served from Redis:
+
+  version      — per-company counter. signals.py bumps it on post_save /
+                 post_delete of Route, RouteStage, Stage, Fare, BusType,
+                 Currency, Settings, Employee, EmployeeType, VehicleType
+                 and ExpenseMaster; code paths that write those with
+                 bulk_create/update() call invalidate_device_masterdata()
+                 themselves.
+  get_file()   — bytes of one file for (version, name, route_codes).
+                 Concurrent misses wait for the first builder rather than
+                 all rebuilding from the DB.
+  etag()       — validator for the same key. A device that sends it back
+                 in If-None-Match gets 304 before anything is read.
+
+Delta sync: GET device/manifest lists every file's hash for the current
+version. Each version's manifest is stored whenever its files are built
+and kept for MANIFEST_TTL, so a device that reports the version it last
+synced (?since_version=) is told exactly which files changed and skips
+the rest.
+
+Old versions are never deleted; their entries just expire after
+_FILE_TTL (files) or MANIFEST_TTL (manifests).
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+
+from . import cache_versions
+
+_VERSION_KEY_PREFIX = 'device:masterdata:ver:'
+_FILE_KEY_PREFIX    = 'device:masterdata:'
+
+_FILE_TTL = 86400  # seconds
+
+# Manifests are small and are what a device's next ?since_version= is
+# compared against, so they outlive the files by a wide margin.
+MANIFEST_TTL = 14 * 86400  # seconds
+
+# A miss takes the build lock for at most _BUILD_LOCK_TTL; other requests
+# poll for its result for up to _BUILD_WAIT before building themselves.
+_BUILD_LOCK_TTL = 60     # seconds
+_BUILD_WAIT     = 15     # seconds
+_BUILD_POLL     = 0.05   # seconds
+
+
+def _version_key(company_id) -> str:
+    return f'{_VERSION_KEY_PREFIX}{company_id}'
+
+
+def _codes_digest(route_codes) -> str:
+    # Every file is ordered independently of the ?route_codes= order.
+    if not route_codes:
+        return 'all'
+    joined = ','.join(sorted(set(route_codes)))
+    return hashlib.sha1(joined.encode()).hexdigest()[:16]
+
+
+def _file_key(company_id, version, name, route_codes) -> str:
+    return f'{_FILE_KEY_PREFIX}{company_id}:{version}:{name}:{_codes_digest(route_codes)}'
+
+
+def current_version(company_id) -> int:
+    return cache_versions.current(_version_key(company_id))
+
+
+def invalidate_device_masterdata(company_id) -> None:
+    """Bump the company's version; every cached file and ETag goes stale."""
+    cache_versions.bump(_version_key(company_id))
+
+
+def etag(company_id, version, name, route_codes=None) -> str:
+    return f'"{company_id}-{version}-{name}-{_codes_digest(route_codes)}"'
+
+
+def store_files(company_id, version, route_codes, files) -> None:
+    """Cache several already-built files {name: bytes} of one version."""
+    cache.set_many(
+        {_file_key(company_id, version, name, route_codes): data for name, data in files.items()},
+        timeout=_FILE_TTL,
+    )
+
+
+def store_manifest(company_id, version, route_codes, manifest) -> None:
+    """Cache the manifest of a version, built together with its files."""
+    cache.set(_file_key(company_id, version, 'manifest', route_codes), manifest, timeout=MANIFEST_TTL)
+
+
+def peek_file(company_id, version, name, route_codes):
+    """Cached value of `name` for this version and route filter, or None."""
+    return cache.get(_file_key(company_id, version, name, route_codes))
+
+
+def get_file(company_id, version, name, route_codes, build, timeout=_FILE_TTL):
+    """
+    Cached value (usually bytes) of `name` for this version and route
+    filter; on a miss build() produces it. Only one request per key runs
+    build() at a time — the rest wait for its result.
+    """
+    key = _file_key(company_id, version, name, route_codes)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    lock_key = f'{key}:building'
+    locked = cache.add(lock_key, 1, timeout=_BUILD_LOCK_TTL)
+    if not locked:
+        deadline = time.monotonic() + _BUILD_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(_BUILD_POLL)
+            data = cache.get(key)
+            if data is not None:
+                return data
+        # The builder is slow or died — build without the lock.
+
+    try:
+        data = build()
+        cache.set(key, data, timeout=timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return data
@@ -0,0 +1,189 @@
+"""
+Live report feed
+================
+The web report pages learn about new tickets, trip opens/closes and
+schedule changes from a server-sent-events stream (GET live/feed) instead
+of polling get_all_*?since= every few seconds.
+
+  publish()       — called by the ingest tasks (tickets) and signals.py
+                    (TripData / ScheduleData saves). The event is appended
+                    to the company's Redis stream after commit.
+  event_stream()  — async generator behind live/feed when served over
+                    ASGI. It parks on XREAD BLOCK, so an idle dashboard
+                    holds one Redis connection and costs no DB queries.
+  poll()          — live/feed?after=<id>: the events since an entry id,
+                    answered at once. Works under WSGI (gunicorn), where
+                    a held-open stream would pin a worker; the pages
+                    switch to it when the stream is refused.
+
+A Redis Stream (XADD / XREAD BLOCK) carries the events rather than plain
+PUBLISH: delivery is just as immediate, and the entry ids double as SSE
+event ids, so a reconnecting EventSource sends Last-Event-ID and replays
+whatever it missed. Streams are capped at _MAX_EVENTS entries; a client
+resuming from an id that has already been trimmed gets a `reset` event
+and reloads its data.
+
+Events (SSE `event:` name → `data:` JSON):
+  tickets   {"dates": ["YYYY-MM-DD", ...], "count": n}
+  trip      {"id", "action": "open"|"close", "start_date", "palmtec_id", "trip_no"}
+  schedule  {"id", "action": "open"|"close", "start_date", "palmtec_id", "schedule_no"}
+  reset     {}
+
+The stream only works when the project is served through Backend/asgi.py;
+under WSGI live/feed answers 501 to EventSource and only serves poll().
+Either way an idle page costs one Redis read per poll/keep-alive and no
+DB queries.
+"""
+
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+_STREAM_KEY_PREFIX = 'live:feed:'
+
+# Roughly a few minutes of a busy company's traffic — enough to ride out a
+# reconnect; anything older is answered with `reset`.
+_MAX_EVENTS = 2000
+
+# XREAD blocks this long before the stream sends a keep-alive comment.
+_BLOCK_MS = 15000
+
+# Most events returned by one poll(); a page that falls further behind
+# than this is told to reset.
+_POLL_COUNT = 500
+
+
+def _stream_key(company_id) -> str:
+    return f'{_STREAM_KEY_PREFIX}{company_id}'
+
+
+def _encode(data) -> str:
+    return json.dumps(data, separators=(',', ':'), default=str)
+
+
+# ── Publishing (sync, ingest side) ────────────────────────────────────────────
+
+def _append(company_id, event_type, data):
+    try:
+        get_redis_connection('default').xadd(
+            _stream_key(company_id),
+            {'type': event_type, 'data': _encode(data)},
+            maxlen=_MAX_EVENTS, approximate=True,
+        )
+    except Exception:
+        # The feed is best effort; pages still reload on their own.
+        logger.warning("live feed publish failed for company %s", company_id, exc_info=True)
+
+
+def publish(company_id, event_type, data) -> None:
+    """Append an event to the company's feed once the current transaction commits."""
+    if company_id:
+        transaction.on_commit(lambda: _append(company_id, event_type, data))
+
+
+def publish_tickets(tickets) -> None:
+    """One `tickets` event per company for a batch of inserted tickets."""
+    by_company = {}
+    for t in tickets:
+        by_company.setdefault(t.company_code_id, []).append(t)
+    for company_id, group in by_company.items():
+        publish(company_id, 'tickets', {
+            'dates': sorted({str(t.ticket_date) for t in group}),
+            'count': len(group),
+        })
+
+
+# ── Polling (sync, web side) ──────────────────────────────────────────────────
+
+def poll(company_id, after=None) -> dict:
+    """
+    Events of `company_id` after the entry id `after`, as
+    {events: [{id, type, data}], last_event_id, reset}. Without `after`
+    it returns no events, only the current tail to poll from. `reset` is
+    set when events after `after` have been trimmed or more than
+    _POLL_COUNT are pending; the page then reloads its data and carries
+    on from the tail. Never blocks.
+    """
+    conn = get_redis_connection('default')
+    key = _stream_key(company_id)
+
+    if after:
+        first = conn.xrange(key, count=1)
+        trimmed = (after != '0-0' and first
+                   and _id_tuple(after) < _id_tuple(first[0][0].decode()))
+        if not trimmed:
+            result = conn.xread({key: after}, count=_POLL_COUNT + 1)
+            entries = result[0][1] if result else []
+            if len(entries) <= _POLL_COUNT:
+                events = [
+                    {'id': entry_id.decode(), 'type': fields[b'type'].decode(),
+                     'data': json.loads(fields[b'data'])}
+                    for entry_id, fields in entries
+                ]
+                return {
+                    'events': events,
+                    'last_event_id': events[-1]['id'] if events else after,
+                    'reset': False,
+                }
+
+    # First poll, or the page fell too far behind: start over at the tail.
+    tail = conn.xrevrange(key, count=1)
+    return {
+        'events': [],
+        'last_event_id': tail[0][0].decode() if tail else '0-0',
+        'reset': bool(after),
+    }
+
+
+# ── Streaming (async, web side) ───────────────────────────────────────────────
+
+def _sse(event_type, data, event_id=None) -> str:
+    head = f'id: {event_id}\n' if event_id else ''
+    return f'{head}event: {event_type}\ndata: {data}\n\n'
+
+
+async def event_stream(company_id, last_event_id=None):
+    """
+    Yield SSE frames for `company_id` forever. Starts after `last_event_id`
+    when given (replaying missed events), otherwise at the live tail.
+    """
+    from redis import asyncio as aioredis
+
+    key = _stream_key(company_id)
+    client = aioredis.from_url(settings.CACHES['default']['LOCATION'], decode_responses=True)
+    try:
+        if last_event_id:
+            first = await client.xrange(key, count=1)
+            if first and _id_tuple(last_event_id) < _id_tuple(first[0][0]):
+                yield _sse('reset', '{}')
+                last_event_id = None
+        if not last_event_id:
+            tail = await client.xrevrange(key, count=1)
+            last_event_id = tail[0][0] if tail else '0-0'
+
+        yield 'retry: 3000\n\n'
+        while True:
+            result = await client.xread({key: last_event_id}, block=_BLOCK_MS, count=100)
+            if not result:
+                yield ': keep-alive\n\n'
+                continue
+            for _, entries in result:
+                for entry_id, fields in entries:
+                    last_event_id = entry_id
+                    yield _sse(fields.get('type', 'message'), fields.get('data', '{}'), entry_id)
+    finally:
+        await client.aclose()
+
+
+def _id_tuple(entry_id):
+    """'1700000000000-3' → (1700000000000, 3); malformed ids sort first."""
+    try:
+        ms, _, seq = entry_id.partition('-')
+        return int(ms), int(seq or 0)
+    except (AttributeError, ValueError):
+        return (0, 0)
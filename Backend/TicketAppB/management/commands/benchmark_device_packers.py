@@ -0,0 +1,122 @@
+"""
+Time the device master-data packers (views/apk/master_send.py) on a
+synthetic fleet: --routes routes of --stages stages each, alternating
+TABLE fares (one per stage) and full GRAPH fare triangles.
+
+The rows are created inside a transaction that is rolled back at the
+end, so the command leaves the database untouched. Loading is timed
+separately from packing; RTE.DAT includes its one fares query.
+
+    python manage.py benchmark_device_packers
+    python manage.py benchmark_device_packers --routes 1000 --stages 60 --repeat 5
+"""
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from TicketAppB.models import BusType, Company, Fare, Route, RouteStage, Stage
+from TicketAppB.views.apk import master_send
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time ROUTELST / STAGE / LANGUAGE / RTE packing for a synthetic fleet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--routes', type=int, default=500, help='Routes (default: 500)')
+        parser.add_argument('--stages', type=int, default=40, help='Stages per route (default: 40)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per step; the best is reported')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                company = self._seed(options['routes'], options['stages'])
+                self._run(company, max(1, options['repeat']))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, n_routes, n_stages):
+        self.stdout.write(f'Seeding {n_routes} routes × {n_stages} stages ...')
+        tag = uuid.uuid4().hex[:8]
+        company = Company.objects.create(
+            company_id=f'BENCH{tag}', company_name='Packer benchmark',
+            contact_person='benchmark', company_email=f'bench-{tag}@example.invalid',
+        )
+        bus_type = BusType.objects.create(bustype_code='BENCH', name='Benchmark', company=company)
+
+        Stage.objects.bulk_create([
+            Stage(stage_code=f'S{i:04d}', stage_name=f'Stage number {i}', company=company)
+            for i in range(n_stages * 5)
+        ])
+        stages = list(Stage.objects.filter(company=company).order_by('stage_code'))
+
+        Route.objects.bulk_create([
+            Route(route_code=f'{i:05d}', route_name=f'Benchmark route {i}', min_fare=10,
+                  fare_type=1 if i % 2 else 2, bus_type=bus_type, company=company)
+            for i in range(n_routes)
+        ])
+        routes = list(Route.objects.filter(company=company).order_by('route_code'))
+
+        route_stages, fares = [], []
+        for n, route in enumerate(routes):
+            for seq in range(1, n_stages + 1):
+                route_stages.append(RouteStage(
+                    route=route, stage=stages[(n * 7 + seq) % len(stages)], sequence_no=seq,
+                    distance=seq * 1.5, stage_local_lang=f'L{seq}' if seq % 3 else None, company=company,
+                ))
+            if route.fare_type == 1:
+                cells = [(1, col) for col in range(2, n_stages + 1)]
+            else:
+                cells = [(row, col) for col in range(1, n_stages) for row in range(1, col + 1)]
+            fares.extend(
+                Fare(route=route, row=row, col=col, fare_amount=5 * (col - row + 1), company=company)
+                for row, col in cells
+            )
+        RouteStage.objects.bulk_create(route_stages, batch_size=5000)
+        Fare.objects.bulk_create(fares, batch_size=5000)
+        self.stdout.write(f'  {len(route_stages)} route stages, {len(fares)} fares\n')
+        return company
+
+    def _run(self, company, repeat):
+        routes, route_stages = [], []
+
+        def load():
+            nonlocal routes, route_stages
+            routes = master_send._get_routes(company)
+            route_stages = master_send._get_ordered_route_stages(company)
+            return b''
+
+        steps = [
+            ('load',         load),
+            ('ROUTELST.LST', lambda: master_send._pack_routelst_all(routes)),
+            ('STAGE.LST',    lambda: master_send._pack_stagelst_global(route_stages)),
+            ('LANGUAGE.DAT', lambda: master_send._pack_languagedat(route_stages)),
+            ('RTE.DAT',      lambda: master_send._pack_rtedat(
+                routes, {rs.pk: i for i, rs in enumerate(route_stages)})),
+        ]
+
+        self.stdout.write(f"{'step':<13} {'best ms':>9} {'queries':>8} {'bytes':>10}")
+        for name, step in steps:
+            best, queries, size = self._time(step, repeat)
+            self.stdout.write(f'{name:<13} {best:>9.1f} {queries:>8} {size:>10}')
+
+    @staticmethod
+    def _time(step, repeat):
+        """(best ms, queries, output bytes) over `repeat` runs of step()."""
+        best, queries, size = None, 0, 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                size = len(step())
+                elapsed = (time.perf_counter() - start) * 1000
+            queries = len(ctx.captured_queries)
+            best = elapsed if best is None else min(best, elapsed)
+        return best, queries, size
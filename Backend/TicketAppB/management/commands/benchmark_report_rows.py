@@ -0,0 +1,114 @@
+"""
+Time the web report row formatting: the DRF serializers against the
+values()-based flat rows (serializers/transactions.py) that
+get_all_*_data and the exports now use.
+
+Both paths format the newest --rows rows of each report for one company;
+times are scaled to milliseconds per 10k rows, query counts are as
+measured.
+
+    python manage.py benchmark_report_rows --company 3
+    python manage.py benchmark_report_rows --company 3 --rows 50000 --repeat 5
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Prefetch
+from django.test.utils import CaptureQueriesContext
+
+from TicketAppB.models import Company, RouteDepot, ScheduleData, TransactionData, TripData
+from TicketAppB.serializers.transactions import (
+    ScheduleDataSerializer, TicketDataSerializer, TripDataSerializer,
+    schedule_report_rows, ticket_report_rows, trip_report_rows,
+)
+
+
+def _route_depots():
+    return Prefetch(
+        'route_id__route_depots',
+        queryset=RouteDepot.objects.select_related('depot').order_by('pk'),
+    )
+
+
+def _serializer_querysets(company):
+    # The querysets the report views built before the flat rows existed.
+    tickets = (
+        TransactionData.objects.filter(company_code=company)
+        .select_related('from_stage_id__stage', 'to_stage_id__stage', 'trip_id',
+                        'schedule_id', 'route_id', 'company_code')
+        .prefetch_related(_route_depots())
+    )
+    trips = (
+        TripData.objects.filter(company_code=company)
+        .select_related('route_id', 'company_code')
+        .prefetch_related(_route_depots())
+    )
+    schedules = (
+        ScheduleData.objects.filter(company_code=company)
+        .select_related('route_id', 'company_code')
+        .prefetch_related(_route_depots())
+        .annotate(_trips_count=Count('trips'))
+    )
+    return tickets, trips, schedules
+
+
+class Command(BaseCommand):
+    help = 'Compare serializer vs flat-row formatting time for the web reports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, required=True, help='Company pk')
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per report (default: 10000)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best is reported')
+
+    def handle(self, *args, **options):
+        try:
+            company = Company.objects.get(pk=options['company'])
+        except Company.DoesNotExist:
+            raise CommandError(f"Company {options['company']} does not exist")
+        limit, repeat = options['rows'], max(1, options['repeat'])
+
+        tickets, trips, schedules = _serializer_querysets(company)
+        reports = (
+            ('tickets',   tickets,   TicketDataSerializer,   ticket_report_rows),
+            ('trips',     trips,     TripDataSerializer,     trip_report_rows),
+            ('schedules', schedules, ScheduleDataSerializer, schedule_report_rows),
+        )
+
+        self.stdout.write(f"{'report':<10} {'rows':>7} {'serializer':>16} {'flat rows':>16} {'speedup':>8}")
+        for name, qs, serializer_class, flat_rows in reports:
+            ordered = qs.order_by('-created_at', '-pk')
+
+            def serialize():
+                return serializer_class(list(ordered[:limit]), many=True).data
+
+            def flat():
+                return flat_rows.format(list(flat_rows.values(ordered)[:limit]))
+
+            slow = self._time(serialize, repeat)
+            fast = self._time(flat, repeat)
+            count = slow[2]
+            if not count:
+                self.stdout.write(f'{name:<10} {0:>7}  (no rows)')
+                continue
+            per_10k = 10000 / count
+            self.stdout.write(
+                f'{name:<10} {count:>7} '
+                f'{slow[0] * per_10k:>9.0f} ms/{slow[1]:>2}q '
+                f'{fast[0] * per_10k:>9.0f} ms/{fast[1]:>2}q '
+                f'{slow[0] / fast[0] if fast[0] else 0:>7.1f}x'
+            )
+
+    @staticmethod
+    def _time(build, repeat):
+        """(best ms, queries, rows) over `repeat` runs of build()."""
+        best, queries, rows = None, 0, 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                rows = len(build())
+                elapsed = (time.perf_counter() - start) * 1000
+            queries = len(ctx.captured_queries)
+            best = elapsed if best is None else min(best, elapsed)
+        return best, queries, rows
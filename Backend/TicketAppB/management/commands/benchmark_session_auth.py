@@ -0,0 +1,120 @@
+"""
+Measure the Redis side of SessionAuthentication under concurrent load:
+--threads workers each authenticate --requests times against --sessions
+synthetic sessions, once through the single-round-trip _SESSION_SCRIPT
+(authentication._lookup_session) and once through the four-call
+sequence the backend used before it (GET session, GET revoked marker,
+SET to reset the TTL, GET/SET of the last-seen debounce key).
+
+With --user-id the sessions belong to that (existing, active) user and
+the whole SessionAuthentication.authenticate() is timed as well, i.e.
+including the user fetch. The synthetic session keys are deleted at the
+end; last_seen_at writes match no UserSession row, so the database is
+left untouched.
+
+    python manage.py benchmark_session_auth
+    python manage.py benchmark_session_auth --threads 32 --requests 2000 --user-id 1
+"""
+
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+
+from TicketAppB import authentication as auth
+
+
+def _legacy_lookup(conn, session_uid):
+    # The pre-script sequence, issued as separate commands.
+    value = conn.get(auth._cache_key(session_uid))
+    if value is None:
+        return
+    if conn.get(auth._revoked_key(session_uid)):
+        return
+    conn.set(auth._cache_key(session_uid), value, ex=auth.get_session_timeout('web_desktop'))
+    if not conn.get(auth._seen_key(session_uid)):
+        conn.set(auth._seen_key(session_uid), 1, ex=auth._SEEN_DEBOUNCE)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request session authentication round trips under concurrency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent workers (default: 16)')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per worker (default: 1000)')
+        parser.add_argument('--sessions', type=int, default=500, help='Distinct sessions (default: 500)')
+        parser.add_argument('--user-id', type=int, help='Also time authenticate() with sessions of this user')
+
+    def handle(self, *args, **options):
+        conn = auth._redis()
+        user_id = options['user_id'] or 0
+        uids = [str(uuid.uuid4()) for _ in range(max(1, options['sessions']))]
+        for uid in uids:
+            auth.set_session_cache(uid, user_id, 'web_desktop')
+
+        factory = RequestFactory()
+        backend = auth.SessionAuthentication()
+
+        def full_auth(uid):
+            request = factory.get('/')
+            request.COOKIES[auth.COOKIE_NAME] = uid
+            backend.authenticate(request)
+
+        steps = [
+            ('4 calls',  lambda uid: _legacy_lookup(conn, uid)),
+            ('script',   auth._lookup_session),
+        ]
+        if options['user_id']:
+            steps.append(('authenticate', full_auth))
+
+        try:
+            self.stdout.write(
+                f"{options['threads']} threads × {options['requests']} requests, {len(uids)} sessions"
+            )
+            self.stdout.write(f"{'path':<13} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+            for name, step in steps:
+                rate, p50, p99 = self._run(step, uids, options['threads'], options['requests'])
+                self.stdout.write(f'{name:<13} {rate:>9.0f} {p50:>8.2f} {p99:>8.2f}')
+        finally:
+            conn.delete(*[
+                key for uid in uids
+                for key in (auth._cache_key(uid), auth._revoked_key(uid), auth._seen_key(uid))
+            ])
+
+    @staticmethod
+    def _run(step, uids, n_threads, n_requests):
+        """(requests/s, p50 ms, p99 ms) of step(uid) over all workers."""
+        n_threads = max(1, n_threads)
+        latencies = []
+        lock = threading.Lock()
+        start_gate = threading.Barrier(n_threads + 1)
+
+        def worker(offset):
+            own = []
+            start_gate.wait()
+            for i in range(n_requests):
+                uid = uids[(offset + i) % len(uids)]
+                t0 = time.perf_counter()
+                step(uid)
+                own.append((time.perf_counter() - t0) * 1000)
+            connections.close_all()  # this thread's own DB connection
+            with lock:
+                latencies.extend(own)
+
+        threads = [threading.Thread(target=worker, args=(n * 7,)) for n in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        start_gate.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+        return len(latencies) / elapsed, percentile(0.50), percentile(0.99)
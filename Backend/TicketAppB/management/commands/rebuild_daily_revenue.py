@@ -0,0 +1,71 @@
+"""
+Rebuild the DailyBusRevenue / DailyCompanyRevenue summaries from
+TransactionData and TripData, one day at a time.
+
+The ingest tasks maintain the summaries incrementally and
+reconcile_daily_revenue rebuilds the last few days every night. Run this
+after deploying the tables (to backfill history) or after bulk edits to
+older days.
+
+    python manage.py rebuild_daily_revenue
+    python manage.py rebuild_daily_revenue --company 3 --from-date 2026-03-01 --to-date 2026-03-31
+
+Without --from-date the rebuild starts at the earliest ticket or trip date.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from TicketAppB.daily_revenue import rebuild_day
+from TicketAppB.models import TransactionData, TripData
+
+
+def _parse_date(value, option):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'{option} must be YYYY-MM-DD, got {value!r}')
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily revenue summary tables from TransactionData/TripData.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Company pk (default: all companies)')
+        parser.add_argument('--from-date', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--to-date', help='Last day to rebuild (YYYY-MM-DD, default: today)')
+
+    def handle(self, *args, **options):
+        company_id = options['company']
+
+        if options['from_date']:
+            start = _parse_date(options['from_date'], '--from-date')
+        else:
+            tickets = TransactionData.objects.all()
+            trips = TripData.objects.all()
+            if company_id:
+                tickets = tickets.filter(company_code_id=company_id)
+                trips = trips.filter(company_code_id=company_id)
+            firsts = [
+                d for d in (
+                    tickets.aggregate(first=Min('ticket_date'))['first'],
+                    trips.aggregate(first=Min('start_date'))['first'],
+                ) if d
+            ]
+            if not firsts:
+                self.stdout.write('Nothing to rebuild')
+                return
+            start = min(firsts)
+
+        end = _parse_date(options['to_date'], '--to-date') if options['to_date'] else timezone.localdate()
+        if end < start:
+            raise CommandError('--to-date is before --from-date')
+
+        day, rows = start, 0
+        while day <= end:
+            rows += rebuild_day(day, company_id)
+            day += datetime.timedelta(days=1)
+        self.stdout.write(f'Rebuilt {(end - start).days + 1} days, {rows} bus/route rows')
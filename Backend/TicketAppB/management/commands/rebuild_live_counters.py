@@ -0,0 +1,118 @@
+"""
+Rebuild the live running totals on TripData / ScheduleData from TransactionData.
+
+The ticket ingest tasks maintain these counters incrementally. Run this after
+deploying the counters (to backfill existing rows), after deleting or editing
+tickets by hand, or whenever a report looks off.
+
+    python manage.py rebuild_live_counters
+    python manage.py rebuild_live_counters --company 3 --from-date 2026-03-01 --open-only
+
+Rows are locked (SELECT ... FOR UPDATE) chunk by chunk while they are
+recomputed, so tickets landing concurrently are applied on top of the
+rebuilt values instead of being lost. Rebuilt trips get their
+report_version bumped so cached closed-trip reports are recomputed too.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Q, Sum, Count, OuterRef, Subquery
+
+from TicketAppB.models import TransactionData, TripData, ScheduleData
+from TicketAppB.tasks import _LIVE_COUNT_FIELDS
+
+_LAST_TICKET_FIELDS = (
+    ('last_ticket_no',       'ticket_number'),
+    ('last_to_stage_id_id',  'to_stage_id'),
+    ('last_passenger_count', 'passenger_count'),
+    ('last_ticket_time',     'ticket_time'),
+)
+
+_UPDATE_FIELDS = (
+    ['live_collection', 'live_upi_amount', 'live_ticket_count']
+    + [counter for counter, _ in _LIVE_COUNT_FIELDS]
+    + ['last_ticket_no', 'last_to_stage_id', 'last_passenger_count', 'last_ticket_time']
+)
+
+
+def _parse_date(value, option):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'{option} must be YYYY-MM-DD, got {value!r}')
+
+
+class Command(BaseCommand):
+    help = 'Rebuild TripData/ScheduleData live running totals from TransactionData.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Company pk (default: all companies)')
+        parser.add_argument('--from-date', help='Only rows with start_date >= this (YYYY-MM-DD)')
+        parser.add_argument('--to-date', help='Only rows with start_date <= this (YYYY-MM-DD)')
+        parser.add_argument('--open-only', action='store_true', help='Only rows that are not closed yet')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        filters = Q()
+        if options['company']:
+            filters &= Q(company_code_id=options['company'])
+        if options['from_date']:
+            filters &= Q(start_date__gte=_parse_date(options['from_date'], '--from-date'))
+        if options['to_date']:
+            filters &= Q(start_date__lte=_parse_date(options['to_date'], '--to-date'))
+        if options['open_only']:
+            filters &= Q(is_closed=False)
+
+        for model, fk in ((TripData, 'trip_id'), (ScheduleData, 'schedule_id')):
+            ids = list(model.objects.filter(filters).order_by('pk').values_list('pk', flat=True))
+            chunk_size = options['chunk_size']
+            for start in range(0, len(ids), chunk_size):
+                self._rebuild_chunk(model, fk, ids[start:start + chunk_size])
+            self.stdout.write(f'{model.__name__}: rebuilt {len(ids)} rows')
+
+    def _rebuild_chunk(self, model, fk, chunk):
+        with transaction.atomic():
+            # Lock first: ingest updates for these rows wait until the rebuilt
+            # values are committed, then apply on top of them.
+            locked = list(model.objects.select_for_update().filter(pk__in=chunk).values_list('pk', flat=True))
+
+            totals = {
+                row[fk]: row
+                for row in TransactionData.objects.filter(**{f'{fk}__in': locked})
+                .values(fk)
+                .annotate(
+                    collection=Sum('ticket_amount'),
+                    upi=Sum('ticket_amount', filter=Q(ticket_status=TransactionData.PaymentMode.UPI)),
+                    ticket_count=Count('id'),
+                    **{counter: Sum(field) for counter, field in _LIVE_COUNT_FIELDS},
+                )
+            }
+
+            last_ticket = (
+                TransactionData.objects.filter(**{fk: OuterRef('pk')})
+                .order_by('-ticket_time', '-id')
+            )
+            rows = model.objects.filter(pk__in=locked).annotate(**{
+                f'_{field}': Subquery(last_ticket.values(source)[:1])
+                for field, source in _LAST_TICKET_FIELDS
+            }).only('pk')
+
+            objs = []
+            for row in rows:
+                agg = totals.get(row.pk, {})
+                obj = model(pk=row.pk)
+                obj.live_collection   = agg.get('collection') or 0
+                obj.live_upi_amount   = agg.get('upi') or 0
+                obj.live_ticket_count = agg.get('ticket_count') or 0
+                for counter, _ in _LIVE_COUNT_FIELDS:
+                    setattr(obj, counter, agg.get(counter) or 0)
+                for field, _ in _LAST_TICKET_FIELDS:
+                    setattr(obj, field, getattr(row, f'_{field}'))
+                if model is TripData:
+                    obj.report_version = F('report_version') + 1
+                objs.append(obj)
+
+            fields = _UPDATE_FIELDS + ['report_version'] if model is TripData else _UPDATE_FIELDS
+            model.objects.bulk_update(objs, fields)
@@ -0,0 +1,173 @@
+"""
+Master-data snapshot
+====================
+Per-company lookup tables the ingest path needs on every device frame,
+so a ticket resolves its crew, bus, route stages and expense category
+with dict lookups instead of 5–7 queries:
+
+  employees       employee_code → pk   (is_deleted=False)
+  employee_names  employee_name → pk   (lowest pk, any — odometer/expense frames carry names)
+  vehicles        bus_reg_num   → pk   (is_deleted=False)
+  vehicles_all    bus_reg_num   → pk   (any — odometer/expense frames match deleted buses too)
+  routes          route_code    → [pk, [RouteStage pk ordered by sequence_no]]
+  expenses        expense_code  → pk
+
+Two layers:
+  1. Redis   — snapshot stored under its company version; built once per
+               version by whichever worker misses first.
+  2. Process — each worker keeps the last snapshot it loaded and re-checks
+               the Redis version at most every _LOCAL_RECHECK seconds, so the
+               steady state costs no round-trip at all.
+
+Invalidation: signals.py bumps the company version on post_save/post_delete
+of Employee, VehicleType, Route, RouteStage and ExpenseMaster. Code paths
+that write those models with bulk_create/update() (no signals) must call
+invalidate_master_snapshot() themselves. Other workers pick the change up
+within _LOCAL_RECHECK seconds.
+"""
+
+import time
+
+from django.core.cache import cache
+
+from . import cache_versions
+
+_VERSION_KEY_PREFIX  = 'snapshot:master:ver:'
+_SNAPSHOT_KEY_PREFIX = 'snapshot:master:'
+
+# Redis copy outlives any sane version lifetime; stale versions just expire.
+_SNAPSHOT_TTL = 86400  # seconds
+
+# How long a worker trusts its in-process copy before re-reading the version.
+_LOCAL_RECHECK = 5  # seconds
+
+# company_id → (version, checked_at, snapshot)
+_local = {}
+
+
+def _version_key(company_id) -> str:
+    return f'{_VERSION_KEY_PREFIX}{company_id}'
+
+
+def _snapshot_key(company_id, version) -> str:
+    return f'{_SNAPSHOT_KEY_PREFIX}{company_id}:{version}'
+
+
+def _current_version(company_id) -> int:
+    return cache_versions.current(_version_key(company_id))
+
+
+def _build_snapshot(company_id) -> dict:
+    from .models import Employee, VehicleType, Route, RouteStage, ExpenseMaster
+
+    employees, employee_names = {}, {}
+    for pk, code, name, is_deleted in (
+        Employee.objects.filter(company_id=company_id)
+        .order_by('pk').values_list('pk', 'employee_code', 'employee_name', 'is_deleted')
+    ):
+        if not is_deleted:
+            employees[code] = pk
+        employee_names.setdefault(name, pk)
+
+    vehicles, vehicles_all = {}, {}
+    for pk, reg, is_deleted in (
+        VehicleType.objects.filter(company_id=company_id)
+        .order_by('pk').values_list('pk', 'bus_reg_num', 'is_deleted')
+    ):
+        if not is_deleted:
+            vehicles[reg] = pk
+        vehicles_all.setdefault(reg, pk)
+
+    routes = {}
+    route_codes = {}
+    for pk, code in Route.objects.filter(company_id=company_id).order_by('pk').values_list('pk', 'route_code'):
+        if code not in routes:
+            routes[code] = [pk, []]
+            route_codes[pk] = code
+    for route_pk, stage_pk in (
+        RouteStage.objects.filter(route__company_id=company_id, route_id__in=route_codes)
+        .order_by('route_id', 'sequence_no').values_list('route_id', 'pk')
+    ):
+        routes[route_codes[route_pk]][1].append(stage_pk)
+
+    expenses = dict(
+        ExpenseMaster.objects.filter(company_id=company_id)
+        .order_by('-pk').values_list('expense_code', 'pk')
+    )
+
+    return {
+        'employees':      employees,
+        'employee_names': employee_names,
+        'vehicles':       vehicles,
+        'vehicles_all':   vehicles_all,
+        'routes':         routes,
+        'expenses':       expenses,
+    }
+
+
+def get_master_snapshot(company_id) -> dict:
+    """
+    Return the current master-data snapshot for a company (see module
+    docstring for its shape). Never returns None.
+    """
+    now = time.monotonic()
+    local = _local.get(company_id)
+    if local and now - local[1] < _LOCAL_RECHECK:
+        return local[2]
+
+    version = _current_version(company_id)
+    if local and local[0] == version:
+        _local[company_id] = (version, now, local[2])
+        return local[2]
+
+    key = _snapshot_key(company_id, version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _build_snapshot(company_id)
+        cache.set(key, snapshot, timeout=_SNAPSHOT_TTL)
+
+    _local[company_id] = (version, now, snapshot)
+    return snapshot
+
+
+def invalidate_master_snapshot(company_id) -> None:
+    """
+    Bump the company's snapshot version. The next reader in any process
+    (after at most _LOCAL_RECHECK seconds) rebuilds from the DB.
+    """
+    cache_versions.bump(_version_key(company_id))
+    _local.pop(company_id, None)
+
+
+# ── Lookups ───────────────────────────────────────────────────────────────────
+# Thin accessors so callers don't depend on the snapshot's internal layout.
+
+def employee_pk(company_id, employee_code):
+    if not employee_code:
+        return None
+    return get_master_snapshot(company_id)['employees'].get(employee_code)
+
+
+def employee_pk_by_name(company_id, employee_name):
+    if not employee_name:
+        return None
+    return get_master_snapshot(company_id)['employee_names'].get(employee_name)
+
+
+def vehicle_pk(company_id, bus_reg_num, include_deleted=False):
+    if not bus_reg_num:
+        return None
+    table = 'vehicles_all' if include_deleted else 'vehicles'
+    return get_master_snapshot(company_id)[table].get(bus_reg_num)
+
+
+def route_entry(company_id, route_code):
+    """(route_pk, [stage_pk ordered by sequence_no]) or (None, [])."""
+    entry = get_master_snapshot(company_id)['routes'].get(route_code)
+    return (entry[0], entry[1]) if entry else (None, [])
+
+
+def expense_master_pk(company_id, expense_code):
+    if not expense_code:
+        return None
+    return get_master_snapshot(company_id)['expenses'].get(expense_code)
@@ -0,0 +1,147 @@
+"""
+MDB import jobs
+===============
+An MDB import runs as a Celery task (tasks.run_mdb_import) rather than
+inside the upload request, so neither a closed browser tab nor a web
+worker timeout can stop it half-way:
+
+  start()   — called by MdbImportView once the upload is saved. Takes the
+              company's import lock, records a `queued` event and enqueues
+              the task; the view answers 202 {job_id} straight away.
+  run()     — body of the task. Appends every event of
+              MdbImportService.run_stream to the job's Redis stream.
+  events()  — behind GET import-mdb/<job_id>/events?after=<id>. Returns
+              the events recorded after a stream id (or from the
+              beginning) without waiting; the page polls it until the
+              job's final event, so a client that drops or reloads simply
+              picks up where it left off.
+
+Short polling rather than a held-open stream: production serves Django
+through gunicorn's sync workers, where a stream would pin a worker for
+the whole import, and under ASGI Django buffers sync iterators. Each poll
+is one XREAD and no DB query.
+
+Events are the dicts run_stream yields (table_done / done / error), plus
+`queued` and `started`. A task re-delivered after a worker crash starts
+over and emits `started` again; clients reset their progress on it.
+
+Lock: one import per company at a time, independent of any DB
+connection. The lock value is the job id, so a re-delivered task still
+owns it; it is released when the task finishes and otherwise expires
+after LOCK_TTL. Imports for different companies run in parallel on the
+worker pool.
+
+The MDB password, if any, is kept in the cache for the job rather than
+in the task message, and deleted once the task has run.
+"""
+
+import json
+import logging
+import uuid
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = 'mdb:import:'
+
+JOB_TTL  = 86400      # seconds the event stream is kept for replay
+LOCK_TTL = 2 * 3600   # longest an import may hold its company's lock
+
+# Most events returned by one poll; the page asks again for the rest.
+_POLL_COUNT = 200
+
+_FINAL_EVENTS = ('done', 'error')
+
+
+def _stream_key(job_id) -> str:
+    return f'{_KEY_PREFIX}{job_id}'
+
+
+def _lock_key(company_id) -> str:
+    return f'{_KEY_PREFIX}lock:{company_id}'
+
+
+def _password_key(job_id) -> str:
+    return f'{_KEY_PREFIX}{job_id}:password'
+
+
+def append(job_id, event) -> None:
+    conn = get_redis_connection('default')
+    key = _stream_key(job_id)
+    conn.xadd(key, {'data': json.dumps(event, default=str)})
+    conn.expire(key, JOB_TTL)
+
+
+def exists(job_id) -> bool:
+    return bool(get_redis_connection('default').exists(_stream_key(job_id)))
+
+
+def start(mdb_path, company, user, password=None):
+    """
+    Enqueue an import of `mdb_path` into `company`. Returns the job id, or
+    None when another import for the company is still running.
+    """
+    from .tasks import run_mdb_import
+
+    job_id = uuid.uuid4().hex
+    if not cache.add(_lock_key(company.id), job_id, timeout=LOCK_TTL):
+        return None
+
+    try:
+        if password:
+            cache.set(_password_key(job_id), password, timeout=LOCK_TTL)
+        append(job_id, {'type': 'queued'})
+        run_mdb_import.delay(job_id, mdb_path, company.id, user.id)
+    except Exception:
+        cache.delete_many([_lock_key(company.id), _password_key(job_id)])
+        raise
+    return job_id
+
+
+def run(job_id, mdb_path, company_id, user_id) -> None:
+    """Run the import and record its events. Always ends with done or error."""
+    from .models import Company, CustomUser
+    from .views.web.imports.mdb import MdbImportService, MdbPasswordError, MdbReadError
+
+    try:
+        company = Company.objects.get(pk=company_id)
+        user = CustomUser.objects.filter(pk=user_id).first()
+        password = cache.get(_password_key(job_id))
+
+        append(job_id, {'type': 'started'})
+        for event in MdbImportService.run_stream(mdb_path, company, user, password):
+            append(job_id, event)
+    except MdbPasswordError:
+        append(job_id, {'type': 'error', 'message': 'Could not open file. Password incorrect or unsupported encryption.'})
+    except MdbReadError as e:
+        append(job_id, {'type': 'error', 'message': f'Failed to read MDB: {str(e)}'})
+    except Exception as e:
+        logger.exception("MDB import job %s failed", job_id)
+        append(job_id, {'type': 'error', 'message': f'Unexpected error: {str(e)}'})
+    finally:
+        cache.delete(_password_key(job_id))
+        if cache.get(_lock_key(company_id)) == job_id:
+            cache.delete(_lock_key(company_id))
+
+
+def events(job_id, after=None) -> dict:
+    """
+    Events of `job_id` recorded after the stream id `after` (from the first
+    event when None), as {events: [{id, type, ...}], last_event_id,
+    finished}. Never blocks.
+    """
+    conn = get_redis_connection('default')
+    result = conn.xread({_stream_key(job_id): after or '0-0'}, count=_POLL_COUNT)
+
+    found, finished = [], False
+    for _, entries in result or ():
+        for entry_id, fields in entries:
+            after = entry_id.decode()
+            event = json.loads(fields[b'data'])
+            found.append({'id': after, **event})
+            if event.get('type') in _FINAL_EVENTS:
+                finished = True
+                break
+    return {'events': found, 'last_event_id': after, 'finished': finished}
@@ -0,0 +1,155 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:00
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TicketAppB', '0015_settingsprofile_device_fk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledata',
+            name='last_passenger_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='last_ticket_no',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='last_ticket_time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='last_to_stage_id',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='TicketAppB.routestage'),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_collection',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_full_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_half_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_ladies_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_lugg_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_phy_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_senior_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_st_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_ticket_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scheduledata',
+            name='live_upi_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='last_passenger_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='last_ticket_no',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='last_ticket_time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='last_to_stage_id',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='TicketAppB.routestage'),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_collection',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_full_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_half_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_ladies_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_lugg_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_phy_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_senior_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_st_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_ticket_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tripdata',
+            name='live_upi_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+    ]
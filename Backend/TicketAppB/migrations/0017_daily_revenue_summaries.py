@@ -0,0 +1,58 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:03
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TicketAppB', '0016_trip_schedule_live_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBusRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('bus_no', models.CharField(blank=True, default='', max_length=30)),
+                ('collection', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('cash_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('upi_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('ticket_count', models.IntegerField(default=0)),
+                ('passenger_count', models.IntegerField(default=0)),
+                ('trip_count', models.IntegerField(default=0)),
+                ('total_km', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_bus_revenue', to='TicketAppB.company')),
+                ('route', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='TicketAppB.route')),
+            ],
+            options={
+                'db_table': 'daily_bus_revenue',
+                'indexes': [models.Index(fields=['company', 'bus_no', 'date'], name='daily_bus_r_company_b391ff_idx')],
+                'constraints': [models.UniqueConstraint(fields=('company', 'date', 'bus_no', 'route'), name='uniq_daily_bus_revenue')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCompanyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('collection', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('cash_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('upi_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('ticket_count', models.IntegerField(default=0)),
+                ('passenger_count', models.IntegerField(default=0)),
+                ('trip_count', models.IntegerField(default=0)),
+                ('total_km', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to='TicketAppB.company')),
+            ],
+            options={
+                'db_table': 'daily_company_revenue',
+                'constraints': [models.UniqueConstraint(fields=('company', 'date'), name='uniq_daily_company_revenue')],
+            },
+        ),
+    ]
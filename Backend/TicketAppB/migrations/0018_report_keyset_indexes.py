@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TicketAppB', '0017_daily_revenue_summaries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduledata',
+            index=models.Index(fields=['company_code', 'start_date', 'created_at', 'id'], name='shd_company_date_created'),
+        ),
+        migrations.AddIndex(
+            model_name='transactiondata',
+            index=models.Index(fields=['company_code', 'ticket_date', 'created_at', 'id'], name='txn_company_date_created'),
+        ),
+        migrations.AddIndex(
+            model_name='tripdata',
+            index=models.Index(fields=['company_code', 'start_date', 'created_at', 'id'], name='trp_company_date_created'),
+        ),
+    ]
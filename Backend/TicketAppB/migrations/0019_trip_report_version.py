@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 01:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TicketAppB', '0018_report_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tripdata',
+            name='report_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -83,6 +83,12 @@ from .payments import AggregatorTransaction, AggregatorPayoutCallback
 PAYMENT_MODELS = ['AggregatorTransaction', 'AggregatorPayoutCallback']
 
 
+# Reporting summary models
+from .summaries import DailyBusRevenue, DailyCompanyRevenue
+
+SUMMARY_MODELS = ['DailyBusRevenue', 'DailyCompanyRevenue']
+
+
 # Public export surface
 __all__ = (
     AUTH_MODELS
@@ -92,4 +98,5 @@ __all__ = (
     + OPERATIONS_MODELS
     + TRANSACTION_MODELS
     + PAYMENT_MODELS
+    + SUMMARY_MODELS
 )
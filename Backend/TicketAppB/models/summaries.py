@@ -0,0 +1,71 @@
+from decimal import Decimal
+from django.db import models
+from .company import Company
+
+# Pre-aggregated daily revenue. Maintained incrementally by the ingest tasks
+# (see daily_revenue.py) and rebuilt from TransactionData / TripData by the
+# nightly reconcile_daily_revenue task.
+#
+#   Ticket metrics  — keyed on ticket_date (the day the money was collected).
+#   Trip metrics    — trip_count / total_km of closed trips, keyed on the
+#                     trip's start_date.
+
+
+class DailyBusRevenue(models.Model):
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='daily_bus_revenue')
+    date    = models.DateField()
+    bus_no  = models.CharField(max_length=30, blank=True, default='')
+    route   = models.ForeignKey('Route', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    # ── Tickets ──────────────────────────────────────────────────────────────
+    collection      = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    cash_amount     = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    upi_amount      = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    ticket_count    = models.IntegerField(default=0)
+    passenger_count = models.IntegerField(default=0)
+
+    # ── Closed trips ─────────────────────────────────────────────────────────
+    trip_count = models.IntegerField(default=0)
+    total_km   = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'daily_bus_revenue'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company', 'date', 'bus_no', 'route'],
+                name='uniq_daily_bus_revenue',
+            ),
+        ]
+        indexes = [models.Index(fields=['company', 'bus_no', 'date'])]
+
+    def __str__(self):
+        return f"{self.bus_no or '-'} {self.date} ({self.company_id})"
+
+
+class DailyCompanyRevenue(models.Model):
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='daily_revenue')
+    date    = models.DateField()
+
+    # ── Tickets ──────────────────────────────────────────────────────────────
+    collection      = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    cash_amount     = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    upi_amount      = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    ticket_count    = models.IntegerField(default=0)
+    passenger_count = models.IntegerField(default=0)
+
+    # ── Closed trips ─────────────────────────────────────────────────────────
+    trip_count = models.IntegerField(default=0)
+    total_km   = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'daily_company_revenue'
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date'], name='uniq_daily_company_revenue'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} ({self.company_id})"
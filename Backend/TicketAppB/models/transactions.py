@@ -163,6 +163,8 @@ class TransactionData(models.Model):
             models.Index(fields=['company_code']),
             models.Index(fields=['unique_code']),
             models.Index(fields=['ticket_date']),
+            # Keyset pagination of the ticket report (newest first per day)
+            models.Index(fields=['company_code', 'ticket_date', 'created_at', 'id'], name='txn_company_date_created'),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -257,6 +259,25 @@ class ScheduleData(models.Model):
     upi_luggage_count  = models.IntegerField(default=0, null=True, blank=True)
     upi_st_count       = models.IntegerField(default=0, null=True, blank=True)
 
+    # ── Live running totals ───────────────────────────────────────────────────
+    # Incremented by the ticket ingest tasks as tickets land, so open-schedule
+    # reports read this row instead of aggregating TransactionData.
+    # Rebuild with: manage.py rebuild_live_counters
+    live_collection      = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    live_upi_amount      = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    live_ticket_count    = models.IntegerField(default=0)
+    live_full_count      = models.IntegerField(default=0)
+    live_half_count      = models.IntegerField(default=0)
+    live_st_count        = models.IntegerField(default=0)
+    live_phy_count       = models.IntegerField(default=0)
+    live_lugg_count      = models.IntegerField(default=0)
+    live_ladies_count    = models.IntegerField(default=0)
+    live_senior_count    = models.IntegerField(default=0)
+    last_ticket_no       = models.CharField(max_length=20, null=True, blank=True)
+    last_ticket_time     = models.TimeField(null=True, blank=True)
+    last_to_stage_id     = models.ForeignKey('RouteStage', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_passenger_count = models.IntegerField(null=True, blank=True)
+
     # ── Status ────────────────────────────────────────────────────────────────
     is_closed    = models.BooleanField(default=False, db_index=True)
     auto_opened  = models.BooleanField(default=False)  # True when open fields auto-populated from close signal (open signal missed)
@@ -283,6 +304,7 @@ class ScheduleData(models.Model):
             models.Index(fields=['company_code']),
             models.Index(fields=['start_date']),
             models.Index(fields=['is_closed']),
+            models.Index(fields=['company_code', 'start_date', 'created_at', 'id'], name='shd_company_date_created'),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -371,6 +393,30 @@ class TripData(models.Model):
     upi_ticket_count  = models.IntegerField(default=0, null=True, blank=True)
     upi_ticket_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), null=True, blank=True)
 
+    # ── Live running totals ───────────────────────────────────────────────────
+    # Incremented by the ticket ingest tasks as tickets land, so open-trip
+    # reports read this row instead of aggregating TransactionData.
+    # Rebuild with: manage.py rebuild_live_counters
+    live_collection      = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    live_upi_amount      = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    live_ticket_count    = models.IntegerField(default=0)
+    live_full_count      = models.IntegerField(default=0)
+    live_half_count      = models.IntegerField(default=0)
+    live_st_count        = models.IntegerField(default=0)
+    live_phy_count       = models.IntegerField(default=0)
+    live_lugg_count      = models.IntegerField(default=0)
+    live_ladies_count    = models.IntegerField(default=0)
+    live_senior_count    = models.IntegerField(default=0)
+    last_ticket_no       = models.CharField(max_length=20, null=True, blank=True)
+    last_ticket_time     = models.TimeField(null=True, blank=True)
+    last_to_stage_id     = models.ForeignKey('RouteStage', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_passenger_count = models.IntegerField(null=True, blank=True)
+
+    # Bumped whenever the trip's tickets or close summary change; cached
+    # closed-trip report fragments are only served while it matches
+    # (see trip_report_cache.py).
+    report_version       = models.PositiveIntegerField(default=0)
+
     # ── Status ────────────────────────────────────────────────────────────────
     is_closed   = models.BooleanField(default=False, db_index=True)
     auto_opened = models.BooleanField(default=False)  # True when open fields auto-populated from close signal (open signal missed)
@@ -398,6 +444,7 @@ class TripData(models.Model):
             models.Index(fields=['start_date']),
             models.Index(fields=['schedule_id']),
             models.Index(fields=['is_closed']),
+            models.Index(fields=['company_code', 'start_date', 'created_at', 'id'], name='trp_company_date_created'),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -0,0 +1,126 @@
+"""
+Principal cache
+===============
+Every authenticated request needs the user with its company and dealer:
+SessionAuthentication hands it to the views, LicensePermission reads the
+company/dealer flags and licence date off it, _meets_tier its role and
+tier. Those rows change rarely, so instead of a User+Company+Dealer join
+per request the user (with company and dealer attached) is cached in two
+layers:
+
+  local   — per-process LRU of _LOCAL_MAX users, each kept _LOCAL_TTL
+            seconds. A hit costs no Redis or DB round trip.
+  Redis   — auth:principal:<user_id>      (version, pickled user)
+            auth:principal:ver:<user_id>  version token
+            Read together in one get_many; an entry whose version is not
+            the current token counts as a miss.
+
+Invalidation sets a fresh version token for the affected users after
+commit, so an entry built from a row read before the change can never be
+served again, even if it is stored afterwards. signals.py does it when a
+user is saved or deleted, and for all users of a company or dealer when
+that is saved or deleted (the cascades update users with update(), which
+sends no signal). Other processes may serve their local copy for up to
+_LOCAL_TTL more seconds; deactivation does not depend on that, because
+it kills the sessions as well.
+
+Each request gets its own unpickled instances, so a view that modifies
+or saves request.user never touches another request's copy.
+"""
+
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+_KEY_PREFIX     = 'auth:principal:'
+_VER_KEY_PREFIX = 'auth:principal:ver:'
+
+_ENTRY_TTL = 300  # seconds
+_LOCAL_TTL = 5    # seconds
+_LOCAL_MAX = 1024
+
+_local = OrderedDict()  # user_id → (deadline, blob)
+_local_lock = threading.Lock()
+
+
+def _key(user_id) -> str:
+    return f'{_KEY_PREFIX}{user_id}'
+
+
+def _ver_key(user_id) -> str:
+    return f'{_VER_KEY_PREFIX}{user_id}'
+
+
+def _local_get(user_id):
+    with _local_lock:
+        item = _local.get(user_id)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            del _local[user_id]
+            return None
+        _local.move_to_end(user_id)
+        return item[1]
+
+
+def _local_put(user_id, blob) -> None:
+    with _local_lock:
+        _local[user_id] = (time.monotonic() + _LOCAL_TTL, blob)
+        _local.move_to_end(user_id)
+        while len(_local) > _LOCAL_MAX:
+            _local.popitem(last=False)
+
+
+def _load(user_id):
+    """DB path for a miss: fetch the user and store it under the current version."""
+    ver_key = _ver_key(user_id)
+    # Read (or create) the version before the row, so a change committed in
+    # between leaves this entry already stale.
+    cache.add(ver_key, uuid.uuid4().hex, timeout=None)
+    version = cache.get(ver_key)
+
+    user = (
+        get_user_model().objects.select_related('company', 'dealer')
+        .filter(pk=user_id, is_active=True).first()
+    )
+    if user is None:
+        return None, None
+    blob = pickle.dumps(user, pickle.HIGHEST_PROTOCOL)
+    if version is not None:
+        cache.set(_key(user_id), (version, blob), timeout=_ENTRY_TTL)
+    return user, blob
+
+
+def get_user(user_id):
+    """The active user `user_id` with company and dealer loaded, or None."""
+    blob = _local_get(user_id)
+    if blob is not None:
+        return pickle.loads(blob)
+
+    ver_key, key = _ver_key(user_id), _key(user_id)
+    found = cache.get_many([ver_key, key])
+    entry = found.get(key)
+    if entry is not None and found.get(ver_key) is not None and entry[0] == found[ver_key]:
+        _local_put(user_id, entry[1])
+        return pickle.loads(entry[1])
+
+    user, blob = _load(user_id)
+    if blob is not None:
+        _local_put(user_id, blob)
+    return user
+
+
+def invalidate_principals(user_ids) -> None:
+    """Retire the cached principals of these users (call after commit)."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    with _local_lock:
+        for user_id in user_ids:
+            _local.pop(user_id, None)
+    cache.set_many({_ver_key(user_id): uuid.uuid4().hex for user_id in user_ids}, timeout=None)
@@ -0,0 +1,99 @@
+"""
+Web report response cache
+=========================
+get_all_transaction_data / get_all_trip_data / get_all_schedule_data
+answer full date-range queries for every cold tab. Their page payloads are
+cached in Redis, keyed on
+
+    (company, report, from_date, to_date, cursor, page_size)
+    + the data version of every date in the range
+
+Data versions are per (company, report, date) counters:
+
+  tickets    bumped by the ticket ingest tasks for each ticket_date written
+             (and by TransactionData deletes, signals.py)
+  trips      bumped on every TripData save/delete for its start_date
+  schedules  bumped on every ScheduleData save/delete for its start_date,
+             and on TripData changes (the report shows trips_count)
+
+A write bumps only the dates it touches, after commit, so past dates stay
+pure cache hits and only "today" churns. Superseded payloads are never
+read again and simply expire.
+
+The per-day versions are cache_versions counters, so a key lost to
+eviction never restarts at a version an old payload was stored under.
+"""
+
+import hashlib
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import cache_versions
+
+REPORTS = ('tickets', 'trips', 'schedules')
+
+_VERSION_KEY_PREFIX  = 'report:ver:'
+_RESPONSE_KEY_PREFIX = 'report:resp:'
+
+_RESPONSE_TTL = 86400  # seconds
+
+# Longer ranges are rare, one-off exports; not worth a version lookup per day.
+_MAX_CACHED_DAYS = 92
+
+
+def _version_key(company_id, report, day) -> str:
+    return f'{_VERSION_KEY_PREFIX}{company_id}:{report}:{day}'
+
+
+def _bump(keys):
+    for key in keys:
+        cache_versions.bump(key)
+
+
+def bump_report_dates(company_id, reports, dates) -> None:
+    """
+    Invalidate the cached `reports` pages of `company_id` covering any of
+    `dates`. Runs after the current transaction commits, so no reader can
+    cache pre-commit rows under the new version.
+    """
+    keys = {_version_key(company_id, report, day) for report in reports for day in dates if day}
+    if company_id and keys:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def _versions(company_id, report, first, last) -> list:
+    keys = [_version_key(company_id, report, first + timedelta(days=i))
+            for i in range((last - first).days + 1)]
+    found = cache_versions.current_many(keys)
+    return [found[key] for key in keys]
+
+
+def response_key(company_id, report, from_date, to_date, cursor=None, page_size=None):
+    """
+    Cache key for one report page, or None when the request should not be
+    cached (no company, unparseable dates, very long range).
+    """
+    if not company_id:
+        return None
+    try:
+        first, last = date.fromisoformat(from_date), date.fromisoformat(to_date)
+    except (TypeError, ValueError):
+        return None
+    if last < first or (last - first).days >= _MAX_CACHED_DAYS:
+        return None
+
+    versions = _versions(company_id, report, first, last)
+    raw = f'{from_date}|{to_date}|{cursor or ""}|{page_size or ""}|' + ','.join(map(str, versions))
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'{_RESPONSE_KEY_PREFIX}{company_id}:{report}:{digest}'
+
+
+def get_response(key):
+    return cache.get(key) if key else None
+
+
+def set_response(key, payload) -> None:
+    if key:
+        cache.set(key, payload, timeout=_RESPONSE_TTL)
@@ -20,8 +20,9 @@ class ETMDeviceSerializer(serializers.ModelSerializer):
             'dealer_name',
             'allocation_status',
             'is_active',
+            'last_seen_at',
             'created_by',
             'created_at',
             'updated_at',
         ]
-        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'last_seen_at', 'created_by', 'created_at', 'updated_at']
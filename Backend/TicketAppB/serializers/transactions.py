@@ -1,6 +1,8 @@
 from decimal import Decimal
+from operator import itemgetter
+from django.db.models import Count, F, OuterRef, Subquery
 from rest_framework import serializers
-from ..models import TransactionData, TripData, ScheduleData
+from ..models import TransactionData, TripData, ScheduleData, RouteDepot
 
 
 class TicketDataSerializer(serializers.ModelSerializer):
@@ -308,3 +310,185 @@ class ScheduleDataSerializer(serializers.ModelSerializer):
 
     def get_company_name(self, obj):
         return obj.company_code.company_name if obj.company_code else None
+
+
+# ── Flat report rows ──────────────────────────────────────────────────────────
+# values()-based fast path for the web report endpoints and exports. Emits
+# the same dicts as the serializers above (same keys, order and formatting)
+# without building model instances or calling a method per field:
+#
+#   * plain model fields are read straight from values(); only dates, times,
+#     datetimes and decimals go through the serializer field's
+#     to_representation(), so formatting stays identical.
+#   * the SerializerMethodFields are annotated in SQL (route_code,
+#     depot_code, stage names, ...) and finished with a dict lookup.
+#
+# Keep these in step with the serializers when fields change.
+
+# ticket_type bit mask → label, for every combination of the five bits
+_TICKET_TYPE_LABELS = [
+    ' + '.join(label for bit, label in TicketDataSerializer.TICKET_TYPE_BITS.items() if val & bit) or 'Unknown'
+    for val in range(32)
+]
+
+_CONVERTED_FIELDS = (
+    serializers.DecimalField, serializers.DateField,
+    serializers.TimeField, serializers.DateTimeField,
+)
+
+
+def _first_depot_code():
+    # Same row as route_depots.first(): lowest RouteDepot pk of the route.
+    return Subquery(
+        RouteDepot.objects.filter(route=OuterRef('route_id'))
+        .order_by('pk').values('depot__depot_code')[:1]
+    )
+
+
+def _converted(field, column):
+    convert = field.to_representation
+
+    def get(row):
+        value = row[column]
+        return None if value is None else convert(value)
+    return get
+
+
+class FlatReportRows:
+    """
+    serializer_class  — the serializer whose output is reproduced
+    annotations       — name → expression added to the values() query
+                        (skipped if the queryset already carries it)
+    computed          — SerializerMethodField name → row getter
+    """
+
+    def __init__(self, serializer_class, annotations, computed):
+        self.serializer_class = serializer_class
+        self.annotations = annotations
+        self.computed = computed
+        self._plan = None
+
+    def _build_plan(self):
+        fields = self.serializer_class().fields
+        columns, plan = set(self.annotations), []
+        for name, field in fields.items():
+            if name in self.computed:
+                plan.append((name, self.computed[name]))
+                continue
+            columns.add(name)
+            if isinstance(field, _CONVERTED_FIELDS):
+                plan.append((name, _converted(field, name)))
+            else:
+                plan.append((name, itemgetter(name)))
+        return sorted(columns - set(self.annotations)), plan
+
+    def values(self, qs):
+        """`qs` as a values() queryset carrying every column format() needs."""
+        if self._plan is None:
+            self._plan = self._build_plan()
+        columns = self._plan[0]
+        missing = {k: v for k, v in self.annotations.items() if k not in qs.query.annotations}
+        return (
+            qs.select_related(None).prefetch_related(None)
+            .annotate(**missing)
+            .values(*columns, *self.annotations)
+        )
+
+    def format(self, rows):
+        """Serializer-equivalent dicts for rows of values()."""
+        if self._plan is None:
+            self._plan = self._build_plan()
+        plan = self._plan[1]
+        return [{name: get(row) for name, get in plan} for row in rows]
+
+
+def _stage_name(fk, raw, name):
+    def get(row):
+        return row[name] if row[fk] else row[raw]
+    return get
+
+
+def _ticket_type_display(row):
+    val = row['ticket_type']
+    return 'Unknown' if val is None else _TICKET_TYPE_LABELS[val & 31]
+
+
+def _formatted_ticket_date(row):
+    day = row['ticket_date']
+    return day.strftime('%d-%m-%Y') if day else None
+
+
+def _status(row):
+    return 'closed' if row['_is_closed'] else 'open'
+
+
+def _total_cash_amount(row):
+    total = row['total_collection'] or Decimal('0.00')
+    upi = row['upi_ticket_amount'] or Decimal('0.00')
+    return max(Decimal('0.00'), total - upi)
+
+
+ticket_report_rows = FlatReportRows(
+    TicketDataSerializer,
+    annotations={
+        '_from_stage_name': F('from_stage_id__stage__stage_name'),
+        '_to_stage_name':   F('to_stage_id__stage__stage_name'),
+        '_trip_no':         F('trip_id__trip_no'),
+        '_schedule_no':     F('schedule_id__schedule_no'),
+        '_route_code':      F('route_id__route_code'),
+        '_depot_code':      _first_depot_code(),
+        '_company_name':    F('company_code__company_name'),
+        '_from_stage_fk':   F('from_stage_id'),
+        '_to_stage_fk':     F('to_stage_id'),
+    },
+    computed={
+        'ticket_type_display':   _ticket_type_display,
+        'formatted_ticket_date': _formatted_ticket_date,
+        'from_stage_name':       _stage_name('_from_stage_fk', 'from_stage', '_from_stage_name'),
+        'to_stage_name':         _stage_name('_to_stage_fk', 'to_stage', '_to_stage_name'),
+        'trip_no':               itemgetter('_trip_no'),
+        'schedule_no':           itemgetter('_schedule_no'),
+        'route_code':            itemgetter('_route_code'),
+        'depot_code':            itemgetter('_depot_code'),
+        'company_name':          itemgetter('_company_name'),
+    },
+)
+
+trip_report_rows = FlatReportRows(
+    TripDataSerializer,
+    annotations={
+        '_is_closed':    F('is_closed'),
+        '_route_code':   F('route_id__route_code'),
+        '_depot_code':   _first_depot_code(),
+        '_company_name': F('company_code__company_name'),
+    },
+    computed={
+        'status':            _status,
+        'route_code':        itemgetter('_route_code'),
+        'depot_code':        itemgetter('_depot_code'),
+        'total_cash_amount': _total_cash_amount,
+        'company_name':      itemgetter('_company_name'),
+    },
+)
+
+schedule_report_rows = FlatReportRows(
+    ScheduleDataSerializer,
+    annotations={
+        '_is_closed':     F('is_closed'),
+        '_route_code':    F('route_id__route_code'),
+        '_depot_code':    _first_depot_code(),
+        '_company_name':  F('company_code__company_name'),
+        '_battery_start': F('battery_open'),
+        '_battery_end':   F('battery_close'),
+        '_trips_count':   Count('trips'),
+    },
+    computed={
+        'status':        _status,
+        'route_code':    itemgetter('_route_code'),
+        'depot_code':    itemgetter('_depot_code'),
+        'battery_start': itemgetter('_battery_start'),
+        'battery_end':   itemgetter('_battery_end'),
+        'trips_count':   itemgetter('_trips_count'),
+        'company_name':  itemgetter('_company_name'),
+    },
+)
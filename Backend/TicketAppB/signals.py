@@ -1,9 +1,23 @@
 from django.utils import timezone
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete, pre_delete
 from django.contrib.auth import get_user_model
-from .models import Route, Fare, Company, Dealer, UserSession
+from .models import (
+    Route, Fare, Company, Dealer, UserSession,
+    Employee, VehicleType, RouteStage, ExpenseMaster,
+    ScheduleData, TripData, ETMDevice, TransactionData,
+    Stage, BusType, Currency, Settings, EmployeeType, SettingsProfile,
+)
 from .authentication import delete_session_cache, set_session_revoked
+from .principal_cache import invalidate_principals
+from .master_snapshot import invalidate_master_snapshot
+from .device_masterdata import invalidate_device_masterdata
+from .device_busdat import invalidate_busdat
+from . import trip_identity
+from .device_heartbeat import invalidate_device_status
+from .report_cache import bump_report_dates
+from .live_feed import publish
 
 
 # COMPANY / DEALER ACTIVE STATUS CASCADE
@@ -13,7 +27,12 @@ def cascade_company_active_status(sender, instance, created, **kwargs):
     if created:
         return
     User = get_user_model()
-    User.objects.filter(company=instance).update(is_active=instance.is_active)
+    users = User.objects.filter(company=instance)
+    users.update(is_active=instance.is_active)
+    # update() sends no signal, and every cached principal of the company
+    # carries this row (is_active, licence dates) — retire them all.
+    user_ids = list(users.values_list('pk', flat=True))
+    transaction.on_commit(lambda: invalidate_principals(user_ids))
 
     # Fix 3: when a company is deactivated, immediately kill all active sessions
     # for its users. Without this, those users get a 403 (LicensePermission) on
@@ -37,7 +56,10 @@ def cascade_dealer_active_status(sender, instance, created, **kwargs):
     if created:
         return
     User = get_user_model()
-    User.objects.filter(dealer=instance).update(is_active=instance.is_active)
+    users = User.objects.filter(dealer=instance)
+    users.update(is_active=instance.is_active)
+    user_ids = list(users.values_list('pk', flat=True))
+    transaction.on_commit(lambda: invalidate_principals(user_ids))
 
     # Fix 3: same as company cascade — kill sessions immediately on deactivation.
     if not instance.is_active:
@@ -52,6 +74,26 @@ def cascade_dealer_active_status(sender, instance, created, **kwargs):
             delete_session_cache(uid_str)
 
 
+# PRINCIPAL CACHE
+# A user's own changes (users.py edits, toggle, password, last_login) come
+# through save(). Deleting a company/dealer nulls its users' FK without a
+# signal, so their ids are collected before the delete.
+
+@receiver(post_save,   sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_principal_on_user_change(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_principals([user_id]))
+
+
+@receiver(pre_delete, sender=Company)
+@receiver(pre_delete, sender=Dealer)
+def invalidate_principals_on_account_delete(sender, instance, **kwargs):
+    field = 'company' if sender is Company else 'dealer'
+    user_ids = list(get_user_model().objects.filter(**{field: instance}).values_list('pk', flat=True))
+    transaction.on_commit(lambda: invalidate_principals(user_ids))
+
+
 # ROUTE SIGNALS
 @receiver(pre_save, sender=Route)
 def capture_old_route_name(sender, instance, **kwargs):
@@ -104,4 +146,221 @@ def sync_fare_route_name(sender, instance, created, **kwargs):
         )
         print(f"✅ Synced route_name '{instance.route_name}' across {updated_count} Fare records")
     else:
-        print(f"ℹ️ Route name unchanged - no Fare records updated")
\ No newline at end of file
+        print(f"ℹ️ Route name unchanged - no Fare records updated")
+
+
+# MASTER-DATA SNAPSHOT INVALIDATION
+# Ingest workers resolve crew / bus / route stages / expense codes from a
+# per-company snapshot (master_snapshot.py). Any row change bumps the
+# company's snapshot version. bulk_create/update() bypass these — callers
+# doing that invalidate explicitly.
+
+@receiver(post_save,   sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save,   sender=VehicleType)
+@receiver(post_delete, sender=VehicleType)
+@receiver(post_save,   sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save,   sender=RouteStage)
+@receiver(post_delete, sender=RouteStage)
+@receiver(post_save,   sender=ExpenseMaster)
+@receiver(post_delete, sender=ExpenseMaster)
+def invalidate_master_snapshot_on_change(sender, instance, **kwargs):
+    if instance.company_id:
+        # After commit, so no worker rebuilds the new version from old rows.
+        company_id = instance.company_id
+        transaction.on_commit(lambda: invalidate_master_snapshot(company_id))
+
+
+# DEVICE MASTER-DATA FILES
+# ROUTELST / STAGE / RTE / LANGUAGE / CURRENCY / CREW / VEHICLE / EXPENSEDET
+# files served to devices are cached per company version (device_masterdata.py). Any change to the rows
+# they are built from bumps it; bulk writers invalidate explicitly. Fare has
+# no post_delete hook so fare-matrix deletes stay single-query fast deletes —
+# the one view that deletes fares invalidates itself.
+
+@receiver(post_save,   sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save,   sender=RouteStage)
+@receiver(post_delete, sender=RouteStage)
+@receiver(post_save,   sender=Stage)
+@receiver(post_delete, sender=Stage)
+@receiver(post_save,   sender=Fare)
+@receiver(post_save,   sender=BusType)
+@receiver(post_delete, sender=BusType)
+@receiver(post_save,   sender=Currency)
+@receiver(post_delete, sender=Currency)
+@receiver(post_save,   sender=Settings)
+@receiver(post_delete, sender=Settings)
+@receiver(post_save,   sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save,   sender=EmployeeType)
+@receiver(post_delete, sender=EmployeeType)
+@receiver(post_save,   sender=VehicleType)
+@receiver(post_delete, sender=VehicleType)
+@receiver(post_save,   sender=ExpenseMaster)
+@receiver(post_delete, sender=ExpenseMaster)
+def invalidate_device_masterdata_on_change(sender, instance, **kwargs):
+    if instance.company_id:
+        company_id = instance.company_id
+        transaction.on_commit(lambda: invalidate_device_masterdata(company_id))
+
+
+# TRIP / SCHEDULE IDENTITY MAP
+# Ingest resolves (palmtec_id, schedule_no, trip_no, start_date) → pk through
+# trip_identity.py. Entries are written only after commit so no worker ever
+# sees a pk whose row might still roll back.
+
+@receiver(post_save, sender=ScheduleData)
+def remember_schedule_identity(sender, instance, created, **kwargs):
+    def _remember():
+        trip_identity.remember_schedule(
+            instance.company_code_id, instance.palmtec_id,
+            instance.schedule_no, instance.start_date, instance.pk,
+        )
+        if created:
+            trip_identity.bump_device_generation(instance.company_code_id, instance.palmtec_id)
+    transaction.on_commit(_remember)
+
+
+@receiver(post_save, sender=TripData)
+def remember_trip_identity(sender, instance, created, **kwargs):
+    def _remember():
+        trip_identity.remember_trip(
+            instance.company_code_id, instance.palmtec_id, instance.schedule_no,
+            instance.trip_no, instance.start_date, instance.pk, instance.schedule_id_id,
+        )
+        if created:
+            trip_identity.bump_device_generation(instance.company_code_id, instance.palmtec_id)
+    transaction.on_commit(_remember)
+
+
+@receiver(post_delete, sender=ScheduleData)
+def forget_schedule_identity(sender, instance, **kwargs):
+    trip_identity.forget_schedule(
+        instance.company_code_id, instance.palmtec_id, instance.schedule_no, instance.start_date,
+    )
+    trip_identity.bump_device_generation(instance.company_code_id, instance.palmtec_id)
+
+
+@receiver(post_delete, sender=TripData)
+def forget_trip_identity(sender, instance, **kwargs):
+    trip_identity.forget_trip(
+        instance.company_code_id, instance.palmtec_id, instance.schedule_no,
+        instance.trip_no, instance.start_date,
+    )
+    trip_identity.bump_device_generation(instance.company_code_id, instance.palmtec_id)
+
+
+# WEB REPORT CACHE
+# Cached report pages (report_cache.py) are keyed on per-date data versions.
+# Trip and schedule rows bump their start_date; ticket inserts are bulk and
+# bump from the ingest tasks, so only ticket deletes are handled here.
+
+@receiver(post_save,   sender=TripData)
+@receiver(post_delete, sender=TripData)
+def bump_trip_report_dates(sender, instance, **kwargs):
+    # The schedule report shows trips_count, so trips invalidate it too.
+    bump_report_dates(instance.company_code_id, ('trips', 'schedules'), [instance.start_date])
+
+
+@receiver(post_save,   sender=ScheduleData)
+@receiver(post_delete, sender=ScheduleData)
+def bump_schedule_report_dates(sender, instance, **kwargs):
+    bump_report_dates(instance.company_code_id, ('schedules',), [instance.start_date])
+
+
+@receiver(post_delete, sender=TransactionData)
+def bump_ticket_report_dates(sender, instance, **kwargs):
+    bump_report_dates(instance.company_code_id, ('tickets',), [instance.ticket_date])
+
+
+# LIVE REPORT FEED
+# Trip / schedule opens and closes go out on the company's live feed
+# (live_feed.py) after commit. Tickets are published by the ingest tasks.
+
+@receiver(post_save, sender=TripData)
+def publish_trip_event(sender, instance, **kwargs):
+    publish(instance.company_code_id, 'trip', {
+        'id':         instance.pk,
+        'action':     'close' if instance.is_closed else 'open',
+        'start_date': instance.start_date,
+        'palmtec_id': instance.palmtec_id,
+        'trip_no':    instance.trip_no,
+    })
+
+
+@receiver(post_save, sender=ScheduleData)
+def publish_schedule_event(sender, instance, **kwargs):
+    publish(instance.company_code_id, 'schedule', {
+        'id':          instance.pk,
+        'action':      'close' if instance.is_closed else 'open',
+        'start_date':  instance.start_date,
+        'palmtec_id':  instance.palmtec_id,
+        'schedule_no': instance.schedule_no,
+    })
+
+
+# BUS.DAT BLOBS
+# Each device's BUS.DAT is precomputed from its SettingsProfile + the company
+# Settings (device_busdat.py). A change to either, or to what decides whether
+# a device gets one at all, retires the company's blobs and queues one
+# batched rebuild of the fleet.
+
+_BUSDAT_DEVICE_FIELDS = {'company', 'company_id', 'is_active', 'palmtec_id', 'serial_number'}
+
+
+@receiver(post_save,   sender=SettingsProfile)
+@receiver(post_delete, sender=SettingsProfile)
+@receiver(post_save,   sender=Settings)
+@receiver(post_delete, sender=Settings)
+def invalidate_busdat_on_settings_change(sender, instance, **kwargs):
+    if instance.company_id:
+        company_id = instance.company_id
+        transaction.on_commit(lambda: invalidate_busdat(company_id))
+
+
+@receiver(post_save,   sender=ETMDevice)
+@receiver(post_delete, sender=ETMDevice)
+def invalidate_busdat_on_device_change(sender, instance, update_fields=None, **kwargs):
+    # aggregator_tid / last-seen style saves don't touch BUS.DAT
+    if update_fields is not None and not (set(update_fields) & _BUSDAT_DEVICE_FIELDS):
+        return
+    company_ids = {instance.company_id}
+    old = getattr(instance, '_old_device_identity', None)
+    if old:
+        company_ids.add(old[0])
+    for company_id in company_ids - {None}:
+        transaction.on_commit(lambda company_id=company_id: invalidate_busdat(company_id))
+
+
+# DEVICE STATUS CACHE
+# Ingest caches the (company, palmtec_id) → allocated/active check
+# (device_heartbeat.py). Drop the entry for both the old and the new
+# identity whenever a device row changes. The bulk .update() calls in
+# device_registry / dealers only move Stock/DealerPool devices, which are
+# never cached as allocated.
+
+@receiver(pre_save, sender=ETMDevice)
+def capture_old_device_identity(sender, instance, **kwargs):
+    instance._old_device_identity = None
+    if instance.pk:
+        instance._old_device_identity = (
+            ETMDevice.objects.filter(pk=instance.pk)
+            .values_list('company_id', 'palmtec_id').first()
+        )
+
+
+@receiver(post_save, sender=ETMDevice)
+@receiver(post_delete, sender=ETMDevice)
+def invalidate_device_status_on_change(sender, instance, **kwargs):
+    identities = [(instance.company_id, instance.palmtec_id)]
+    old = getattr(instance, '_old_device_identity', None)
+    if old:
+        identities.append(old)
+
+    # After commit, so a worker can't re-cache the pre-change row in between.
+    def _invalidate():
+        for company_id, palmtec_id in identities:
+            invalidate_device_status(company_id, palmtec_id)
+    transaction.on_commit(_invalidate)
@@ -1,15 +1,22 @@
 from celery import shared_task
 from django.db import IntegrityError, transaction
-from django.db.models import Q
+from django.db.models import Q, F, Case, When, Value
 from django.utils import timezone
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, timedelta, date, time
 from .models import (
-    RawDataLog, TransactionData, Direction, RouteStage,
-    ScheduleData, TripData, Employee, VehicleType,
+    RawDataLog, TransactionData, Direction,
+    ScheduleData, TripData,
     ETMDevice, DeviceRejectionLog, Company, AggregatorTransaction,
 )
-from .views.utils import _get_route_for_palmtec
+from .master_snapshot import employee_pk, vehicle_pk, route_entry
+from .trip_identity import cached_schedule_pk, remember_schedule, cached_trip, remember_trip
+from .device_heartbeat import (
+    get_device_status, record_heartbeat, flush_heartbeats, DEVICE_MISSING, DEVICE_INACTIVE,
+)
+from .daily_revenue import record_tickets, record_trip_closed, rebuild_day
+from .report_cache import bump_report_dates
+from .live_feed import publish_tickets
 
 
 
@@ -93,24 +100,57 @@ def _resolve_trip(palmtec_id, company_id, trip_no, trip_start_date, schedule_no=
     return qs.first()
 
 
-def _resolve_employee(employee_code, company_id):
-    if not employee_code:
+# pk-only variants for the ticket path, through the identity map
+# (trip_identity.py). Rows are remembered by signals.py after commit;
+# a DB hit here is remembered too so the next frame of the trip skips it.
+
+def _resolve_schedule_pk(palmtec_id, company_id, schedule_no, schedule_start_date):
+    if not schedule_no or not schedule_start_date:
         return None
-    return Employee.objects.filter(
-        employee_code=employee_code,
-        company_id=company_id,
-        is_deleted=False,
-    ).first()
+    schedule_pk = cached_schedule_pk(company_id, palmtec_id, schedule_no, schedule_start_date)
+    if schedule_pk is None:
+        schedule_pk = ScheduleData.objects.filter(
+            palmtec_id=palmtec_id,
+            company_code_id=company_id,
+            schedule_no=schedule_no,
+            start_date=schedule_start_date,
+        ).values_list('pk', flat=True).first()
+        if schedule_pk:
+            remember_schedule(company_id, palmtec_id, schedule_no, schedule_start_date, schedule_pk)
+    return schedule_pk
+
+
+def _resolve_trip_ids(palmtec_id, company_id, trip_no, trip_start_date, schedule_no):
+    """(trip_pk, schedule_pk) or None."""
+    if not trip_no or not trip_start_date:
+        return None
+    ids = cached_trip(company_id, palmtec_id, schedule_no, trip_no, trip_start_date)
+    if ids is None:
+        ids = TripData.objects.filter(
+            palmtec_id=palmtec_id,
+            company_code_id=company_id,
+            trip_no=trip_no,
+            start_date=trip_start_date,
+            schedule_no=schedule_no,
+        ).values_list('pk', 'schedule_id').first()
+        if ids:
+            remember_trip(company_id, palmtec_id, schedule_no, trip_no, trip_start_date, *ids)
+    return ids
 
 
-def _resolve_vehicle(bus_reg_num, company_id):
-    if not bus_reg_num:
-        return None
-    return VehicleType.objects.filter(
-        bus_reg_num=bus_reg_num,
-        company_id=company_id,
-        is_deleted=False,
-    ).first()
+# Master-data lookups go through the per-company snapshot (master_snapshot.py)
+# and return pks — callers assign them to the FK attnames (driver_id_id, ...).
+
+def _resolve_employee_pk(employee_code, company_id):
+    return employee_pk(company_id, employee_code)
+
+
+def _resolve_vehicle_pk(bus_reg_num, company_id):
+    return vehicle_pk(company_id, bus_reg_num)
+
+
+def _resolve_route_pk(route_code, company_id):
+    return route_entry(company_id, route_code)[0]
 
 
 def _get_or_create_ghost_schedule(palmtec_id, company, schedule_no, schedule_start_date,
@@ -143,11 +183,11 @@ def _get_or_create_ghost_schedule(palmtec_id, company, schedule_no, schedule_sta
         return _resolve_schedule(palmtec_id, company.id, schedule_no, schedule_start_date)
 
 
-def _get_or_create_ghost_trip(palmtec_id, company, route, schedule_obj,
+def _get_or_create_ghost_trip(palmtec_id, company, route_pk, schedule_pk,
                                schedule_no, schedule_start_date, schedule_start_time,
                                trip_no, start_date, start_time,
-                               bus_no, bus_obj, driver, driver_obj,
-                               conductor, conductor_obj, ghost_note):
+                               bus_no, bus_pk, driver, driver_pk,
+                               conductor, conductor_pk, ghost_note):
     """
     Return the TripData for this (palmtec_id, company, schedule_no, trip_no, start_date).
     If it doesn't exist yet, create a ghost row (auto_opened=True, is_closed=False)
@@ -165,8 +205,8 @@ def _get_or_create_ghost_trip(palmtec_id, company, route, schedule_obj,
         with transaction.atomic():
             return TripData.objects.create(
                 palmtec_id          = palmtec_id,
-                route_id            = route,
-                schedule_id         = schedule_obj,
+                route_id_id         = route_pk,
+                schedule_id_id      = schedule_pk,
                 schedule_no         = schedule_no,
                 schedule_start_date = schedule_start_date,
                 schedule_start_time = schedule_start_time,
@@ -175,11 +215,11 @@ def _get_or_create_ghost_trip(palmtec_id, company, route, schedule_obj,
                 start_time          = start_time,
                 start_datetime      = start_datetime,
                 bus_no              = bus_no,
-                bus_id              = bus_obj,
+                bus_id_id           = bus_pk,
                 driver              = driver,
-                driver_id           = driver_obj,
+                driver_id_id        = driver_pk,
                 conductor           = conductor,
-                conductor_id        = conductor_obj,
+                conductor_id_id     = conductor_pk,
                 is_closed           = False,
                 auto_opened         = True,
                 ghost_note          = ghost_note,
@@ -189,6 +229,42 @@ def _get_or_create_ghost_trip(palmtec_id, company, route, schedule_obj,
         return _resolve_trip(palmtec_id, company.id, trip_no, start_date, schedule_no)
 
 
+def _check_device(palmtec_id_raw, company):
+    """
+    Side-effect-free device lookup shared by _validate_device and the batch
+    ticket path. Returns (device_pk, None, None) on success, or
+    (None, failure_reason_string, DeviceRejectionLog.RejectionReason | None).
+    rejection_reason is None when the palmtec_id itself is malformed.
+    The allocation/active state is cached (device_heartbeat.get_device_status).
+    """
+    try:
+        palmtec_id = int(palmtec_id_raw)
+    except (TypeError, ValueError):
+        return None, f'Invalid palmtec_id format: {palmtec_id_raw}', None
+
+    device_status = get_device_status(company.pk, palmtec_id)
+
+    if device_status == DEVICE_MISSING:
+        reason = f'Device lock: palmtec_id={palmtec_id} not registered to company {company.company_id}'
+        return None, reason, DeviceRejectionLog.RejectionReason.DEVICE_NOT_REGISTERED
+
+    if device_status == DEVICE_INACTIVE:
+        reason = f'Device inactive: palmtec_id={palmtec_id} is deactivated'
+        return None, reason, DeviceRejectionLog.RejectionReason.DEVICE_INACTIVE
+
+    return device_status, None, None
+
+
+def _log_device_rejection(log, palmtec_id_raw, company, rejection_reason):
+    DeviceRejectionLog.objects.create(
+        palmtec_id_claimed=int(palmtec_id_raw),
+        company_id_claimed=company.company_id,
+        raw_payload=log.raw_payload,
+        source=log.source,
+        rejection_reason=rejection_reason,
+    )
+
+
 def _validate_device(log, palmtec_id_raw, company):
     """
     Validate that the device sending this payload:
@@ -196,44 +272,125 @@ def _validate_device(log, palmtec_id_raw, company):
       2. Is allocated (not stock/pool/inactive status)
       3. Is active (not deactivated)
 
-    Returns (device, None) on success.
+    Returns (device_pk, None) on success.
     Returns (None, failure_reason_string) and writes DeviceRejectionLog on failure.
-    Caller must call _fail(log, reason) and return if device is None.
+    Caller must call _fail(log, reason) and return if device_pk is None.
     """
-    try:
-        palmtec_id = int(palmtec_id_raw)
-    except (TypeError, ValueError):
-        return None, f'Invalid palmtec_id format: {palmtec_id_raw}'
+    device_pk, reason, rejection_reason = _check_device(palmtec_id_raw, company)
+    if rejection_reason is not None:
+        _log_device_rejection(log, palmtec_id_raw, company, rejection_reason)
+    return device_pk, reason
 
-    device = ETMDevice.objects.filter(
-        palmtec_id=palmtec_id,
-        company=company,
-        allocation_status=ETMDevice.AllocationStatus.ALLOCATED,
-    ).first()
 
-    if device is None:
-        reason = f'Device lock: palmtec_id={palmtec_id} not registered to company {company.company_id}'
-        DeviceRejectionLog.objects.create(
-            palmtec_id_claimed=palmtec_id,
-            company_id_claimed=company.company_id,
-            raw_payload=log.raw_payload,
-            source=log.source,
-            rejection_reason=DeviceRejectionLog.RejectionReason.DEVICE_NOT_REGISTERED,
-        )
-        return None, reason
+class _TicketLookups:
+    """
+    Per-invocation memo of the device, schedule and trip a ticket resolves.
+    All tickets of one trip share these, so a batch resolves each key once
+    instead of once per ticket. Never shared across task invocations.
+    Route, stages, crew and bus come from the master-data snapshot.
+    """
 
-    if not device.is_active:
-        reason = f'Device inactive: palmtec_id={palmtec_id} is deactivated'
-        DeviceRejectionLog.objects.create(
-            palmtec_id_claimed=palmtec_id,
-            company_id_claimed=company.company_id,
-            raw_payload=log.raw_payload,
-            source=log.source,
-            rejection_reason=DeviceRejectionLog.RejectionReason.DEVICE_INACTIVE,
+    def __init__(self):
+        self._devices   = {}
+        self._schedules = {}
+        self._trips     = {}
+        self.seen_device_ids = set()
+
+    def device(self, palmtec_id_raw, company):
+        key = (company.id, palmtec_id_raw)
+        if key not in self._devices:
+            self._devices[key] = _check_device(palmtec_id_raw, company)
+        return self._devices[key]
+
+    def schedule(self, key, resolve):
+        # A miss (None) is not memoised: the first ticket of a new schedule
+        # ghost-creates it, and later tickets must see that row.
+        if self._schedules.get(key) is None:
+            self._schedules[key] = resolve()
+        return self._schedules[key]
+
+    def trip(self, key, resolve):
+        if self._trips.get(key) is None:
+            self._trips[key] = resolve()
+        return self._trips[key]
+
+
+def _touch_devices(device_ids):
+    # Buffered in Redis; flush_device_heartbeats writes last_seen_at in bulk.
+    record_heartbeat(device_ids)
+
+
+# (TripData/ScheduleData live counter, TransactionData count field)
+_LIVE_COUNT_FIELDS = (
+    ('live_full_count',   'full_count'),
+    ('live_half_count',   'half_count'),
+    ('live_st_count',     'st_count'),
+    ('live_phy_count',    'phy_count'),
+    ('live_lugg_count',   'lugg_count'),
+    ('live_ladies_count', 'ladies_count'),
+    ('live_senior_count', 'senior_count'),
+)
+
+
+def _live_counter_updates(tickets):
+    """update() kwargs folding `tickets` into a TripData/ScheduleData row."""
+    upi = TransactionData.PaymentMode.UPI
+    updates = {
+        'live_collection':   F('live_collection') + sum(t.ticket_amount for t in tickets),
+        'live_upi_amount':   F('live_upi_amount') + sum(t.ticket_amount for t in tickets if t.ticket_status == upi),
+        'live_ticket_count': F('live_ticket_count') + len(tickets),
+    }
+    for counter, field in _LIVE_COUNT_FIELDS:
+        updates[counter] = F(counter) + sum(getattr(t, field) or 0 for t in tickets)
+
+    # "Last ticket" is the latest ticket_time, as the reports always ordered
+    # it; on a tie the later arrival wins. MySQL applies SET assignments left
+    # to right, so last_ticket_time must come last — the conditions compare
+    # against the row's previous value.
+    last = max(reversed(tickets), key=lambda t: t.ticket_time)
+    is_newer = Q(last_ticket_time__isnull=True) | Q(last_ticket_time__lte=last.ticket_time)
+    for field, value in (
+        ('last_ticket_no',       last.ticket_number),
+        ('last_to_stage_id_id',  last.to_stage_id_id),
+        ('last_passenger_count', last.passenger_count),
+        ('last_ticket_time',     last.ticket_time),
+    ):
+        model_field = TripData._meta.get_field(field)
+        updates[field] = Case(
+            When(is_newer, then=Value(value, output_field=model_field)),
+            default=F(field),
+            output_field=model_field,
         )
-        return None, reason
+    return updates
+
 
-    return device, None
+def _apply_live_counters(tickets):
+    """
+    Fold freshly inserted tickets into their trip's and schedule's live
+    running totals — one UPDATE per trip and per schedule touched. The trip
+    UPDATE also bumps report_version so cached closed-trip reports pick up
+    late tickets.
+    """
+    for model, attname in ((TripData, 'trip_id_id'), (ScheduleData, 'schedule_id_id')):
+        groups = {}
+        for t in tickets:
+            pk = getattr(t, attname)
+            if pk:
+                groups.setdefault(pk, []).append(t)
+        for pk, group in groups.items():
+            updates = _live_counter_updates(group)
+            if model is TripData:
+                updates['report_version'] = F('report_version') + 1
+            model.objects.filter(pk=pk).update(**updates)
+
+
+def _bump_ticket_report_dates(tickets):
+    """Invalidate cached ticket report pages for the dates just written."""
+    dates = {}
+    for t in tickets:
+        dates.setdefault(t.company_code_id, set()).add(t.ticket_date)
+    for company_id, days in dates.items():
+        bump_report_dates(company_id, ('tickets',), days)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -257,226 +414,388 @@ def _validate_device(log, palmtec_id_raw, company):
 #   [43]=transaction_id  [44]=ticket_status  [45]=bqr_merchant_id
 #   [46]=license_code(company)  [47]=upi_manual_check (1=manual, 0=auto)  [48]=checksum
 # ─────────────────────────────────────────────────────────────────────────────
-@shared_task(bind=True, max_retries=3)
-def process_transaction_data(self, log_id):
+def _build_transaction(log, company, lookups):
+    """
+    Parse a TRANSACTION RawDataLog into an unsaved TransactionData.
+    Ghost-creates the schedule/trip if their open frames haven't arrived yet.
+    Returns (ticket, None) on success, or (None, failure_reason_string).
+    """
+    parts = log.raw_payload.split("|")
+
+    def _p(i, default=None):
+        return parts[i] if len(parts) > i and parts[i].strip() else default
+
+    # Device lock + inactive check
+    device_pk, lock_reason, rejection_reason = lookups.device(_p(2), company)
+    if device_pk is None:
+        if rejection_reason is not None:
+            _log_device_rejection(log, _p(2), company, rejection_reason)
+        return None, lock_reason
+    lookups.seen_device_ids.add(device_pk)
+
+    required = {
+        'palmtec_id':    _p(2),
+        'route_code':    _p(3),
+        'trip_no':       _p(4),
+        'ticket_number': _p(5),
+        'ticket_date':   _p(8),
+        'ticket_time':   _p(9),
+        'from_stage':    _p(10),
+        'to_stage':      _p(11),
+        'schedule_no':   _p(28),
+    }
+    missing = [k for k, v in required.items() if not v]
+    if missing:
+        return None, f"Missing required fields: {', '.join(missing)}"
+
+    route_pk, stage_pks = route_entry(company.id, _p(3))
+    if not route_pk:
+        return None, f"Route not found: {_p(3)}"
+
+    full_count   = int(_p(12, 0))
+    half_count   = int(_p(13, 0))
+    st_count     = int(_p(14, 0))
+    phy_count    = int(_p(15, 0))
+    lugg_count   = int(_p(16, 0))
+    ladies_count = int(_p(25, 0))
+    senior_count = int(_p(26, 0))
+    total_tickets = full_count + half_count + st_count + phy_count + lugg_count + ladies_count + senior_count
+
+    raw_status = _p(44, '0')
+    ticket_status = (
+        TransactionData.PaymentMode.UPI if raw_status == '1'
+        else TransactionData.PaymentMode.CASH
+    )
+
+    raw_dir_val = _p(31, '')
     try:
-        with transaction.atomic():
-            log = RawDataLog.objects.select_related('company_code').select_for_update().get(id=log_id)
+        raw_dir = chr(int(raw_dir_val)) if raw_dir_val else ''
+    except (ValueError, TypeError):
+        raw_dir = raw_dir_val
+    up_down_trip = (
+        Direction.UP   if raw_dir == 'U' else
+        Direction.DOWN if raw_dir == 'D' else None
+    )
 
-            if log.status != RawDataLog.statusChoices.PENDING:
-                return f"Log {log_id} already processed."
+    from_raw = int(_p(10))
+    to_raw   = int(_p(11))
+    from_stage_pk = to_stage_pk = None
+    if stage_pks:
+        if from_raw > 0:
+            try:
+                from_stage_pk = stage_pks[from_raw - 1]
+            except IndexError:
+                pass
+        if to_raw > 0:
+            try:
+                to_stage_pk = stage_pks[to_raw - 1]
+            except IndexError:
+                pass
+
+    bus_pk       = _resolve_vehicle_pk(_p(27), company.id)
+    driver_pk    = _resolve_employee_pk(_p(29), company.id)
+    conductor_pk = _resolve_employee_pk(_p(30), company.id)
+
+    if _p(6) == "0000-00-00":
+        return None, "Invalid schedule date: device sent 0000-00-00"
+    if _p(32) == "0000-00-00":
+        return None, "Invalid trip start date: device sent 0000-00-00"
+
+    palmtec_id          = str(_p(2))
+    trip_no             = int(_p(4))
+    schedule_no         = int(_p(28))
+    schedule_start_date = _decode_etm_date(_p(6))
+    schedule_start_time = _decode_etm_time(_p(7))
+    ticket_date         = _decode_etm_date(_p(8))
+    ticket_time         = _decode_etm_time(_p(9))
+    trip_start_date     = _decode_etm_date(_p(32))
+    trip_start_time     = _decode_etm_time(_p(33))
+
+    # ── Resolve or ghost-create schedule ─────────────────────────────────────
+    # Ticket carries schedule_no + schedule_start_date/time — enough to
+    # create a ghost ScheduleData if ShdOpn hasn't arrived yet.
+    def _schedule():
+        schedule_pk = _resolve_schedule_pk(palmtec_id, company.id, schedule_no, schedule_start_date)
+        if not schedule_pk and schedule_no and schedule_start_date:
+            ghost = _get_or_create_ghost_schedule(
+                palmtec_id          = palmtec_id,
+                company             = company,
+                schedule_no         = schedule_no,
+                schedule_start_date = schedule_start_date,
+                schedule_start_time = schedule_start_time,
+                ghost_note          = "Ticket received; ShdOpn missing",
+            )
+            schedule_pk = ghost.pk if ghost else None
+        return schedule_pk
+
+    schedule_pk = lookups.schedule((company.id, palmtec_id, schedule_no, schedule_start_date), _schedule)
+
+    # ── Resolve or ghost-create trip ──────────────────────────────────────────
+    # Ticket carries trip_no + trip_start_date/time, bus, crew — enough
+    # to create a ghost TripData if TrpOp hasn't arrived yet.
+    def _trip():
+        trip_ids = _resolve_trip_ids(palmtec_id, company.id, trip_no, trip_start_date, schedule_no)
+        if not trip_ids and trip_no and trip_start_date:
+            ghost = _get_or_create_ghost_trip(
+                palmtec_id          = palmtec_id,
+                company             = company,
+                route_pk            = route_pk,
+                schedule_pk         = schedule_pk,
+                schedule_no         = schedule_no,
+                schedule_start_date = schedule_start_date,
+                schedule_start_time = schedule_start_time,
+                trip_no             = trip_no,
+                start_date          = trip_start_date,
+                start_time          = trip_start_time,
+                bus_no              = _p(27),
+                bus_pk              = bus_pk,
+                driver              = _p(29),
+                driver_pk           = driver_pk,
+                conductor           = _p(30),
+                conductor_pk        = conductor_pk,
+                ghost_note          = "Ticket received; TrpOp missing",
+            )
+            trip_ids = (ghost.pk, ghost.schedule_id_id) if ghost else None
+        return trip_ids
+
+    trip_ids = lookups.trip((company.id, palmtec_id, schedule_no, trip_no, trip_start_date), _trip)
+    trip_pk = trip_ids[0] if trip_ids else None
+
+    # Keep schedule in sync with whatever the trip resolved to
+    if trip_ids and trip_ids[1]:
+        schedule_pk = trip_ids[1]
+
+    ticket = TransactionData(
+        unique_code          = _p(1),
+        palmtec_id           = _p(2),
+        route_id_id          = route_pk,
+        trip_id_id           = trip_pk,
+        schedule_id_id       = schedule_pk,
+        ticket_number        = _p(5),
+        ticket_date          = ticket_date,
+        ticket_time          = ticket_time,
+        from_stage           = from_raw,
+        from_stage_id_id     = from_stage_pk,
+        to_stage             = to_raw,
+        to_stage_id_id       = to_stage_pk,
+        full_count           = full_count,
+        half_count           = half_count,
+        st_count             = st_count,
+        phy_count            = phy_count,
+        lugg_count           = lugg_count,
+        ladies_count         = ladies_count,
+        senior_count         = senior_count,
+        total_tickets        = total_tickets,
+        ticket_amount        = Decimal(_p(17, '0')),
+        lugg_amount          = Decimal(_p(18, '0')),
+        ticket_type          = int(_p(19)) if _p(19) else None,
+        adjust_amount        = Decimal(_p(20, '0')),
+        pass_id              = _p(21),
+        warrant_amount       = Decimal(_p(22, '0')),
+        refund_status        = int(_p(23)) if _p(23) else None,
+        refund_amount        = Decimal(_p(24, '0')),
+        bus_no               = _p(27),
+        bus_id_id            = bus_pk,
+        driver               = _p(29),
+        driver_id_id         = driver_pk,
+        conductor            = _p(30),
+        conductor_id_id      = conductor_pk,
+        up_down_trip         = up_down_trip,
+        trip_start_date      = trip_start_date,
+        trip_start_time      = trip_start_time,
+        battery_percentage   = int(_p(34)) if _p(34) else None,
+        passenger_count      = int(_p(35)) if _p(35) else None,
+        full_total_amount    = Decimal(_p(36, '0')),
+        half_total_amount    = Decimal(_p(37, '0')),
+        phy_total_amount     = Decimal(_p(38, '0')),
+        ladies_total_amount  = Decimal(_p(39, '0')),
+        senior_total_amount  = Decimal(_p(40, '0')),
+        luggage_total_amount = Decimal(_p(41, '0')),
+        st_total_amount      = Decimal(_p(42, '0')),
+        transaction_id       = _p(43),
+        ticket_status        = ticket_status,
+        bqr_merchant_id      = _p(45),
+        manual_verified_upi  = (int(_p(47)) == 1) if _p(47) is not None else None,
+        company_code         = company,
+        raw_payload          = log.raw_payload,
+    )
+    return ticket, None
 
-            company = log.company_code
-            if not company:
-                _fail(log, "Invalid Company Code")
-                return
 
-            parts = log.raw_payload.split("|")
+def _process_transaction_log(log_id):
+    """
+    Process one pending TRANSACTION RawDataLog into a TransactionData row.
+    Raises on unexpected errors; the task decides whether to retry.
+    """
+    with transaction.atomic():
+        log = RawDataLog.objects.select_related('company_code').select_for_update().get(id=log_id)
 
-            def _p(i, default=None):
-                return parts[i] if len(parts) > i and parts[i].strip() else default
+        if log.status != RawDataLog.statusChoices.PENDING:
+            return f"Log {log_id} already processed."
 
-            # Device lock + inactive check
-            device, lock_reason = _validate_device(log, _p(2), company)
-            if device is None:
-                _fail(log, lock_reason)
-                return
-            device.last_seen_at = timezone.now()
-            device.save(update_fields=['last_seen_at'])
+        company = log.company_code
+        if not company:
+            _fail(log, "Invalid Company Code")
+            return
 
-            required = {
-                'palmtec_id':    _p(2),
-                'route_code':    _p(3),
-                'trip_no':       _p(4),
-                'ticket_number': _p(5),
-                'ticket_date':   _p(8),
-                'ticket_time':   _p(9),
-                'from_stage':    _p(10),
-                'to_stage':      _p(11),
-                'schedule_no':   _p(28),
-            }
-            missing = [k for k, v in required.items() if not v]
-            if missing:
-                _fail(log, f"Missing required fields: {', '.join(missing)}")
-                return
+        lookups = _TicketLookups()
+        ticket, reason = _build_transaction(log, company, lookups)
+        _touch_devices(lookups.seen_device_ids)
+        if ticket is None:
+            _fail(log, reason)
+            return
 
-            route = _get_route_for_palmtec(_p(3), company)
-            if not route:
-                _fail(log, f"Route not found: {_p(3)}")
-                return
+        try:
+            with transaction.atomic():
+                ticket.save()
 
-            full_count   = int(_p(12, 0))
-            half_count   = int(_p(13, 0))
-            st_count     = int(_p(14, 0))
-            phy_count    = int(_p(15, 0))
-            lugg_count   = int(_p(16, 0))
-            ladies_count = int(_p(25, 0))
-            senior_count = int(_p(26, 0))
-            total_tickets = full_count + half_count + st_count + phy_count + lugg_count + ladies_count + senior_count
-
-            raw_status = _p(44, '0')
-            ticket_status = (
-                TransactionData.PaymentMode.UPI if raw_status == '1'
-                else TransactionData.PaymentMode.CASH
-            )
+        except IntegrityError as ie:
+            log.status = RawDataLog.statusChoices.DUPLICATE
+            log.error_message = str(ie)
+            log.save()
+            return
 
-            raw_dir_val = _p(31, '')
-            try:
-                raw_dir = chr(int(raw_dir_val)) if raw_dir_val else ''
-            except (ValueError, TypeError):
-                raw_dir = raw_dir_val
-            up_down_trip = (
-                Direction.UP   if raw_dir == 'U' else
-                Direction.DOWN if raw_dir == 'D' else None
-            )
+        _apply_live_counters([ticket])
+        record_tickets([ticket])
+        _bump_ticket_report_dates([ticket])
+        publish_tickets([ticket])
 
-            stages = RouteStage.objects.filter(route=route).order_by('sequence_no')
-            from_raw = int(_p(10))
-            to_raw   = int(_p(11))
-            from_stage_obj = to_stage_obj = None
-            if stages:
-                if from_raw > 0:
-                    try:
-                        from_stage_obj = stages[from_raw - 1]
-                    except IndexError:
-                        pass
-                if to_raw > 0:
-                    try:
-                        to_stage_obj = stages[to_raw - 1]
-                    except IndexError:
-                        pass
-
-            if _p(6) == "0000-00-00":
-                _fail(log, "Invalid schedule date: device sent 0000-00-00")
-                return
-            if _p(32) == "0000-00-00":
-                _fail(log, "Invalid trip start date: device sent 0000-00-00")
-                return
+        log.status = RawDataLog.statusChoices.PROCESSED
+        log.processed_at = timezone.now()
+        log.save()
 
-            trip_no             = int(_p(4))
-            schedule_no         = int(_p(28))
-            schedule_start_date = _decode_etm_date(_p(6))
-            schedule_start_time = _decode_etm_time(_p(7))
-            ticket_date         = _decode_etm_date(_p(8))
-            ticket_time         = _decode_etm_time(_p(9))
-            trip_start_date     = _decode_etm_date(_p(32))
-            trip_start_time     = _decode_etm_time(_p(33))
 
-            # ── Resolve or ghost-create schedule ─────────────────────────────
-            # Ticket carries schedule_no + schedule_start_date/time — enough to
-            # create a ghost ScheduleData if ShdOpn hasn't arrived yet.
-            schedule_obj = _resolve_schedule(str(_p(2)), company.id, schedule_no, schedule_start_date)
-            if not schedule_obj and schedule_no and schedule_start_date:
-                schedule_obj = _get_or_create_ghost_schedule(
-                    palmtec_id          = str(_p(2)),
-                    company             = company,
-                    schedule_no         = schedule_no,
-                    schedule_start_date = schedule_start_date,
-                    schedule_start_time = schedule_start_time,
-                    ghost_note          = "Ticket received; ShdOpn missing",
-                )
+@shared_task(bind=True, max_retries=3)
+def process_transaction_data(self, log_id):
+    try:
+        return _process_transaction_log(log_id)
 
-            # ── Resolve or ghost-create trip ──────────────────────────────────
-            # Ticket carries trip_no + trip_start_date/time, bus, crew — enough
-            # to create a ghost TripData if TrpOp hasn't arrived yet.
-            trip_obj = _resolve_trip(str(_p(2)), company.id, trip_no, trip_start_date, schedule_no)
-            if not trip_obj and trip_no and trip_start_date:
-                trip_obj = _get_or_create_ghost_trip(
-                    palmtec_id          = str(_p(2)),
-                    company             = company,
-                    route               = route,
-                    schedule_obj        = schedule_obj,
-                    schedule_no         = schedule_no,
-                    schedule_start_date = schedule_start_date,
-                    schedule_start_time = schedule_start_time,
-                    trip_no             = trip_no,
-                    start_date          = trip_start_date,
-                    start_time          = trip_start_time,
-                    bus_no              = _p(27),
-                    bus_obj             = _resolve_vehicle(_p(27), company.id),
-                    driver              = _p(29),
-                    driver_obj          = _resolve_employee(_p(29), company.id),
-                    conductor           = _p(30),
-                    conductor_obj       = _resolve_employee(_p(30), company.id),
-                    ghost_note          = "Ticket received; TrpOp missing",
-                )
+    except Exception as exc:
+        RawDataLog.objects.filter(id=log_id).update(
+            status=RawDataLog.statusChoices.FAILED,
+            error_message=str(exc))
+        raise self.retry(exc=exc, countdown=60)
+
+
+def _split_duplicate_tickets(pending):
+    """
+    Partition (log, ticket) pairs into (fresh, duplicates) against both
+    TransactionData unique constraints — rows already in the table and
+    repeats within the batch itself. One query for the whole batch.
+    duplicates is a list of (log, ticket, reason).
+    """
+    if not pending:
+        return [], []
+
+    tickets = [t for _, t in pending]
+    existing = TransactionData.objects.filter(
+        palmtec_id__in=[t.palmtec_id for t in tickets],
+    ).filter(
+        Q(unique_code__in=[t.unique_code for t in tickets if t.unique_code])
+        | Q(ticket_number__in=[t.ticket_number for t in tickets],
+            ticket_date__in=[t.ticket_date for t in tickets])
+    ).values_list('palmtec_id', 'unique_code', 'company_code_id', 'ticket_number', 'ticket_date', 'ticket_time')
+
+    seen_codes = set()
+    seen_times = set()
+    for palmtec_id, unique_code, company_id, ticket_number, ticket_date, ticket_time in existing:
+        if unique_code:
+            seen_codes.add((palmtec_id, unique_code))
+        seen_times.add((palmtec_id, company_id, ticket_number, ticket_date, ticket_time))
+
+    fresh, duplicates = [], []
+    for log, t in pending:
+        code_key = (t.palmtec_id, t.unique_code)
+        time_key = (t.palmtec_id, t.company_code_id, t.ticket_number, t.ticket_date, t.ticket_time)
+        if t.unique_code and code_key in seen_codes:
+            duplicates.append((log, t, f"Duplicate ticket: unique_code={t.unique_code} palmtec_id={t.palmtec_id}"))
+        elif time_key in seen_times:
+            duplicates.append((log, t, f"Duplicate ticket: ticket_number={t.ticket_number} at {t.ticket_date} {t.ticket_time}"))
+        else:
+            if t.unique_code:
+                seen_codes.add(code_key)
+            seen_times.add(time_key)
+            fresh.append((log, t))
+    return fresh, duplicates
 
-            # Keep schedule_obj in sync with whatever the trip resolved to
-            if trip_obj and trip_obj.schedule_id:
-                schedule_obj = trip_obj.schedule_id
 
+@shared_task
+def process_transaction_batch(log_ids):
+    """
+    Micro-batched counterpart of process_transaction_data.
+    Locks the still-pending logs with SKIP LOCKED (rows another worker holds
+    are left to it), resolves device/schedule/trip once per key (master data
+    comes from the company snapshot), inserts every ticket with one
+    bulk_create, folds them into the trip/schedule live counters and the
+    daily revenue summaries with one UPDATE per row touched and writes all
+    log statuses back with one bulk_update.
+    Per-row DUPLICATE/FAILED outcomes are the same as the single-log task.
+    Logs left PENDING (worker killed mid-batch) are picked up by
+    scan_pending_raw_logs.
+    """
+    with transaction.atomic():
+        logs = list(
+            RawDataLog.objects.select_related('company_code')
+            .select_for_update(skip_locked=True)
+            .filter(
+                id__in=log_ids,
+                status=RawDataLog.statusChoices.PENDING,
+                source=RawDataLog.typeChoices.TRANSACTION,
+            )
+        )
+        if not logs:
+            return 0
+
+        lookups = _TicketLookups()
+        pending = []
+        for log in logs:
+            if not log.company_code:
+                log.status, log.error_message = RawDataLog.statusChoices.FAILED, "Invalid Company Code"
+                continue
             try:
-                with transaction.atomic():
-                    TransactionData.objects.create(
-                        unique_code          = _p(1),
-                        palmtec_id           = _p(2),
-                        route_id             = route,
-                        trip_id              = trip_obj,
-                        schedule_id          = schedule_obj,
-                        ticket_number        = _p(5),
-                        ticket_date          = ticket_date,
-                        ticket_time          = ticket_time,
-                        from_stage           = from_raw,
-                        from_stage_id        = from_stage_obj,
-                        to_stage             = to_raw,
-                        to_stage_id          = to_stage_obj,
-                        full_count           = full_count,
-                        half_count           = half_count,
-                        st_count             = st_count,
-                        phy_count            = phy_count,
-                        lugg_count           = lugg_count,
-                        ladies_count         = ladies_count,
-                        senior_count         = senior_count,
-                        total_tickets        = total_tickets,
-                        ticket_amount        = Decimal(_p(17, '0')),
-                        lugg_amount          = Decimal(_p(18, '0')),
-                        ticket_type          = int(_p(19)) if _p(19) else None,
-                        adjust_amount        = Decimal(_p(20, '0')),
-                        pass_id              = _p(21),
-                        warrant_amount       = Decimal(_p(22, '0')),
-                        refund_status        = int(_p(23)) if _p(23) else None,
-                        refund_amount        = Decimal(_p(24, '0')),
-                        bus_no               = _p(27),
-                        bus_id               = _resolve_vehicle(_p(27), company.id),
-                        driver               = _p(29),
-                        driver_id            = _resolve_employee(_p(29), company.id),
-                        conductor            = _p(30),
-                        conductor_id         = _resolve_employee(_p(30), company.id),
-                        up_down_trip         = up_down_trip,
-                        trip_start_date      = trip_start_date,
-                        trip_start_time      = trip_start_time,
-                        battery_percentage   = int(_p(34)) if _p(34) else None,
-                        passenger_count      = int(_p(35)) if _p(35) else None,
-                        full_total_amount    = Decimal(_p(36, '0')),
-                        half_total_amount    = Decimal(_p(37, '0')),
-                        phy_total_amount     = Decimal(_p(38, '0')),
-                        ladies_total_amount  = Decimal(_p(39, '0')),
-                        senior_total_amount  = Decimal(_p(40, '0')),
-                        luggage_total_amount = Decimal(_p(41, '0')),
-                        st_total_amount      = Decimal(_p(42, '0')),
-                        transaction_id       = _p(43),
-                        ticket_status        = ticket_status,
-                        bqr_merchant_id      = _p(45),
-                        manual_verified_upi  = (int(_p(47)) == 1) if _p(47) is not None else None,
-                        company_code         = company,
-                        raw_payload          = log.raw_payload,
-                    )
+                ticket, reason = _build_transaction(log, log.company_code, lookups)
+            except Exception as exc:
+                ticket, reason = None, str(exc)
+            if ticket is None:
+                log.status, log.error_message = RawDataLog.statusChoices.FAILED, reason
+                continue
+            pending.append((log, ticket))
 
-            except IntegrityError as ie:
-                log.status = RawDataLog.statusChoices.DUPLICATE
-                log.error_message = str(ie)
-                log.save()
-                return
+        _touch_devices(lookups.seen_device_ids)
 
-            log.status = RawDataLog.statusChoices.PROCESSED
-            log.processed_at = timezone.now()
-            log.save()
+        fresh, duplicates = _split_duplicate_tickets(pending)
+        for log, _, reason in duplicates:
+            log.status, log.error_message = RawDataLog.statusChoices.DUPLICATE, reason
 
-    except Exception as exc:
-        RawDataLog.objects.filter(id=log_id).update(
-            status=RawDataLog.statusChoices.FAILED,
-            error_message=str(exc))
-        raise self.retry(exc=exc, countdown=60)
+        inserted = []
+        try:
+            with transaction.atomic():
+                TransactionData.objects.bulk_create([t for _, t in fresh], batch_size=500)
+            inserted = fresh
+        except IntegrityError:
+            # A concurrent single-log task inserted one of these between the
+            # duplicate check and the INSERT. Fall back to row-by-row so only
+            # the racing rows end up DUPLICATE.
+            for log, t in fresh:
+                try:
+                    with transaction.atomic():
+                        t.save()
+                    inserted.append((log, t))
+                except IntegrityError as ie:
+                    log.status, log.error_message = RawDataLog.statusChoices.DUPLICATE, str(ie)
+
+        _apply_live_counters([t for _, t in inserted])
+        record_tickets([t for _, t in inserted])
+        _bump_ticket_report_dates([t for _, t in inserted])
+        publish_tickets([t for _, t in inserted])
+
+        now = timezone.now()
+        for log, _ in inserted:
+            log.status, log.processed_at = RawDataLog.statusChoices.PROCESSED, now
+
+        RawDataLog.objects.bulk_update(logs, ['status', 'error_message', 'processed_at'])
+
+    return len(inserted)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -509,12 +828,11 @@ def process_trip_open_data(self, log_id):
                 return parts[i] if len(parts) > i and parts[i].strip() else default
 
             # Device lock + inactive check
-            device, lock_reason = _validate_device(log, _p(2), company)
-            if device is None:
+            device_pk, lock_reason = _validate_device(log, _p(2), company)
+            if device_pk is None:
                 _fail(log, lock_reason)
                 return
-            device.last_seen_at = timezone.now()
-            device.save(update_fields=['last_seen_at'])
+            record_heartbeat([device_pk])
 
             required = {'route_code': _p(5), 'trip_no': _p(7)}
             missing = [k for k, v in required.items() if not v]
@@ -522,8 +840,8 @@ def process_trip_open_data(self, log_id):
                 _fail(log, f"Missing required fields: {', '.join(missing)}")
                 return
 
-            route = _get_route_for_palmtec(_p(5), company)
-            if not route:
+            route_pk = _resolve_route_pk(_p(5), company.id)
+            if not route_pk:
                 _fail(log, f"Route not found: {_p(5)}")
                 return
 
@@ -543,9 +861,9 @@ def process_trip_open_data(self, log_id):
             battery             = int(_p(15)) if _p(15) else None
 
             # ── Resolve FKs ───────────────────────────────────────────────────
-            driver_obj    = _resolve_employee(_p(9),  company.id)
-            conductor_obj = _resolve_employee(_p(10), company.id)
-            bus_obj       = _resolve_vehicle(_p(8),   company.id)
+            driver_pk     = _resolve_employee_pk(_p(9),  company.id)
+            conductor_pk  = _resolve_employee_pk(_p(10), company.id)
+            bus_pk        = _resolve_vehicle_pk(_p(8),   company.id)
 
             # ── Resolve or ghost-create schedule ─────────────────────────────
             # TrpOp carries schedule_no + schedule_start_date/time — enough to
@@ -571,11 +889,11 @@ def process_trip_open_data(self, log_id):
                                  'auto_opened', 'updated_at']
                 existing.open_unique_code   = _p(1)
                 existing.bus_no             = _p(8)
-                existing.bus_id             = bus_obj
+                existing.bus_id_id          = bus_pk
                 existing.driver             = _p(9)
-                existing.driver_id          = driver_obj
+                existing.driver_id_id       = driver_pk
                 existing.conductor          = _p(10)
-                existing.conductor_id       = conductor_obj
+                existing.conductor_id_id    = conductor_pk
                 existing.up_down_trip       = up_down_trip
                 existing.start_time         = start_time
                 existing.start_datetime     = start_datetime
@@ -612,7 +930,7 @@ def process_trip_open_data(self, log_id):
                         TripData.objects.create(
                             open_unique_code    = _p(1),
                             palmtec_id          = _p(2),
-                            route_id            = route,
+                            route_id_id         = route_pk,
                             schedule_id         = schedule_obj,
                             schedule_no         = schedule_no,
                             schedule_start_date = schedule_start_date,
@@ -620,11 +938,11 @@ def process_trip_open_data(self, log_id):
                             trip_no             = trip_no,
                             up_down_trip        = up_down_trip,
                             bus_no              = _p(8),
-                            bus_id              = bus_obj,
+                            bus_id_id           = bus_pk,
                             driver              = _p(9),
-                            driver_id           = driver_obj,
+                            driver_id_id        = driver_pk,
                             conductor           = _p(10),
-                            conductor_id        = conductor_obj,
+                            conductor_id_id     = conductor_pk,
                             start_date          = start_date,
                             start_time          = start_time,
                             start_datetime      = start_datetime,
@@ -687,12 +1005,11 @@ def process_trip_close_data(self, log_id):
                 return parts[i] if len(parts) > i and parts[i].strip() else default
 
             # Device lock + inactive check
-            device, lock_reason = _validate_device(log, _p(2), company)
-            if device is None:
+            device_pk, lock_reason = _validate_device(log, _p(2), company)
+            if device_pk is None:
                 _fail(log, lock_reason)
                 return
-            device.last_seen_at = timezone.now()
-            device.save(update_fields=['last_seen_at'])
+            record_heartbeat([device_pk])
 
             required = {'route_code': _p(4), 'schedule_no': _p(5), 'trip_no': _p(6)}
             missing = [k for k, v in required.items() if not v]
@@ -700,8 +1017,8 @@ def process_trip_close_data(self, log_id):
                 _fail(log, f"Missing required fields: {', '.join(missing)}")
                 return
 
-            route = _get_route_for_palmtec(_p(4), company)
-            if not route:
+            route_pk = _resolve_route_pk(_p(4), company.id)
+            if not route_pk:
                 _fail(log, f"Route not found: {_p(4)}")
                 return
 
@@ -741,13 +1058,13 @@ def process_trip_close_data(self, log_id):
             )
 
             # ── Resolve FKs ───────────────────────────────────────────────────
-            schedule_obj  = _resolve_schedule(_p(2), company.id, schedule_no, schedule_start_date)
-            driver_obj    = _resolve_employee(_p(13), company.id)
-            conductor_obj = _resolve_employee(_p(14), company.id)
+            schedule_pk   = _resolve_schedule_pk(_p(2), company.id, schedule_no, schedule_start_date)
+            driver_pk     = _resolve_employee_pk(_p(13), company.id)
+            conductor_pk  = _resolve_employee_pk(_p(14), company.id)
 
             close_fields = dict(
                 close_unique_code   = _p(1),
-                schedule_id         = schedule_obj,
+                schedule_id_id      = schedule_pk,
                 schedule_no         = schedule_no,
                 schedule_start_date = schedule_start_date,
                 schedule_start_time = schedule_start_time,
@@ -783,8 +1100,8 @@ def process_trip_close_data(self, log_id):
                 upi_ticket_count    = upi_count,
                 upi_ticket_amount   = upi_amount,
                 up_down_trip        = up_down_trip,
-                driver_id           = driver_obj,
-                conductor_id        = conductor_obj,
+                driver_id_id        = driver_pk,
+                conductor_id_id     = conductor_pk,
                 is_closed           = True,
                 auto_opened         = False,
                 ghost_note          = None,
@@ -794,15 +1111,21 @@ def process_trip_close_data(self, log_id):
             # ── TripData upsert ───────────────────────────────────────────────
             existing = _resolve_trip(_p(2), company.id, trip_no, start_date, schedule_no)
             if existing:
+                was_closed = existing.is_closed
                 for k, v in close_fields.items():
                     setattr(existing, k, v)
-                existing.save()
+                existing.report_version = F('report_version') + 1
+                # Close fields only — keeps the live_* counters' F() increments.
+                existing.save(update_fields=[*close_fields, 'report_version', 'updated_at'])
+                if not was_closed:
+                    record_trip_closed(company.id, existing.start_date, existing.bus_no,
+                                       existing.route_id_id, existing.total_km)
             else:
                 try:
                     with transaction.atomic():
                         TripData.objects.create(
                             palmtec_id          = _p(2),
-                            route_id            = route,
+                            route_id_id         = route_pk,
                             trip_no             = trip_no,
                             start_date          = start_date,
                             start_time          = start_time,
@@ -817,6 +1140,7 @@ def process_trip_close_data(self, log_id):
                     log.error_message = str(ie)
                     log.save()
                     return
+                record_trip_closed(company.id, start_date, None, route_pk, close_fields['total_km'])
 
             log.status = RawDataLog.statusChoices.PROCESSED
             log.processed_at = timezone.now()
@@ -858,12 +1182,11 @@ def process_schedule_open_data(self, log_id):
                 return parts[i] if len(parts) > i and parts[i].strip() else default
 
             # Device lock + inactive check
-            device, lock_reason = _validate_device(log, _p(2), company)
-            if device is None:
+            device_pk, lock_reason = _validate_device(log, _p(2), company)
+            if device_pk is None:
                 _fail(log, lock_reason)
                 return
-            device.last_seen_at = timezone.now()
-            device.save(update_fields=['last_seen_at'])
+            record_heartbeat([device_pk])
 
             if not _p(4):
                 _fail(log, "Missing required fields: schedule_no")
@@ -876,9 +1199,9 @@ def process_schedule_open_data(self, log_id):
             battery        = int(_p(10)) if _p(10) else None
 
             # ── Resolve FKs ───────────────────────────────────────────────────
-            driver_obj    = _resolve_employee(_p(7), company.id)
-            conductor_obj = _resolve_employee(_p(8), company.id)
-            bus_obj       = _resolve_vehicle(_p(9),  company.id)
+            driver_pk     = _resolve_employee_pk(_p(7), company.id)
+            conductor_pk  = _resolve_employee_pk(_p(8), company.id)
+            bus_pk        = _resolve_vehicle_pk(_p(9),  company.id)
 
             # ── ScheduleData upsert ───────────────────────────────────────────
             existing = ScheduleData.objects.filter(
@@ -893,11 +1216,11 @@ def process_schedule_open_data(self, log_id):
                     # Ghost schedule (ShdCls arrived before ShdOpn) — fill in the open fields
                     existing.open_unique_code = _p(1)
                     existing.driver           = _p(7)
-                    existing.driver_id        = driver_obj
+                    existing.driver_id_id     = driver_pk
                     existing.conductor        = _p(8)
-                    existing.conductor_id     = conductor_obj
+                    existing.conductor_id_id  = conductor_pk
                     existing.bus_no           = _p(9)
-                    existing.bus_id           = bus_obj
+                    existing.bus_id_id        = bus_pk
                     existing.start_time       = start_time
                     existing.start_datetime   = start_datetime
                     existing.battery_open     = battery
@@ -931,11 +1254,11 @@ def process_schedule_open_data(self, log_id):
                             palmtec_id        = _p(2),
                             schedule_no       = schedule_no,
                             driver            = _p(7),
-                            driver_id         = driver_obj,
+                            driver_id_id      = driver_pk,
                             conductor         = _p(8),
-                            conductor_id      = conductor_obj,
+                            conductor_id_id   = conductor_pk,
                             bus_no            = _p(9),
-                            bus_id            = bus_obj,
+                            bus_id_id         = bus_pk,
                             start_date        = start_date,
                             start_time        = start_time,
                             start_datetime    = start_datetime,
@@ -999,12 +1322,11 @@ def process_schedule_close_data(self, log_id):
                 return parts[i] if len(parts) > i and parts[i].strip() else default
 
             # Device lock + inactive check
-            device, lock_reason = _validate_device(log, _p(2), company)
-            if device is None:
+            device_pk, lock_reason = _validate_device(log, _p(2), company)
+            if device_pk is None:
                 _fail(log, lock_reason)
                 return
-            device.last_seen_at = timezone.now()
-            device.save(update_fields=['last_seen_at'])
+            record_heartbeat([device_pk])
 
             required = {
                 'route_code':  _p(4),
@@ -1017,8 +1339,8 @@ def process_schedule_close_data(self, log_id):
                 _fail(log, f"Missing required fields: {', '.join(missing)}")
                 return
 
-            route = _get_route_for_palmtec(_p(4), company)
-            if not route:
+            route_pk = _resolve_route_pk(_p(4), company.id)
+            if not route_pk:
                 _fail(log, f"Route not found: {_p(4)}")
                 return
 
@@ -1030,20 +1352,20 @@ def process_schedule_close_data(self, log_id):
             end_datetime        = timezone.make_aware(datetime.combine(end_date, end_time)) if end_date and end_time else None
 
             # ── Resolve FKs ───────────────────────────────────────────────────
-            driver_obj    = _resolve_employee(_p(10), company.id)
-            conductor_obj = _resolve_employee(_p(11), company.id)
-            bus_obj       = _resolve_vehicle(_p(12),  company.id)
+            driver_pk     = _resolve_employee_pk(_p(10), company.id)
+            conductor_pk  = _resolve_employee_pk(_p(11), company.id)
+            bus_pk        = _resolve_vehicle_pk(_p(12),  company.id)
 
             # ── ScheduleData upsert ───────────────────────────────────────────
             close_fields_new = dict(
                 close_unique_code       = _p(1),
-                route_id                = route,
+                route_id_id             = route_pk,
                 driver                  = _p(10),
-                driver_id               = driver_obj,
+                driver_id_id            = driver_pk,
                 conductor               = _p(11),
-                conductor_id            = conductor_obj,
+                conductor_id_id         = conductor_pk,
                 bus_no                  = _p(12),
-                bus_id                  = bus_obj,
+                bus_id_id               = bus_pk,
                 end_date                = end_date,
                 end_time                = end_time,
                 end_datetime            = end_datetime,
@@ -1097,7 +1419,8 @@ def process_schedule_close_data(self, log_id):
             if existing:
                 for k, v in close_fields_new.items():
                     setattr(existing, k, v)
-                existing.save()
+                # Close fields only — keeps the live_* counters' F() increments.
+                existing.save(update_fields=[*close_fields_new, 'updated_at'])
             else:
                 # Ghost: ShdCls arrived without ShdOpn
                 try:
@@ -1163,8 +1486,8 @@ def process_trip_close_summary_data(self, log_id):
                 _fail(log, f"Missing required fields: {', '.join(missing)}")
                 return
 
-            route = _get_route_for_palmtec(_p(4), company)
-            if not route:
+            route_pk = _resolve_route_pk(_p(4), company.id)
+            if not route_pk:
                 _fail(log, f"Route not found: {_p(4)}")
                 return
 
@@ -1211,13 +1534,13 @@ def process_trip_close_summary_data(self, log_id):
                 log.save()
                 return
 
-            schedule_obj  = _resolve_schedule(_p(2), company.id, schedule_no, schedule_start_date)
-            driver_obj    = _resolve_employee(_p(13), company.id)
-            conductor_obj = _resolve_employee(_p(14), company.id)
+            schedule_pk   = _resolve_schedule_pk(_p(2), company.id, schedule_no, schedule_start_date)
+            driver_pk     = _resolve_employee_pk(_p(13), company.id)
+            conductor_pk  = _resolve_employee_pk(_p(14), company.id)
 
             close_fields = dict(
                 close_unique_code   = _p(1),
-                schedule_id         = schedule_obj,
+                schedule_id_id      = schedule_pk,
                 schedule_no         = schedule_no,
                 schedule_start_date = schedule_start_date,
                 schedule_start_time = schedule_start_time,
@@ -1225,9 +1548,9 @@ def process_trip_close_summary_data(self, log_id):
                 end_time            = end_time,
                 end_datetime        = end_datetime,
                 driver              = _p(13),
-                driver_id           = driver_obj,
+                driver_id_id        = driver_pk,
                 conductor           = _p(14),
-                conductor_id        = conductor_obj,
+                conductor_id_id     = conductor_pk,
                 total_km            = Decimal(_p(15, '0')),
                 start_ticket_no     = int(_p(16, 0)),
                 end_ticket_no       = int(_p(17, 0)),
@@ -1264,13 +1587,17 @@ def process_trip_close_summary_data(self, log_id):
             if existing:
                 for k, v in close_fields.items():
                     setattr(existing, k, v)
-                existing.save()
+                existing.report_version = F('report_version') + 1
+                # Close fields only — keeps the live_* counters' F() increments.
+                existing.save(update_fields=[*close_fields, 'report_version', 'updated_at'])
+                record_trip_closed(company.id, existing.start_date, existing.bus_no,
+                                   existing.route_id_id, existing.total_km)
             else:
                 try:
                     with transaction.atomic():
                         TripData.objects.create(
                             palmtec_id   = _p(2),
-                            route_id     = route,
+                            route_id_id  = route_pk,
                             trip_no      = trip_no,
                             start_date   = start_date,
                             start_time   = start_time,
@@ -1285,6 +1612,7 @@ def process_trip_close_summary_data(self, log_id):
                     log.error_message = str(ie)
                     log.save()
                     return
+                record_trip_closed(company.id, start_date, None, route_pk, close_fields['total_km'])
 
             log.status = RawDataLog.statusChoices.PROCESSED
             log.processed_at = timezone.now()
@@ -1332,8 +1660,8 @@ def process_schedule_close_summary_data(self, log_id):
                 _fail(log, f"Missing required fields: {', '.join(missing)}")
                 return
 
-            route = _get_route_for_palmtec(_p(4), company)
-            if not route:
+            route_pk = _resolve_route_pk(_p(4), company.id)
+            if not route_pk:
                 _fail(log, f"Route not found: {_p(4)}")
                 return
 
@@ -1357,19 +1685,19 @@ def process_schedule_close_summary_data(self, log_id):
                 log.save()
                 return
 
-            driver_obj    = _resolve_employee(_p(10), company.id)
-            conductor_obj = _resolve_employee(_p(11), company.id)
-            bus_obj       = _resolve_vehicle(_p(12),  company.id)
+            driver_pk     = _resolve_employee_pk(_p(10), company.id)
+            conductor_pk  = _resolve_employee_pk(_p(11), company.id)
+            bus_pk        = _resolve_vehicle_pk(_p(12),  company.id)
 
             close_fields_new = dict(
                 close_unique_code       = _p(1),
-                route_id                = route,
+                route_id_id             = route_pk,
                 driver                  = _p(10),
-                driver_id               = driver_obj,
+                driver_id_id            = driver_pk,
                 conductor               = _p(11),
-                conductor_id            = conductor_obj,
+                conductor_id_id         = conductor_pk,
                 bus_no                  = _p(12),
-                bus_id                  = bus_obj,
+                bus_id_id               = bus_pk,
                 end_date                = end_date,
                 end_time                = end_time,
                 end_datetime            = end_datetime,
@@ -1416,7 +1744,8 @@ def process_schedule_close_summary_data(self, log_id):
             if existing:
                 for k, v in close_fields_new.items():
                     setattr(existing, k, v)
-                existing.save()
+                # Close fields only — keeps the live_* counters' F() increments.
+                existing.save(update_fields=[*close_fields_new, 'updated_at'])
             else:
                 try:
                     with transaction.atomic():
@@ -1470,8 +1799,9 @@ def scan_pending_raw_logs():
         received_at__range=(stale_cutoff, requeue_cutoff),
     ).order_by('received_at')[:200]
 
+    # Tickets are requeued together through the batch task; everything else
+    # keeps its one-log-per-task processor.
     TASK_MAP = {
-        RawDataLog.typeChoices.TRANSACTION:            process_transaction_data,
         RawDataLog.typeChoices.TRIP_OPEN:              process_trip_open_data,
         RawDataLog.typeChoices.TRIP_CLOSE:             process_trip_close_data,
         RawDataLog.typeChoices.TRIP_CLOSE_SUMMARY:     process_trip_close_summary_data,
@@ -1481,12 +1811,20 @@ def scan_pending_raw_logs():
     }
 
     count = 0
+    ticket_ids = []
     for record in requeue_records:
+        if record.source == RawDataLog.typeChoices.TRANSACTION:
+            ticket_ids.append(record.id)
+            continue
         task = TASK_MAP.get(record.source)
         if task:
             task.delay(record.id)
             count += 1
 
+    if ticket_ids:
+        process_transaction_batch.delay(ticket_ids)
+        count += len(ticket_ids)
+
     return count
 
 
@@ -1500,6 +1838,30 @@ def cleanup_processed_raw_logs():
     return deleted_count
 
 
+@shared_task
+def flush_device_heartbeats():
+    """
+    Write buffered device heartbeats (device_heartbeat.HEARTBEAT_HASH) to
+    etm_device.last_seen_at with one bulk UPDATE.
+    """
+    return flush_heartbeats()
+
+
+@shared_task
+def reconcile_daily_revenue(days=3):
+    """
+    Rebuild the daily revenue summaries of the last `days` days (today
+    excluded) from TransactionData / TripData. Catches tickets uploaded
+    late by offline devices, manual edits and deletes that the incremental
+    path never sees.
+    """
+    today = timezone.localdate()
+    rows = 0
+    for offset in range(1, days + 1):
+        rows += rebuild_day(today - timedelta(days=offset))
+    return rows
+
+
 import logging as _logging
 _sweep_logger = _logging.getLogger(__name__)
 
@@ -1511,9 +1873,8 @@ def sweep_stale_sessions():
     force-logged out. Mark those sessions inactive in the DB so the admin
     session listing stays accurate.
     """
-    from django.core.cache import cache
     from .models import UserSession
-    from .authentication import _CACHE_KEY_PREFIX
+    from .authentication import session_key_exists
 
     active_sessions = UserSession.objects.filter(is_active=True).values_list(
         'session_uid', flat=True,
@@ -1521,8 +1882,7 @@ def sweep_stale_sessions():
 
     stale_ids = []
     for session_uid in active_sessions:
-        key = f'{_CACHE_KEY_PREFIX}{session_uid}'
-        if not cache.get(key):
+        if not session_key_exists(str(session_uid)):
             stale_ids.append(session_uid)
 
     if stale_ids:
@@ -1938,3 +2298,27 @@ def auto_populate_aggregator_tids():
 
     _tid_log.info('[auto_populate_aggregator_tids] Done. %d device(s) updated.', total_updated)
     return total_updated
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MDB import
+# Enqueued by MdbImportView (mdb_import_jobs.start); progress events go to a
+# Redis stream the browser reads through import-mdb/<job_id>/events.
+# ─────────────────────────────────────────────────────────────────────────────
+
+@shared_task
+def run_mdb_import(job_id, mdb_path, company_id, user_id):
+    from .mdb_import_jobs import run
+    run(job_id, mdb_path, company_id, user_id)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BUS.DAT blobs
+# Queued by device_busdat.invalidate_busdat after a settings / device change;
+# repacks the whole fleet's BUS.DAT in one batch.
+# ─────────────────────────────────────────────────────────────────────────────
+
+@shared_task
+def rebuild_busdat_blobs(company_id, generation=None):
+    from .device_busdat import rebuild
+    return rebuild(company_id, generation)
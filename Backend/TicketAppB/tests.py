@@ -1,16 +1,34 @@
 """
-Tests for get_etm_initial_data view.
+Tests for get_etm_initial_data view, the APK report query counts, the
+flat report rows, the since= poll after a trip close and the device
+master-data file packers.
 
 Run with: python manage.py test yourapp.tests.GetEtmInitialDataTests
 """
 
+import datetime
+import os
+from decimal import Decimal
+from pathlib import Path
 from unittest.mock import patch
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from .models import ETMDevice, DeviceRejectionLog, Company
+from .models import (
+    ETMDevice, DeviceRejectionLog, Company, CustomUser, UserRole, UserTier,
+    BusType, Route, Stage, RouteStage, ScheduleData, TripData, TransactionData,
+    Fare, Currency, Employee, EmployeeType, VehicleType, ExpenseMaster,
+    Depot, RouteDepot, RawDataLog,
+)
+from .serializers.transactions import (
+    TicketDataSerializer, TripDataSerializer, ScheduleDataSerializer,
+    ticket_report_rows, trip_report_rows, schedule_report_rows,
+)
+from .tasks import process_trip_close_data
+from .views.apk import master_send
 
 
 class GetEtmInitialDataTests(TestCase):
@@ -173,4 +191,377 @@ class GetEtmInitialDataTests(TestCase):
     @patch.dict("os.environ", {"LICENSE_SERVER_BASE_URL": "http://my-license-server.com"})
     def test_license_url_uses_env_variable_when_set(self):
         response = self.client.get(self.url, {"serialnumber": "SN-001"})
-        self.assertEqual(response.data["data"]["cLicenseURL"], "http://my-license-server.com")
\ No newline at end of file
+        self.assertEqual(response.data["data"]["cLicenseURL"], "http://my-license-server.com")
+
+
+class ApkReportQueryCountTests(TestCase):
+    """
+    The APK trip list, duty report and bus summary must cost the same number
+    of queries however many trips the bus ran — open trips read their live
+    counters instead of aggregating tickets per trip.
+    """
+
+    DATE = datetime.date(2026, 3, 15)
+
+    def setUp(self):
+        self.company = Company.objects.create(
+            company_id="1001",
+            company_name="Test Corp",
+            contact_person="John",
+        )
+        self.user = CustomUser.objects.create(
+            username="admin",
+            role=UserRole.COMPANY_USER,
+            tier=UserTier.INTERMEDIATE,
+            company=self.company,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        bus_type = BusType.objects.create(bustype_code="B1", name="Ordinary", company=self.company)
+        self.route = Route.objects.create(
+            route_code="R1", route_name="Route 1", min_fare=1, fare_type=1,
+            bus_type=bus_type, company=self.company,
+        )
+        self.stages = [
+            RouteStage.objects.create(
+                route=self.route,
+                stage=Stage.objects.create(stage_code=f"S{i}", stage_name=f"Stage {i}", company=self.company),
+                sequence_no=i, distance=i * 5, company=self.company,
+            )
+            for i in range(1, 4)
+        ]
+        self.schedule = ScheduleData.objects.create(
+            palmtec_id="101", schedule_no=1, bus_no="KL01",
+            start_date=self.DATE, company_code=self.company,
+        )
+
+    def _add_trips(self, count):
+        """Half closed, half open, each with a few tickets."""
+        for trip_no in range(1, count + 1):
+            is_closed = trip_no % 2 == 0
+            trip = TripData.objects.create(
+                palmtec_id="101", trip_no=trip_no, schedule_no=1, schedule_id=self.schedule,
+                route_id=self.route, bus_no="KL01", driver="D1", conductor="C1",
+                start_date=self.DATE, start_time=datetime.time(6 + trip_no),
+                is_closed=is_closed, total_collection=Decimal("40.00"), total_km=Decimal("15.00"),
+                live_collection=Decimal("40.00"), live_ticket_count=2,
+                last_ticket_no=str(trip_no * 10 + 1), last_to_stage_id=self.stages[-1],
+                company_code=self.company,
+            )
+            for n in range(2):
+                TransactionData.objects.create(
+                    palmtec_id="101", trip_id=trip, schedule_id=self.schedule, route_id=self.route,
+                    ticket_number=str(trip_no * 10 + n), ticket_date=self.DATE,
+                    ticket_time=datetime.time(6 + trip_no, n), ticket_amount=Decimal("20.00"),
+                    to_stage_id=self.stages[-1], bus_no="KL01",
+                    company_code=self.company, raw_payload="",
+                )
+
+    def _assert_constant_queries(self, url_name, params, expected):
+        for count in (1, 6):
+            TransactionData.objects.all().delete()
+            TripData.objects.all().delete()
+            self._add_trips(count)
+            with self.assertNumQueries(expected):
+                response = self.client.get(reverse(url_name), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_apk_trips_query_count_is_constant(self):
+        self._assert_constant_queries(
+            "apk_trips", {"bus_no": "KL01", "schedule_no": 1, "date": str(self.DATE)}, 1,
+        )
+
+    def test_duty_report_query_count_is_constant(self):
+        self._assert_constant_queries(
+            "apk_duty_report", {"bus_no": "KL01", "date": str(self.DATE)}, 1,
+        )
+
+    def test_bus_summary_query_count_is_constant(self):
+        self._assert_constant_queries(
+            "apk_bus_summary",
+            {"bus_no": "KL01", "from_date": str(self.DATE), "to_date": str(self.DATE)},
+            2,
+        )
+
+
+class FlatReportRowsParityTests(TestCase):
+    """
+    The values()-based report rows must produce exactly what the report
+    serializers produce — same keys, order and rendered values — including
+    rows whose foreign keys are null.
+    """
+
+    DATE = datetime.date(2026, 3, 15)
+
+    def setUp(self):
+        self.company = Company.objects.create(
+            company_id="1001",
+            company_name="Test Corp",
+            contact_person="John",
+        )
+        bus_type = BusType.objects.create(bustype_code="B1", name="Ordinary", company=self.company)
+        route = Route.objects.create(
+            route_code="R1", route_name="Route 1", min_fare=1, fare_type=1,
+            bus_type=bus_type, company=self.company,
+        )
+        # depot_code is the route's first RouteDepot
+        for code in ("DP1", "DP2"):
+            depot = Depot.objects.create(company=self.company, depot_code=code, depot_name=code, address="x")
+            RouteDepot.objects.create(route=route, depot=depot, company=self.company)
+        stages = [
+            RouteStage.objects.create(
+                route=route,
+                stage=Stage.objects.create(stage_code=f"S{i}", stage_name=f"Stage {i}", company=self.company),
+                sequence_no=i, distance=i * 5, company=self.company,
+            )
+            for i in range(1, 3)
+        ]
+
+        schedule = ScheduleData.objects.create(
+            palmtec_id="101", schedule_no=1, bus_no="KL01", start_date=self.DATE,
+            route_id=route, battery_open=80, company_code=self.company,
+        )
+        ScheduleData.objects.create(   # no route, no trips, closed
+            palmtec_id="102", schedule_no=2, start_date=self.DATE,
+            is_closed=True, company_code=self.company,
+        )
+        trip = TripData.objects.create(
+            palmtec_id="101", trip_no=1, schedule_no=1, schedule_id=schedule, route_id=route,
+            bus_no="KL01", start_date=self.DATE, start_time=datetime.time(6, 30),
+            is_closed=True, total_collection=Decimal("40.00"), upi_ticket_amount=Decimal("15.50"),
+            total_km=Decimal("15.00"), company_code=self.company,
+        )
+        TripData.objects.create(       # open, no route or schedule, upi above total
+            palmtec_id="102", trip_no=1, schedule_no=2, start_date=self.DATE,
+            total_collection=Decimal("5.00"), upi_ticket_amount=Decimal("9.00"),
+            company_code=self.company,
+        )
+
+        ticket = dict(palmtec_id="101", ticket_date=self.DATE, ticket_amount=Decimal("20.00"),
+                      company_code=self.company, raw_payload="")
+        TransactionData.objects.create(
+            **ticket, ticket_number="1", ticket_time=datetime.time(6, 31), ticket_type=5,
+            trip_id=trip, schedule_id=schedule, route_id=route,
+            from_stage=1, from_stage_id=stages[0], to_stage=2, to_stage_id=stages[1],
+        )
+        TransactionData.objects.create(   # every FK null: raw stage numbers, no trip/route
+            **ticket, ticket_number="2", ticket_time=datetime.time(6, 32), ticket_type=None,
+            from_stage=3, to_stage=4,
+        )
+        TransactionData.objects.create(
+            **ticket, ticket_number="3", ticket_time=datetime.time(6, 33), ticket_type=0,
+            route_id=route, from_stage_id=stages[0],
+        )
+
+    def _assert_same_rows(self, serializer_class, flat_rows, queryset):
+        queryset = queryset.filter(company_code=self.company).order_by("pk")
+        expected = [dict(row) for row in serializer_class(list(queryset), many=True).data]
+        actual = flat_rows.format(list(flat_rows.values(queryset)))
+        self.assertEqual(len(expected), queryset.count())
+        for want, got in zip(expected, actual):
+            self.assertEqual(list(got), list(want))
+            self.assertEqual(got, want)
+        self.assertEqual(len(actual), len(expected))
+
+    def test_ticket_rows_match_serializer(self):
+        self._assert_same_rows(TicketDataSerializer, ticket_report_rows, TransactionData.objects.all())
+
+    def test_trip_rows_match_serializer(self):
+        self._assert_same_rows(TripDataSerializer, trip_report_rows, TripData.objects.all())
+
+    def test_schedule_rows_match_serializer(self):
+        self._assert_same_rows(ScheduleDataSerializer, schedule_report_rows, ScheduleData.objects.all())
+
+
+class TripCloseSincePollTests(TestCase):
+    """
+    A trip closed after the report page loaded must come back from the
+    page's since= poll, which filters on updated_at.
+    """
+
+    DATE = datetime.date(2026, 3, 15)
+
+    def setUp(self):
+        self.company = Company.objects.create(
+            company_id="1001",
+            company_name="Test Corp",
+            contact_person="John",
+        )
+        self.user = CustomUser.objects.create(
+            username="admin",
+            role=UserRole.COMPANY_USER,
+            tier=UserTier.INTERMEDIATE,
+            company=self.company,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        ETMDevice.objects.create(
+            serial_number="SN101", palmtec_id=101, company=self.company,
+            allocation_status=ETMDevice.AllocationStatus.ALLOCATED, is_active=True,
+        )
+        bus_type = BusType.objects.create(bustype_code="B1", name="Ordinary", company=self.company)
+        self.route = Route.objects.create(
+            route_code="R1", route_name="Route 1", min_fare=1, fare_type=1,
+            bus_type=bus_type, company=self.company,
+        )
+        self.trip = TripData.objects.create(
+            palmtec_id="101", trip_no=1, schedule_no=1, route_id=self.route, bus_no="KL01",
+            start_date=self.DATE, start_time=datetime.time(6), company_code=self.company,
+        )
+        # The page loaded after the trip opened.
+        self.page_loaded = timezone.now()
+        TripData.objects.filter(pk=self.trip.pk).update(
+            updated_at=self.page_loaded - datetime.timedelta(minutes=5),
+        )
+
+    def _close_trip(self):
+        parts = [""] * 40
+        parts[0:13] = [
+            "TrpCl", "TC1", "101", "", "R1", "1", "1",
+            str(self.DATE), "06:00:00", str(self.DATE), "06:00:00", str(self.DATE), "07:00:00",
+        ]
+        parts[35] = "40.00"
+        log = RawDataLog.objects.create(
+            raw_payload="|".join(parts), source=RawDataLog.typeChoices.TRIP_CLOSE,
+            company_code=self.company,
+        )
+        with patch("TicketAppB.tasks.record_heartbeat"):
+            process_trip_close_data(log.id)
+        log.refresh_from_db()
+        self.assertEqual(log.status, RawDataLog.statusChoices.PROCESSED, log.error_message)
+
+    def test_since_poll_returns_trip_closed_after_page_load(self):
+        self._close_trip()
+        self.trip.refresh_from_db()
+        self.assertTrue(self.trip.is_closed)
+        self.assertGreater(self.trip.updated_at, self.page_loaded)
+
+        response = self.client.get(reverse("get_all_trip_data"), {
+            "from_date": str(self.DATE), "to_date": str(self.DATE),
+            "since": self.page_loaded.isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["data"]), 1)
+
+
+class MasterSendPackerGoldenTests(TestCase):
+    """
+    The device file packers must reproduce the golden files in
+    testdata/master_send byte for byte — the APK parses these as fixed
+    VB6 record layouts. Fixed pks keep bus type ids and STAGE.LST
+    positions deterministic.
+
+    Regenerate (only for an intended format change) with
+    MASTER_SEND_WRITE_GOLDEN=1 python manage.py test TicketAppB.tests.MasterSendPackerGoldenTests
+    """
+
+    GOLDEN_DIR = Path(__file__).resolve().parent / "testdata" / "master_send"
+
+    def setUp(self):
+        self.company = Company.objects.create(company_id="1001", company_name="Test Corp", contact_person="John")
+        c = self.company
+        ordinary = BusType.objects.create(pk=300, bustype_code="ORD", name="Ordinary Fast Passenger", company=c)
+        ac = BusType.objects.create(pk=7, bustype_code="AC", name="AC", company=c)
+
+        names = ["Ernakulam South Junction", "Aluva", "Kōchi", "Angamaly", "Thrissur Round", "X"]
+        stages = [
+            Stage.objects.create(pk=50 + i, stage_code=f"S{i}", stage_name=name, company=c)
+            for i, name in enumerate(names)
+        ]
+
+        table = Route.objects.create(
+            pk=901, route_code="R1", route_name="Ernakulam - Thrissur Limited Stop",
+            min_fare=Decimal("12.50"), fare_type=1, bus_type=ordinary, half=True, ph=True,
+            start_from=300, company=c,
+        )
+        graph = Route.objects.create(
+            pk=902, route_code="ROUTE22", route_name="Aluva Circular", min_fare=Decimal("8"),
+            fare_type=2, bus_type=ac, conc=True, luggage=True, adjust=True, pass_allow=True, company=c,
+        )
+        Route.objects.create(pk=903, route_code="R3", route_name="No Stages", min_fare=0, fare_type=1, bus_type=ac, company=c)
+        Route.objects.create(pk=904, route_code="R0", route_name="Deleted", min_fare=0, fare_type=1, bus_type=ac,
+                             is_deleted=True, company=c)
+
+        # RouteStage pks interleave the two routes so STAGE.LST order != route order
+        for pk, route, stage, seq, dist, lang in [
+            (201, graph, stages[1], 1, "0",      None),
+            (202, table, stages[0], 1, "0",      "എറണാകുളം"),
+            (203, table, stages[1], 2, "12.35",  "Aluva-ML"),
+            (204, graph, stages[2], 2, "4.5",    None),
+            (205, table, stages[3], 3, "21",     None),
+            (206, graph, stages[4], 3, "9.75",   "A very long local language stage name"),
+            (207, table, stages[4], 4, "58.6",   None),
+            (208, graph, stages[5], 4, "15",     None),
+        ]:
+            RouteStage.objects.create(pk=pk, route=route, stage=stage, sequence_no=seq,
+                                      distance=Decimal(dist), stage_local_lang=lang, company=c)
+
+        for route, row, col, amount in [
+            (table, 1, 2, 10), (table, 1, 3, 15), (table, 1, 4, 32),
+            (graph, 1, 1, 6), (graph, 1, 2, 9), (graph, 2, 2, 5), (graph, 1, 3, 12),
+            (graph, 2, 3, 8), (graph, 3, 3, 4),
+        ]:
+            Fare.objects.create(route=route, row=row, col=col, fare_amount=amount, route_name=route.route_name, company=c)
+
+    def _outputs(self):
+        c = self.company
+        routes = master_send._get_routes(c)
+        route_stages = master_send._get_ordered_route_stages(c)
+        stage_index = {rs.pk: i for i, rs in enumerate(route_stages)}
+        partial_index = {pk: i for pk, i in stage_index.items() if pk != 205}
+
+        emp_types = {
+            name: EmployeeType(emp_type_name=name)
+            for name in ("Senior Driver", "Conductor", "Cleaner", "Ticket Inspector", "Mechanic")
+        }
+        employees = [
+            Employee(employee_code="D0001", employee_name="Rajesh Kumar Narayanan",
+                     emp_type=emp_types["Senior Driver"], password="1234"),
+            Employee(employee_code="CONDUCTOR9", employee_name="Anil",
+                     emp_type=emp_types["Conductor"], password=None),
+            Employee(employee_code="CL1", employee_name="Jōse", emp_type=emp_types["Cleaner"], password="12345678"),
+            Employee(employee_code="I1", employee_name="Priya", emp_type=emp_types["Ticket Inspector"], password=""),
+            Employee(employee_code="M1", employee_name="", emp_type=emp_types["Mechanic"], password="9"),
+        ]
+        vehicles = [
+            VehicleType(bus_reg_num="KL-07-AB-1234", bus_type=BusType(pk=300)),
+            VehicleType(bus_reg_num="KL-41-CD-99999999", bus_type=BusType(pk=7)),
+        ]
+        expenses = [
+            ExpenseMaster(expense_code="DIESEL", expense_name="Diesel"),
+            ExpenseMaster(expense_code="TOLL", expense_name="Toll plaza charges - NH 544"),
+        ]
+        currencies = [Currency(currency="INR"), Currency(currency="₹"), Currency(currency="")]
+
+        return {
+            "ROUTELST.LST":       master_send._pack_routelst_all(routes),
+            "STAGE.LST":          master_send._pack_stagelst_global(route_stages),
+            "LANGUAGE.DAT":       master_send._pack_languagedat(route_stages),
+            "RTE.DAT":            master_send._pack_rtedat(routes, stage_index),
+            "RTE_PARTIAL.DAT":    master_send._pack_rtedat(routes, partial_index),
+            "CREW.DAT":           master_send._pack_crewdat(employees),
+            "VEHICLE.DAT":        master_send._pack_vehicledat(vehicles),
+            "EXPENSEDET.DAT":     master_send._pack_expensedet(expenses),
+            "CURRENCY.DAT":       master_send._pack_currencydat(currencies),
+            "EMPTY_STAGE.LST":    master_send._pack_stagelst_global([]),
+            "EMPTY_RTE.DAT":      master_send._pack_rtedat([], {}),
+        }
+
+    def test_packers_match_golden_files(self):
+        outputs = self._outputs()
+        if os.environ.get("MASTER_SEND_WRITE_GOLDEN"):
+            self.GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+            for name, data in outputs.items():
+                (self.GOLDEN_DIR / name).write_bytes(bytes(data))
+        for name, data in outputs.items():
+            with self.subTest(file=name):
+                self.assertIsInstance(data, bytes)
+                self.assertEqual(data, (self.GOLDEN_DIR / name).read_bytes())
+
+    def test_rtedat_reads_fares_in_one_query(self):
+        routes = master_send._get_routes(self.company)
+        stage_index = {rs.pk: i for i, rs in enumerate(master_send._get_ordered_route_stages(self.company))}
+        with self.assertNumQueries(1):
+            master_send._pack_rtedat(routes, stage_index)
@@ -0,0 +1,109 @@
+"""
+Trip / schedule identity map
+============================
+Every ticket, odometer and expense frame names its trip and schedule by
+device-local identity — (palmtec_id, schedule_no, trip_no, start_date) —
+and all frames of one trip carry the same values. This module maps that
+identity to the row pks in Redis so frames #2..#N of a trip resolve
+without touching TripData / ScheduleData.
+
+  Exact keys     — used by the ingest tasks. Written after commit whenever a
+                   row is saved (signals.py), so ghost rows created by the
+                   ticket path and rows created by ShdOpn/TrpOp land here
+                   the moment they are visible to other workers.
+  On-or-before   — used by the odometer/expense endpoints, which match the
+                   most recent trip/schedule started on or before the record
+                   date. Results (including misses) are cached under a
+                   per-device generation that is bumped whenever a trip or
+                   schedule of that device is created or deleted, so a new
+                   trip never hides behind a stale entry.
+"""
+
+from django.core.cache import cache
+
+from . import cache_versions
+from .views.utils import CACHE_MISS_SENTINEL
+
+# A trip's frames arrive within hours; late stragglers just fall back to the DB.
+_IDENTITY_TTL = 6 * 3600  # seconds
+_MISS_TTL     = 60        # seconds
+
+
+def _schedule_key(company_id, palmtec_id, schedule_no, start_date) -> str:
+    return f'ident:shd:{company_id}:{palmtec_id}:{schedule_no}:{start_date}'
+
+
+def _trip_key(company_id, palmtec_id, schedule_no, trip_no, start_date) -> str:
+    return f'ident:trp:{company_id}:{palmtec_id}:{schedule_no}:{trip_no}:{start_date}'
+
+
+def _generation_key(company_id, palmtec_id) -> str:
+    return f'ident:gen:{company_id}:{palmtec_id}'
+
+
+# ── Exact identity ───────────────────────────────────────────────────────────
+
+def cached_schedule_pk(company_id, palmtec_id, schedule_no, start_date):
+    """ScheduleData pk, or None if not cached."""
+    return cache.get(_schedule_key(company_id, palmtec_id, schedule_no, start_date))
+
+
+def remember_schedule(company_id, palmtec_id, schedule_no, start_date, schedule_pk):
+    cache.set(
+        _schedule_key(company_id, palmtec_id, schedule_no, start_date),
+        schedule_pk, timeout=_IDENTITY_TTL,
+    )
+
+
+def cached_trip(company_id, palmtec_id, schedule_no, trip_no, start_date):
+    """(trip_pk, schedule_pk) or None if not cached. schedule_pk may be None."""
+    value = cache.get(_trip_key(company_id, palmtec_id, schedule_no, trip_no, start_date))
+    return tuple(value) if value is not None else None
+
+
+def remember_trip(company_id, palmtec_id, schedule_no, trip_no, start_date, trip_pk, schedule_pk):
+    cache.set(
+        _trip_key(company_id, palmtec_id, schedule_no, trip_no, start_date),
+        (trip_pk, schedule_pk), timeout=_IDENTITY_TTL,
+    )
+
+
+def forget_schedule(company_id, palmtec_id, schedule_no, start_date):
+    cache.delete(_schedule_key(company_id, palmtec_id, schedule_no, start_date))
+
+
+def forget_trip(company_id, palmtec_id, schedule_no, trip_no, start_date):
+    cache.delete(_trip_key(company_id, palmtec_id, schedule_no, trip_no, start_date))
+
+
+# ── On-or-before lookups ─────────────────────────────────────────────────────
+
+def _device_generation(company_id, palmtec_id) -> int:
+    return cache_versions.current(_generation_key(company_id, palmtec_id))
+
+
+def bump_device_generation(company_id, palmtec_id):
+    cache_versions.bump(_generation_key(company_id, palmtec_id))
+
+
+def latest_on_or_before(kind, company_id, palmtec_id, number, record_date, resolve):
+    """
+    Cached result of resolve() — a pk or None — for the latest `kind`
+    ('trip' / 'schedule') numbered `number` started on or before record_date.
+    Misses are cached for _MISS_TTL.
+    """
+    generation = _device_generation(company_id, palmtec_id)
+    key = f'ident:{kind}_le:{company_id}:{palmtec_id}:{generation}:{number}:{record_date}'
+
+    cached_pk = cache.get(key)
+    if cached_pk == CACHE_MISS_SENTINEL:
+        return None
+    if cached_pk is not None:
+        return cached_pk
+
+    pk = resolve()
+    if pk:
+        cache.set(key, pk, timeout=_IDENTITY_TTL)
+    else:
+        cache.set(key, CACHE_MISS_SENTINEL, timeout=_MISS_TTL)
+    return pk
@@ -0,0 +1,54 @@
+"""
+Closed-trip report cache
+========================
+Once a trip is closed its tickets and summary practically never change,
+yet the app re-opens yesterday's trips all day. The per-trip report
+fragments (ticket list, passenger totals, stage table) of closed trips
+are therefore cached in Redis with no TTL:
+
+  key    report:trip:<trip pk>:<fragment>
+  value  (TripData.report_version, zlib-compressed JSON payload)
+
+One key per trip and fragment, overwritten in place. A cached payload is
+served only while its version matches the trip row the view has already
+loaded, so checking freshness costs no extra query.
+
+Invalidation: the ticket ingest tasks bump report_version in the same
+UPDATE that folds a ticket into the trip's live counters (late tickets),
+the TrpCl / TrpClSum tasks bump it when they close or re-close a trip,
+and rebuild_live_counters bumps it for every row it rewrites. Code that
+edits a trip's tickets by other means must bump it too.
+
+Open trips are never cached — their fragments change with every ticket.
+"""
+
+import json
+import zlib
+
+from django.core.cache import cache
+
+_KEY_PREFIX = 'report:trip:'
+
+
+def _key(trip_pk, fragment) -> str:
+    return f'{_KEY_PREFIX}{trip_pk}:{fragment}'
+
+
+def cached_trip_fragment(trip, fragment, build):
+    """
+    Return build() for `trip`, from the cache if the trip is closed and the
+    cached copy is still at the trip's report_version. `build` must return
+    something JSON-serialisable.
+    """
+    if not trip.is_closed:
+        return build()
+
+    key = _key(trip.pk, fragment)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == trip.report_version:
+        return json.loads(zlib.decompress(cached[1]))
+
+    payload = build()
+    blob = zlib.compress(json.dumps(payload, separators=(',', ':')).encode())
+    cache.set(key, (trip.report_version, blob), timeout=None)
+    return payload
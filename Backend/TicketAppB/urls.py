@@ -84,6 +84,7 @@ urlpatterns = [
     path('getTripClose', palmtec_ingest.getTripCloseDataFromDevice, name='get_trip_close_data'),
 
     path('getTicket', palmtec_ingest.getTicketDataFromDevice, name='get_ticket_data'),
+    path('getTicketBatch', palmtec_ingest.getTicketBatchFromDevice, name='get_ticket_batch_data'),
 
     path('getTripCloseSummary', palmtec_ingest.getTripCloseSummaryFromDevice, name='get_trip_close_summary'),
     path('getSdClSm', palmtec_ingest.getScheduleCloseSummaryFromDevice, name='get_schedule_close_summary'),
@@ -99,6 +100,10 @@ urlpatterns = [
     path('get_all_transaction_data', ticket_reports.get_all_transaction_data, name='get_all_transaction_data'),
     path('get_all_trip_data',        ticket_reports.get_all_trip_data,        name='get_all_trip_data'),
     path('get_all_schedule_data',    ticket_reports.get_all_schedule_data,    name='get_all_schedule_data'),
+    path('reports/tickets/export',   ticket_reports.export_transaction_data,  name='export_transaction_data'),
+    path('reports/trips/export',     ticket_reports.export_trip_data,         name='export_trip_data'),
+    path('reports/schedules/export', ticket_reports.export_schedule_data,     name='export_schedule_data'),
+    path('live/feed',                ticket_reports.live_feed,                name='live_feed'),
 
     # payment aggregator webhooks (aggregator server → us)
     path('postTransactionDetails', aggregator_webhooks.aggregator_settlement_data, name='postTransactionDetails'),
@@ -131,6 +136,7 @@ urlpatterns = [
 
     # mdb upload
     path('import-mdb', mdb_views.MdbImportView.as_view(), name='import-mdb'),
+    path('import-mdb/<str:job_id>/events', mdb_views.MdbImportEventsView.as_view(), name='import-mdb-events'),
 
     # About page + GlobalSettings
     path('about',            global_settings_views.about,           name='about'),
@@ -1,15 +1,17 @@
+import hashlib
 import io
 import struct
 import zipfile
 import logging
 from django.http import HttpResponse, JsonResponse
-from ...models import Settings, Route, Employee, VehicleType, ExpenseMaster, Stage, Fare, Currency, RouteStage, Company, SettingsProfile, ETMDevice
+from ...models import Route, Employee, VehicleType, ExpenseMaster, Stage, Fare, Currency, RouteStage, Company
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from ...permissions import LicensePermission
+from ... import device_busdat, device_masterdata
 import secrets
 
 logger = logging.getLogger(__name__)
@@ -53,6 +55,52 @@ def _u(val):
         return struct.pack('<H', 0)
 
 
+# Field values for struct formats. An 's' field null-pads / truncates
+# exactly like _s(), so the record packers below hand it _a(val).
+
+def _a(val):
+    return (val or '').encode('ascii', errors='replace')
+
+def _byte(val):
+    """_b() as an int."""
+    try:
+        return max(0, min(255, int(float(val or 0))))
+    except (ValueError, TypeError):
+        return 0
+
+def _float(val):
+    """_f() as a float."""
+    try:
+        return float(val or 0)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _pack_records(record, items, fields):
+    """
+    Pack one fixed-size `record` per item into a single preallocated
+    buffer; fields(item) returns the struct values for that item.
+    """
+    items = list(items)
+    buf = bytearray(record.size * len(items))
+    pack_into = record.pack_into
+    for offset, item in zip(range(0, len(buf), record.size), items):
+        pack_into(buf, offset, *fields(item))
+    return bytes(buf)
+
+
+# ─── Record layouts (little-endian, no alignment padding) ─────────────────────
+
+ROUTELST_RECORD = struct.Struct('<5s25sBfB5BBB16sfB')   # 64  VB6 RouteLST
+STAGE_RECORD    = struct.Struct('<11sxf')               # 16  StageName(12, last byte NUL) + Distance
+LANGUAGE_RECORD = struct.Struct('<24s')                 # 24  LanguageStageCode
+CREW_RECORD     = struct.Struct('<16s8sB7s')            # 32  CREWDET
+EXPENSE_RECORD  = struct.Struct('<5s16s43x')            # 64  EXPENSEDET1
+VEHICLE_RECORD  = struct.Struct('<B16s15x')             # 32  VEHICLE1
+CURRENCY_RECORD = struct.Struct('<8s')                  # 8   CREATE_CUR
+RTE_HEADER      = struct.Struct('<5sBBx')               # 8   RTE.DAT route header
+
+
 # ─── File packers ──────────────────────────────────────────────────────────────
 
 def _pack_busdat(p, cs):
@@ -198,29 +246,38 @@ def _pack_busdat(p, cs):
     return data  # 704 bytes total
 
 
+def _routelst_fields(route):
+    return (
+        _a(route.route_code),
+        _a(route.route_name),
+        _byte(len(route.route_stages.all())),
+        _float(route.min_fare),
+        _byte(route.fare_type),
+        bool(route.half), bool(route.conc), bool(route.ph), bool(route.luggage), bool(route.adjust),
+        _byte(route.start_from),
+        route.bus_type.pk % 256,             # BusType byte ID
+        _a(route.bus_type.name),
+        0.0,                                 # OptedKM
+        bool(route.pass_allow),
+    )
+
+
 def _pack_routelst(route):
     """
     Build RouteLST binary record for one route (64 bytes).
     Matches VB6 Type RouteLST in mdFunctions.bas.
     """
-    stage_count = len(route.route_stages.all())
-    data  = _s(route.route_code, 5)
-    data += _s(route.route_name, 25)
-    data += _b(stage_count)
-    data += _f(route.min_fare)
-    data += _b(route.fare_type)
-    data += _bool(route.half)
-    data += _bool(route.conc)
-    data += _bool(route.ph)
-    data += _bool(route.luggage)
-    data += _bool(route.adjust)
-    data += _b(route.start_from)
-    data += _b(route.bus_type.pk % 256)     # BusType byte ID
-    data += _s(route.bus_type.name, 16)
-    data += _f(0)                            # OptedKM
-    data += _bool(route.pass_allow)
-    return data  # 64 bytes
+    return ROUTELST_RECORD.pack(*_routelst_fields(route))
+
+
 
+def _crew_type_byte(emp):
+    name = emp.emp_type.emp_type_name.lower()
+    if 'driver' in name:          return 1
+    elif 'conductor' in name:     return 2
+    elif 'cleaner' in name:       return 3
+    elif 'inspector' in name:     return 4
+    return 0
 
 
 def _pack_crewdat(employees):
@@ -228,19 +285,9 @@ def _pack_crewdat(employees):
     Build CREW.DAT binary (32 bytes per employee).
     Matches VB6 Type CREWDET in mdFunctions.bas.
     """
-    data = b''
-    for emp in employees:
-        name = emp.emp_type.emp_type_name.lower()
-        if 'driver' in name:          type_byte = 1
-        elif 'conductor' in name:     type_byte = 2
-        elif 'cleaner' in name:       type_byte = 3
-        elif 'inspector' in name:     type_byte = 4
-        else:                         type_byte = 0
-        data += _s(emp.employee_name, 16)
-        data += _s(emp.employee_code, 8)
-        data += bytes([type_byte])
-        data += _s(emp.password, 7)
-    return data  # 32 bytes × employee_count
+    return _pack_records(CREW_RECORD, employees, lambda emp: (
+        _a(emp.employee_name), _a(emp.employee_code), _crew_type_byte(emp), _a(emp.password),
+    ))  # 32 bytes × employee_count
 
 
 def _pack_expensedet(expenses):
@@ -249,12 +296,9 @@ def _pack_expensedet(expenses):
     Matches VB6 Type EXPENSEDET and device struct EXPENSEDET1:
       ucType(5) + expname(16) + Reserved(43) = 64 bytes
     """
-    data = b''
-    for exp in expenses:
-        data += _s(exp.expense_code, 5)
-        data += _s(exp.expense_name, 16)
-        data += b'\x00' * 43             # Reserved padding
-    return data  # 64 bytes × expense_count
+    return _pack_records(EXPENSE_RECORD, expenses, lambda exp: (
+        _a(exp.expense_code), _a(exp.expense_name),
+    ))  # 64 bytes × expense_count
 
 
 def _pack_vehicledat(vehicles):
@@ -264,12 +308,9 @@ def _pack_vehicledat(vehicles):
       BUSID(1) + BusNo(16) + Reserved(15) = 32 bytes
     BUSID is the bus-type primary key (modulo 256).
     """
-    data = b''
-    for v in vehicles:
-        data += bytes([v.bus_type.pk % 256])  # BUSID
-        data += _s(v.bus_reg_num, 16)          # BusNo
-        data += b'\x00' * 15                   # Reserved
-    return data  # 32 bytes × vehicle_count
+    return _pack_records(VEHICLE_RECORD, vehicles, lambda v: (
+        v.bus_type.pk % 256, _a(v.bus_reg_num),
+    ))  # 32 bytes × vehicle_count
 
 
 # ─── Additional file packers ───────────────────────────────────────────────────
@@ -277,12 +318,9 @@ def _pack_vehicledat(vehicles):
 def _pack_routelst_all(routes):
     """
     Build ROUTELST.LST binary — all routes, 64 bytes each.
-    Reuses _pack_routelst() for each route.
+    Same record as _pack_routelst().
     """
-    data = b''
-    for route in routes:
-        data += _pack_routelst(route)
-    return data
+    return _pack_records(ROUTELST_RECORD, routes, _routelst_fields)
 
 
 def _pack_stagelst_global(route_stages):
@@ -293,12 +331,9 @@ def _pack_stagelst_global(route_stages):
     VB STAGE table is per-route (route, stage, distance), equivalent to RouteStage.
     Stage name truncated to 11 chars + null to ensure null-termination within 12 bytes.
     """
-    data = b''
-    for rs in route_stages:
-        name = (rs.stage.stage_name or '')[:11]
-        data += _s(name, 11) + b'\x00'     # 12 bytes, always null-terminated
-        data += _f(float(rs.distance or 0))  # Distance (4 bytes)
-    return data  # 16 bytes × route_stage_count
+    return _pack_records(STAGE_RECORD, route_stages, lambda rs: (
+        _a(rs.stage.stage_name), _float(rs.distance),
+    ))  # 16 bytes × route_stage_count
 
 
 def _pack_languagedat(route_stages):
@@ -306,10 +341,22 @@ def _pack_languagedat(route_stages):
     Build LANGUAGE.DAT binary — 24 bytes per entry (same order as STAGE.LST).
     Matches VB6 LanguageStageCode As String * 24.
     """
-    data = b''
-    for rs in route_stages:
-        data += _s(rs.stage_local_lang or '', 24)
-    return data  # 24 bytes × route_stage_count
+    return _pack_records(LANGUAGE_RECORD, route_stages, lambda rs: (
+        _a(rs.stage_local_lang),
+    ))  # 24 bytes × route_stage_count
+
+
+def _fares_by_route(routes):
+    """{route pk: [fare_amount, ...] in (row, col) order} — one query for all routes."""
+    fares = {route.pk: [] for route in routes}
+    if fares:
+        for route_id, amount in (
+            Fare.objects.filter(route_id__in=list(fares))
+            .order_by('route_id', 'row', 'col')
+            .values_list('route_id', 'fare_amount')
+        ):
+            fares[route_id].append(float(amount))
+    return fares
 
 
 def _pack_rtedat(routes, stage_index):
@@ -318,38 +365,43 @@ def _pack_rtedat(routes, stage_index):
     Per route: Route header (8 bytes) + fare Singles + stage Int16 IDs.
     Matches VB6 Type Route and fare/stage writing in mdFunctions.bas CreateRTE().
     stage_index: {RouteStage.pk: 0-based position in global STAGE.LST}
+
+    Route stages come from the caller's prefetch_related('route_stages__stage')
+    and fares from one query; the output is sized up front and packed in place.
     """
-    data = b''
+    routes = list(routes)
+    fares_by_route = _fares_by_route(routes)
+
+    plan = []
+    size = 0
     for route in routes:
-        rs_qs = list(
-            route.route_stages.select_related('stage').order_by('sequence_no')
-        )
-        nos = len(rs_qs)
-
-        # Route header (8 bytes)
-        data += _s(route.route_code, 5)
-        data += _b(route.fare_type)
-        data += bytes([nos % 256])
-        data += b'\x00'  # NoOfDupFare
-
-        fares = list(
-            Fare.objects.filter(route=route)
-            .order_by('row', 'col')
-            .values_list('fare_amount', flat=True)
-        )
+        rs_list = sorted(route.route_stages.all(), key=lambda rs: rs.sequence_no)
+        fares = fares_by_route[route.pk]
+        plan.append((route, rs_list, fares))
+        size += RTE_HEADER.size + 4 * len(fares) + 2 * len(rs_list)
+
+    buf = bytearray(size)
+    offset = 0
+    for route, rs_list, fares in plan:
+        nos = len(rs_list)
+        RTE_HEADER.pack_into(buf, offset, _a(route.route_code), _byte(route.fare_type), nos % 256)
+        offset += RTE_HEADER.size
 
-        for f in fares:
-            data += struct.pack('<f', float(f))
+        struct.pack_into(f'<{len(fares)}f', buf, offset, *fares)
+        offset += 4 * len(fares)
 
         # Stage IDs as Int16 — 0-based position in global STAGE.LST (RouteStage.pk order)
-        for rs in rs_qs:
+        ids = []
+        for rs in rs_list:
             idx = stage_index.get(rs.pk, -1)
             if idx < 0:
                 logger.warning('RTE.DAT: RouteStage pk=%s not in stage_index for route %s', rs.pk, route.route_code)
                 idx = 0
-            data += struct.pack('<h', idx)
+            ids.append(idx)
+        struct.pack_into(f'<{nos}h', buf, offset, *ids)
+        offset += 2 * nos
 
-    return data
+    return bytes(buf)
 
 
 def _pack_currencydat(currencies):
@@ -357,10 +409,9 @@ def _pack_currencydat(currencies):
     Build CURRENCY.DAT binary — 8 bytes per entry.
     Matches VB6 Type CREATE_CUR: CurString As String * 8.
     """
-    data = b''
-    for c in currencies:
-        data += _s(c.currency, 8)
-    return data  # 8 bytes × currency_count
+    return _pack_records(CURRENCY_RECORD, currencies, lambda c: (
+        _a(c.currency),
+    ))  # 8 bytes × currency_count
 
 
 # ─── Auth helper ───────────────────────────────────────────────────────────────
@@ -370,6 +421,48 @@ def _get_company(request):
     return getattr(request.user, 'company', None)
 
 
+# ─── Cached file responses ─────────────────────────────────────────────────────
+# Route-dependent files are cached per company master-data version (see
+# device_masterdata.py) and carry an ETag, so a fleet re-downloading the
+# same files at shift start costs one build and mostly 304s.
+
+def _not_modified(request, tag):
+    header = request.headers.get('If-None-Match', '')
+    if header.strip() == '*':
+        return True
+    return tag in (t.strip().removeprefix('W/') for t in header.split(','))
+
+
+def _cached_file_response(request, company, name, route_codes, build,
+                          content_type='application/octet-stream', filename=None):
+    """
+    Serve file `name` for the company's current master-data version:
+    304 if the device already holds it, otherwise the cached bytes —
+    build() only runs on a cache miss, and then also makes sure the
+    version has a manifest for a later ?since_version= to compare against.
+    """
+    version = device_masterdata.current_version(company.id)
+    tag = device_masterdata.etag(company.id, version, name, route_codes)
+    if _not_modified(request, tag):
+        response = HttpResponse(status=304)
+    else:
+        built = []
+
+        def build_once():
+            built.append(name)
+            return build()
+
+        binary = device_masterdata.get_file(company.id, version, name, route_codes, build_once)
+        if built:
+            _get_manifest(company, version, route_codes)
+        response = HttpResponse(binary, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename or name}"'
+    response['ETag'] = tag
+    response['Cache-Control'] = 'private, no-cache'
+    response['X-Masterdata-Version'] = str(version)
+    return response
+
+
 # ─── Views ─────────────────────────────────────────────────────────────────────
 
 @api_view(['GET'])
@@ -399,6 +492,10 @@ def get_settings_file(request):
     """
     GET /device/settings/
     Returns BUS.DAT binary (704 bytes).
+
+    Blobs are precomputed per device (device_busdat.py), so this is one
+    cache round trip; the DB is only read on a miss. Sent with an ETag
+    of the blob — If-None-Match gets 304.
     """
     company = _get_company(request)
     if not company:
@@ -408,25 +505,23 @@ def get_settings_file(request):
     if not serialnumber:
         return HttpResponse('SERIAL_NUMBER_NOT_PROVIDED', status=400)
 
-    try:
-        device = ETMDevice.objects.get(company=company, serial_number=serialnumber)
-    except ETMDevice.DoesNotExist:
+    entry = device_busdat.lookup(company.id, serialnumber) or device_busdat.load(company, serialnumber)
+    if entry is None:
         return HttpResponse('DEVICE_NOT_FOUND', status=404)
 
-    if not device.is_active:
+    state, tag, binary = entry
+    if state == device_busdat.INACTIVE:
         return HttpResponse('DEVICE_INACTIVE', status=403)
-
-    try:
-        profile = SettingsProfile.objects.get(device=device)
-    except SettingsProfile.DoesNotExist:
+    if state == device_busdat.NO_PROFILE:
         return HttpResponse('SETTINGS_NOT_FOUND', status=404)
 
-    # Company-level settings — may not exist yet, pass None and _pack_busdat handles fallback
-    company_settings = Settings.objects.filter(company=company).first()
-
-    binary = _pack_busdat(profile, company_settings)
-    response = HttpResponse(binary, content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename="BUS.DAT"'
+    if _not_modified(request, tag):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(binary, content_type='application/octet-stream')
+        response['Content-Disposition'] = 'attachment; filename="BUS.DAT"'
+    response['ETag'] = tag
+    response['Cache-Control'] = 'private, no-cache'
     return response
 
 
@@ -441,16 +536,7 @@ def get_crew_file(request):
     if not company:
         return HttpResponse('NO_COMPANY', status=400)
 
-    employees = (
-        Employee.objects
-        .filter(company=company, is_deleted=False)
-        .select_related('emp_type')
-        .order_by('employee_code')
-    )
-    binary = _pack_crewdat(employees)
-    response = HttpResponse(binary, content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename="CREW.DAT"'
-    return response
+    return _cached_file_response(request, company, 'CREW.DAT', None, lambda: _build_crewdat(company))
 
 
 @api_view(['GET'])
@@ -464,16 +550,7 @@ def get_vehicles_file(request):
     if not company:
         return HttpResponse('NO_COMPANY', status=400)
 
-    vehicles = (
-        VehicleType.objects
-        .filter(company=company, is_deleted=False)
-        .select_related('bus_type')
-        .order_by('bus_reg_num')
-    )
-    binary = _pack_vehicledat(vehicles)
-    response = HttpResponse(binary, content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename="VEHICLE.DAT"'
-    return response
+    return _cached_file_response(request, company, 'VEHICLE.DAT', None, lambda: _build_vehicledat(company))
 
 
 @api_view(['GET'])
@@ -487,15 +564,7 @@ def get_expenses_file(request):
     if not company:
         return HttpResponse('NO_COMPANY', status=400)
 
-    expenses = (
-        ExpenseMaster.objects
-        .filter(company=company)
-        .order_by('expense_code')
-    )
-    binary = _pack_expensedet(expenses)
-    response = HttpResponse(binary, content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename="EXPENSEDET.DAT"'
-    return response
+    return _cached_file_response(request, company, 'EXPENSEDET.DAT', None, lambda: _build_expensedet(company))
 
 
 @api_view(['GET'])
@@ -511,15 +580,10 @@ def get_routelst_file(request):
         return HttpResponse('NO_COMPANY', status=400)
 
     route_codes = _parse_route_codes(request)
-    routes = Route.objects.filter(company=company, is_deleted=False)
-    if route_codes:
-        routes = routes.filter(route_code__in=route_codes)
-    routes = routes.select_related('bus_type').prefetch_related('route_stages__stage').order_by('route_code')
-
-    binary = _pack_routelst_all(routes)
-    response = HttpResponse(binary, content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename="ROUTELST.LST"'
-    return response
+    return _cached_file_response(
+        request, company, 'ROUTELST.LST', route_codes,
+        lambda: _pack_routelst_all(_get_routes(company, route_codes)),
+    )
 
 
 def _parse_route_codes(request):
@@ -534,6 +598,51 @@ def _parse_route_codes(request):
     return codes or None
 
 
+def _build_crewdat(company):
+    return _pack_crewdat(
+        Employee.objects
+        .filter(company=company, is_deleted=False)
+        .select_related('emp_type')
+        .order_by('employee_code')
+    )
+
+
+def _build_vehicledat(company):
+    return _pack_vehicledat(
+        VehicleType.objects
+        .filter(company=company, is_deleted=False)
+        .select_related('bus_type')
+        .order_by('bus_reg_num')
+    )
+
+
+def _build_expensedet(company):
+    return _pack_expensedet(ExpenseMaster.objects.filter(company=company).order_by('expense_code'))
+
+
+def _build_currencydat(company):
+    return _pack_currencydat(Currency.objects.filter(company=company).order_by('pk'))
+
+
+def _get_routes(company, route_codes=None):
+    """Company routes (optionally filtered) in route_code order, ready for the packers."""
+    qs = Route.objects.filter(company=company, is_deleted=False)
+    if route_codes:
+        qs = qs.filter(route_code__in=route_codes)
+    return list(
+        qs.select_related('bus_type')
+        .prefetch_related('route_stages__stage')
+        .order_by('route_code')
+    )
+
+
+def _build_rtedat(company, route_codes):
+    # Must use same filtered set as STAGE.LST for positional index consistency
+    route_stages = _get_ordered_route_stages(company, route_codes)
+    stage_index = {rs.pk: i for i, rs in enumerate(route_stages, start=0)}
+    return _pack_rtedat(_get_routes(company, route_codes), stage_index)
+
+
 def _get_ordered_route_stages(company, route_codes=None):
     """
     Return RouteStage entries for company ordered by pk — the canonical
@@ -559,11 +668,11 @@ def get_stagelst_file(request):
     if not company:
         return HttpResponse('NO_COMPANY', status=400)
 
-    route_stages = _get_ordered_route_stages(company, _parse_route_codes(request))
-    binary = _pack_stagelst_global(route_stages)
-    response = HttpResponse(binary, content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename="STAGE.LST"'
-    return response
+    route_codes = _parse_route_codes(request)
+    return _cached_file_response(
+        request, company, 'STAGE.LST', route_codes,
+        lambda: _pack_stagelst_global(_get_ordered_route_stages(company, route_codes)),
+    )
 
 
 @api_view(['GET'])
@@ -578,11 +687,11 @@ def get_languagedat_file(request):
     if not company:
         return HttpResponse('NO_COMPANY', status=400)
 
-    route_stages = _get_ordered_route_stages(company, _parse_route_codes(request))
-    binary = _pack_languagedat(route_stages)
-    response = HttpResponse(binary, content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename="LANGUAGE.DAT"'
-    return response
+    route_codes = _parse_route_codes(request)
+    return _cached_file_response(
+        request, company, 'LANGUAGE.DAT', route_codes,
+        lambda: _pack_languagedat(_get_ordered_route_stages(company, route_codes)),
+    )
 
 
 @api_view(['GET'])
@@ -600,20 +709,10 @@ def get_rtedat_file(request):
         return HttpResponse('NO_COMPANY', status=400)
 
     route_codes = _parse_route_codes(request)
-
-    routes_qs = Route.objects.filter(company=company, is_deleted=False)
-    if route_codes:
-        routes_qs = routes_qs.filter(route_code__in=route_codes)
-    routes = list(routes_qs.prefetch_related('route_stages__stage').order_by('route_code'))
-
-    # Must use same filtered set as get_stagelst_file for positional index consistency
-    route_stages = _get_ordered_route_stages(company, route_codes)
-    stage_index = {rs.pk: i for i, rs in enumerate(route_stages, start=0)}
-
-    binary = _pack_rtedat(routes, stage_index)
-    response = HttpResponse(binary, content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename="RTE.DAT"'
-    return response
+    return _cached_file_response(
+        request, company, 'RTE.DAT', route_codes,
+        lambda: _build_rtedat(company, route_codes),
+    )
 
 
 @api_view(['GET'])
@@ -627,11 +726,7 @@ def get_currency_file(request):
     if not company:
         return HttpResponse('NO_COMPANY', status=400)
 
-    currencies = Currency.objects.filter(company=company).order_by('pk')
-    binary = _pack_currencydat(currencies)
-    response = HttpResponse(binary, content_type='application/octet-stream')
-    response['Content-Disposition'] = 'attachment; filename="CURRENCY.DAT"'
-    return response
+    return _cached_file_response(request, company, 'CURRENCY.DAT', None, lambda: _build_currencydat(company))
 
 
 @api_view(['GET'])
@@ -654,24 +749,56 @@ def get_masterdata_bundle(request):
 
     route_codes (optional): comma-separated e.g. ?route_codes=R01,R02
     Omit to include all company routes.
+
+    Built once per master-data version and served from cache with an ETag;
+    a device sending it as If-None-Match gets 304.
+
+    since_version (optional): the X-Masterdata-Version of the device's last
+    sync. The ZIP then holds only the files that changed since (see
+    get_manifest), or the response is 204 when none did. An unknown or
+    expired version gets the full ZIP.
     """
     company = _get_company(request)
     if not company:
         return HttpResponse('NO_COMPANY', status=400)
 
     route_codes = _parse_route_codes(request)
+    since_version = _parse_since_version(request)
+    if since_version is None:
+        return _cached_file_response(
+            request, company, 'masterdata.zip', route_codes,
+            lambda: _build_masterdata_bundle(company, route_codes),
+            content_type='application/zip',
+        )
 
-    # ── Single DB snapshot for all files ──────────────────────────────────────
-    routes_qs = Route.objects.filter(company=company, is_deleted=False)
-    if route_codes:
-        routes_qs = routes_qs.filter(route_code__in=route_codes)
-    routes = list(
-        routes_qs
-        .select_related('bus_type')
-        .prefetch_related('route_stages__stage')
-        .order_by('route_code')
+    version = device_masterdata.current_version(company.id)
+    changes = _manifest_changes(company, version, route_codes, since_version)
+    if changes is None:
+        changed = set(BUNDLE_FILES)
+    else:
+        changed = set(changes['changed_files']) & set(BUNDLE_FILES)
+    if not changed:
+        response = HttpResponse(status=204)
+        response['X-Masterdata-Version'] = str(version)
+        return response
+
+    return _cached_file_response(
+        request, company, f'masterdata.zip@{since_version}', route_codes,
+        lambda: _build_partial_bundle(company, version, route_codes, changed),
+        content_type='application/zip', filename='masterdata.zip',
     )
 
+
+def _build_masterdata_bundle(company, route_codes):
+    """
+    Zip bytes for get_masterdata_bundle. The member files are cached too,
+    under the same version, so the single-file endpoints hit straight away,
+    and so is the version's manifest.
+    """
+    version = device_masterdata.current_version(company.id)
+
+    # ── Single DB snapshot for all files ──────────────────────────────────────
+    routes       = _get_routes(company, route_codes)
     route_stages = _get_ordered_route_stages(company, route_codes)
     stage_index  = {rs.pk: i for i, rs in enumerate(route_stages, start=0)}
 
@@ -679,22 +806,217 @@ def get_masterdata_bundle(request):
     routelst_bin = _pack_routelst_all(routes)
     stage_bin    = _pack_stagelst_global(route_stages)
     rte_bin      = _pack_rtedat(routes, stage_index)
-    lang_bin     = (
-        _pack_languagedat(route_stages)
-        if any(rs.stage_local_lang for rs in route_stages)
-        else None
+    lang_all_bin = _pack_languagedat(route_stages)
+    lang_bin     = lang_all_bin if any(rs.stage_local_lang for rs in route_stages) else None
+
+    route_files = {
+        'ROUTELST.LST': routelst_bin,
+        'STAGE.LST':    stage_bin,
+        'RTE.DAT':      rte_bin,
+        'LANGUAGE.DAT': lang_all_bin,
+    }
+    device_masterdata.store_files(company.id, version, route_codes, route_files)
+    device_masterdata.store_manifest(
+        company.id, version, route_codes,
+        _build_manifest(company, version, route_codes, route_files),
     )
 
-    # ── Pack into ZIP (ZIP_STORED = no compression, device reads raw bytes) ────
+    return _zip_files({
+        'ROUTELST.LST': routelst_bin,
+        'STAGE.LST':    stage_bin,
+        'RTE.DAT':      rte_bin,
+        'LANGUAGE.DAT': lang_bin,
+    })
+
+
+def _zip_files(files):
+    """ZIP_STORED (no compression, device reads raw bytes); None entries are left out."""
     buf = io.BytesIO()
     with zipfile.ZipFile(buf, 'w', zipfile.ZIP_STORED) as zf:
-        zf.writestr('ROUTELST.LST', routelst_bin)
-        zf.writestr('STAGE.LST',    stage_bin)
-        zf.writestr('RTE.DAT',      rte_bin)
-        if lang_bin:
-            zf.writestr('LANGUAGE.DAT', lang_bin)
-    buf.seek(0)
-
-    response = HttpResponse(buf.read(), content_type='application/zip')
-    response['Content-Disposition'] = 'attachment; filename="masterdata.zip"'
-    return response
\ No newline at end of file
+        for name, data in files.items():
+            if data is not None:
+                zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def _build_partial_bundle(company, version, route_codes, names):
+    """ZIP of just `names` out of the bundle, in the bundle's own file order."""
+    files = _current_files(company, version, route_codes)
+    lang_bin = files['LANGUAGE.DAT']
+    if not any(lang_bin):
+        files['LANGUAGE.DAT'] = None  # same rule as the full bundle
+    return _zip_files({name: files[name] for name in BUNDLE_FILES if name in names})
+
+
+# ─── Manifest / delta sync ─────────────────────────────────────────────────────
+# A device keeps the X-Masterdata-Version of its last sync and asks
+#   GET /device/manifest?since_version=<that>
+# The answer names the files whose content changed since that version (and,
+# for the route-scoped files, which routes); everything else is skipped.
+# RTE.DAT addresses stages by their position in the whole STAGE.LST, so a
+# changed route still means re-downloading the route files as a set —
+# changed_routes tells the device what changed, not a patch to apply.
+
+BUNDLE_FILES = ('ROUTELST.LST', 'STAGE.LST', 'RTE.DAT', 'LANGUAGE.DAT')
+COMPANY_FILES = ('CURRENCY.DAT', 'CREW.DAT', 'VEHICLE.DAT', 'EXPENSEDET.DAT')
+
+_COMPANY_FILE_BUILDERS = {
+    'CURRENCY.DAT':   _build_currencydat,
+    'CREW.DAT':       _build_crewdat,
+    'VEHICLE.DAT':    _build_vehicledat,
+    'EXPENSEDET.DAT': _build_expensedet,
+}
+
+
+def _parse_since_version(request):
+    """Optional ?since_version=<int>; None if absent or malformed."""
+    try:
+        return int(request.GET['since_version'])
+    except (KeyError, ValueError):
+        return None
+
+
+def _current_files(company, version, route_codes, route_files=None):
+    """
+    {name: bytes} of every device file for this version. Route files come
+    from (or build) the bundle so they share one DB snapshot, unless the
+    bundle passes in the ones it just built; company-wide files ignore
+    route_codes.
+    """
+    files = {}
+    for name, build in _COMPANY_FILE_BUILDERS.items():
+        files[name] = device_masterdata.get_file(company.id, version, name, None, lambda: build(company))
+    if route_files is not None:
+        return {**route_files, **files}
+
+    device_masterdata.get_file(
+        company.id, version, 'masterdata.zip', route_codes,
+        lambda: _build_masterdata_bundle(company, route_codes),
+    )
+    bundle = {name: device_masterdata.peek_file(company.id, version, name, route_codes)
+              for name in BUNDLE_FILES}
+    if any(data is None for data in bundle.values()):
+        # Member entries evicted while the zip survived — rebuild them.
+        _build_masterdata_bundle(company, route_codes)
+        bundle = {name: device_masterdata.peek_file(company.id, version, name, route_codes)
+                  for name in BUNDLE_FILES}
+    return {**bundle, **files}
+
+
+def _route_digests(company, route_codes):
+    """
+    {route_code: sha256} over everything a route contributes to the
+    route files — its ROUTELST record, stage names / distances / local
+    names and fare list.
+    """
+    routes = _get_routes(company, route_codes)
+    fares_by_route = _fares_by_route(routes)
+    digests = {}
+    for route in routes:
+        rs_list = sorted(route.route_stages.all(), key=lambda rs: rs.sequence_no)
+        h = hashlib.sha256(_pack_routelst(route))
+        h.update(_pack_stagelst_global(rs_list))
+        h.update(_pack_languagedat(rs_list))
+        fares = fares_by_route[route.pk]
+        h.update(struct.pack(f'<{len(fares)}f', *fares))
+        digests[route.route_code] = h.hexdigest()
+    return digests
+
+
+def _build_manifest(company, version, route_codes, route_files=None):
+    files = _current_files(company, version, route_codes, route_files)
+    if route_files is None:
+        # Building the bundle just now stored this version's manifest too.
+        stored = device_masterdata.peek_file(company.id, version, 'manifest', route_codes)
+        if stored is not None:
+            return stored
+    return {
+        'version': version,
+        'files': {
+            name: {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+            for name, data in files.items()
+        },
+        'routes': _route_digests(company, route_codes),
+    }
+
+
+def _get_manifest(company, version, route_codes):
+    return device_masterdata.get_file(
+        company.id, version, 'manifest', route_codes,
+        lambda: _build_manifest(company, version, route_codes),
+        timeout=device_masterdata.MANIFEST_TTL,
+    )
+
+
+def _manifest_changes(company, version, route_codes, since_version):
+    """
+    What changed between since_version and version, or None when the
+    older manifest is no longer known (the device must take everything).
+    """
+    # Built (and kept) even when the answer is None, so that the version
+    # the device downloads now can serve as its next baseline.
+    new = _get_manifest(company, version, route_codes)
+    if since_version == version:
+        return {'changed_files': [], 'changed_routes': [], 'removed_routes': []}
+    old = device_masterdata.peek_file(company.id, since_version, 'manifest', route_codes)
+    if old is None:
+        return None
+    return {
+        'changed_files': [
+            name for name, meta in new['files'].items()
+            if old['files'].get(name, {}).get('sha256') != meta['sha256']
+        ],
+        'changed_routes': sorted(
+            code for code, digest in new['routes'].items() if old['routes'].get(code) != digest
+        ),
+        'removed_routes': sorted(set(old['routes']) - set(new['routes'])),
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, LicensePermission])
+def get_manifest(request):
+    """
+    GET /device/manifest[?route_codes=R01,R02][&since_version=N]
+    Returns JSON:
+      version — current company master-data version (also sent as
+                X-Masterdata-Version on every file download)
+      files   — {file name: {sha256, size}} for ROUTELST.LST, STAGE.LST,
+                RTE.DAT, LANGUAGE.DAT, CURRENCY.DAT, CREW.DAT, VEHICLE.DAT,
+                EXPENSEDET.DAT
+      routes  — {route_code: sha256} of each route's share of the route files
+
+    With since_version, additionally:
+      full            — true when that version's manifest has expired;
+                        treat every file as changed
+      changed_files   — files whose content differs; skip all others
+      changed_routes  — routes added or changed
+      removed_routes  — routes no longer present
+
+    The manifest is built once per version, together with the files it
+    describes.
+    """
+    company = _get_company(request)
+    if not company:
+        return JsonResponse({'message': 'No company associated with this account'}, status=400)
+
+    route_codes = _parse_route_codes(request)
+    version = device_masterdata.current_version(company.id)
+    payload = dict(_get_manifest(company, version, route_codes))
+
+    since_version = _parse_since_version(request)
+    if since_version is not None:
+        changes = _manifest_changes(company, version, route_codes, since_version)
+        payload['since_version'] = since_version
+        payload['full'] = changes is None
+        if changes is None:
+            changes = {
+                'changed_files':  list(payload['files']),
+                'changed_routes': sorted(payload['routes']),
+                'removed_routes': [],
+            }
+        payload.update(changes)
+
+    response = JsonResponse(payload)
+    response['X-Masterdata-Version'] = str(version)
+    return response
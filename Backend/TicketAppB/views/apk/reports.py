@@ -1,14 +1,24 @@
 import datetime
 from rest_framework.response import Response
-from django.db.models import Q, Sum, Count
-from rest_framework.decorators import api_view, permission_classes
+from django.db.models import Sum, Count
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
+from django.views.decorators.gzip import gzip_page
 from rest_framework.permissions import IsAuthenticated
-from ...models import TransactionData, TripData, ScheduleData, Stage, ExpenseData, Route, RouteStage, VehicleType, AggregatorTransaction
+from ...models import (
+    TransactionData, TripData, ScheduleData, Stage, ExpenseData, Route, RouteStage, VehicleType, AggregatorTransaction,
+    DailyBusRevenue, DailyCompanyRevenue,
+)
 from ...permissions import LicensePermission
+from ...trip_report_cache import cached_trip_fragment
+from ...columnar import ColumnarJSONRenderer
 from ..utils import _meets_tier, _TIER_ERROR
 
 PAYMENT_LABELS = {'Cash': 'Cash', 'UPI': 'UPI', 'Card': 'Card'}
 
+# The row-list reports below are gzip-negotiated and also answer
+# ?format=columnar (see columnar.py).
+
 
 # GET /apk/buses
 # Returns all active bus registration numbers for the company.
@@ -28,8 +38,10 @@ def apk_bus_list(request):
 # GET /apk/schedules
 # Returns schedule numbers (with open/closed status) for a bus on a date.
 # Params: bus_no, date (YYYY-MM-DD)
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def apk_schedules(request):
     user = request.user
 
@@ -83,75 +95,24 @@ def apk_dashboard(request):
     company = user.company
     anchor = datetime.date.fromisoformat(date_str)
 
-    # ── Revenue header: closed trips from TripData + open trips from TransactionData ──
-    closed_day = TripData.objects.filter(
-        company_code=company,
-        start_date=date_str,
-        is_closed=True,
-    ).aggregate(total=Sum('total_collection'), upi=Sum('upi_ticket_amount'))
-
-    # Current: keyed on ticket_date (day money was actually collected)
-    # open_day = TransactionData.objects.filter(
-    #     company_code=company,
-    #     ticket_date=date_str,
-    #     trip_id__is_closed=False,
-    # ).aggregate(
-    #     total=Sum('ticket_amount'),
-    #     upi=Sum('ticket_amount', filter=Q(ticket_status='UPI')),
-    # )
-
-    # Alternate: keyed on the schedule's own start_date (same gate as bus status below)
-    open_day = TransactionData.objects.filter(
-        company_code=company,
-        schedule_id__start_date=date_str,
-        trip_id__is_closed=False,
-    ).aggregate(
-        total=Sum('ticket_amount'),
-        upi=Sum('ticket_amount', filter=Q(ticket_status='UPI')),
-    )
-
-    total_revenue = (closed_day['total'] or 0) + (open_day['total'] or 0)
-    total_upi = (closed_day['upi'] or 0) + (open_day['upi'] or 0)
+    # ── Revenue header: DailyCompanyRevenue (tickets keyed on ticket_date) ───
+    day = DailyCompanyRevenue.objects.filter(
+        company=company,
+        date=date_str,
+    ).values('collection', 'upi_amount').first() or {}
 
-    # ── Per-bus revenue: closed from TripData, open from TransactionData ──────
-    closed_bus_rows = {
-        row['bus_no']: row
-        for row in TripData.objects.filter(
-            company_code=company,
-            start_date=date_str,
-            is_closed=True,
-            bus_no__isnull=False,
-        ).values('bus_no').annotate(
-            revenue=Sum('total_collection'),
-            upi_amt=Sum('upi_ticket_amount'),
-        )
-    }
+    total_revenue = day.get('collection') or 0
+    total_upi = day.get('upi_amount') or 0
 
-    # Current: keyed on ticket_date
-    # open_bus_rows = {
-    #     row['bus_no']: row
-    #     for row in TransactionData.objects.filter(
-    #         company_code=company,
-    #         ticket_date=date_str,
-    #         trip_id__is_closed=False,
-    #         bus_no__isnull=False,
-    #     ).values('bus_no').annotate(
-    #         revenue=Sum('ticket_amount'),
-    #         upi_amt=Sum('ticket_amount', filter=Q(ticket_status='UPI')),
-    #     )
-    # }
-
-    # Alternate: keyed on the schedule's own start_date
-    open_bus_rows = {
+    # ── Per-bus revenue: DailyBusRevenue, summed over routes ─────────────────
+    bus_rows = {
         row['bus_no']: row
-        for row in TransactionData.objects.filter(
-            company_code=company,
-            schedule_id__start_date=date_str,
-            trip_id__is_closed=False,
-            bus_no__isnull=False,
+        for row in DailyBusRevenue.objects.filter(
+            company=company,
+            date=date_str,
         ).values('bus_no').annotate(
-            revenue=Sum('ticket_amount'),
-            upi_amt=Sum('ticket_amount', filter=Q(ticket_status='UPI')),
+            revenue=Sum('collection'),
+            upi_amt=Sum('upi_amount'),
         )
     }
 
@@ -175,10 +136,9 @@ def apk_dashboard(request):
 
     bus_list = []
     for reg_num in VehicleType.objects.filter(company=company, is_deleted=False).values_list('bus_reg_num', flat=True):
-        closed = closed_bus_rows.get(reg_num, {})
-        open_rev = open_bus_rows.get(reg_num, {})
-        revenue = (closed.get('revenue') or 0) + (open_rev.get('revenue') or 0)
-        upi_amt = (closed.get('upi_amt') or 0) + (open_rev.get('upi_amt') or 0)
+        row = bus_rows.get(reg_num, {})
+        revenue = row.get('revenue') or 0
+        upi_amt = row.get('upi_amt') or 0
         cash_amt = revenue - upi_amt
 
         if reg_num in running_buses:
@@ -196,59 +156,22 @@ def apk_dashboard(request):
             'upi_amt': str(upi_amt),
         })
 
-    # ── Weekly chart (Mon–Sun): closed from TripData + open from TransactionData ──
+    # ── Weekly chart (Mon–Sun): DailyCompanyRevenue, ≤ 7 rows ────────────────
     week_start = anchor - datetime.timedelta(days=anchor.weekday())
     week_end = week_start + datetime.timedelta(days=6)
 
-    closed_weekly = {
-        str(r['start_date']): {'total': r['total'] or 0, 'upi': r['upi'] or 0}
-        for r in TripData.objects.filter(
-            company_code=company,
-            start_date__range=[week_start, week_end],
-            is_closed=True,
-        ).values('start_date').annotate(
-            total=Sum('total_collection'),
-            upi=Sum('upi_ticket_amount'),
-        )
-    }
-
-    # Current: keyed on ticket_date
-    # open_weekly = {
-    #     str(r['ticket_date']): {'total': r['total'] or 0, 'upi': r['upi'] or 0}
-    #     for r in TransactionData.objects.filter(
-    #         company_code=company,
-    #         ticket_date__range=[week_start, week_end],
-    #         trip_id__is_closed=False,
-    #     ).values('ticket_date').annotate(
-    #         total=Sum('ticket_amount'),
-    #         upi=Sum('ticket_amount', filter=Q(ticket_status='UPI')),
-    #     )
-    # }
-
-    # Alternate: keyed on the schedule's own start_date
-    open_weekly = {
-        str(r['schedule_id__start_date']): {'total': r['total'] or 0, 'upi': r['upi'] or 0}
-        for r in TransactionData.objects.filter(
-            company_code=company,
-            schedule_id__start_date__range=[week_start, week_end],
-            trip_id__is_closed=False,
-        ).values('schedule_id__start_date').annotate(
-            total=Sum('ticket_amount'),
-            upi=Sum('ticket_amount', filter=Q(ticket_status='UPI')),
-        )
-    }
-
-    all_week_dates = sorted(set(closed_weekly.keys()) | set(open_weekly.keys()))
-    weekly_chart = []
-    for date in all_week_dates:
-        rev = (closed_weekly.get(date, {}).get('total', 0)) + (open_weekly.get(date, {}).get('total', 0))
-        upi = (closed_weekly.get(date, {}).get('upi', 0)) + (open_weekly.get(date, {}).get('upi', 0))
-        weekly_chart.append({
-            'date': date,
-            'total': str(rev),
-            'cash': str(rev - upi),
-            'upi': str(upi),
-        })
+    weekly_chart = [
+        {
+            'date': str(r['date']),
+            'total': str(r['collection']),
+            'cash': str(r['collection'] - r['upi_amount']),
+            'upi': str(r['upi_amount']),
+        }
+        for r in DailyCompanyRevenue.objects.filter(
+            company=company,
+            date__range=[week_start, week_end],
+        ).order_by('date').values('date', 'collection', 'upi_amount')
+    ]
 
     return Response({
         'date': date_str,
@@ -264,8 +187,10 @@ def apk_dashboard(request):
 # GET /apk/trips
 # Trips for a bus on a specific schedule and date.
 # Params: bus_no, schedule_no, date (YYYY-MM-DD)
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def apk_trips(request):
     user = request.user
 
@@ -300,15 +225,8 @@ def apk_trips(request):
             revenue = t.total_collection or 0
             upi_amt = t.upi_ticket_amount or 0
         else:
-            live = TransactionData.objects.filter(
-                company_code=user.company,
-                trip_id=t,
-            ).aggregate(
-                total=Sum('ticket_amount'),
-                upi=Sum('ticket_amount', filter=Q(ticket_status='UPI')),
-            )
-            revenue = live['total'] or 0
-            upi_amt = live['upi'] or 0
+            revenue = t.live_collection
+            upi_amt = t.live_upi_amount
 
         cash_amt = revenue - upi_amt
         trip_list.append({
@@ -334,8 +252,10 @@ def apk_trips(request):
 # GET /apk/tickets
 # Tickets for a specific trip with passenger type totals.
 # Params: bus_no, schedule_no, trip_no, date (YYYY-MM-DD)
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def apk_tickets(request):
     user = request.user
 
@@ -369,6 +289,20 @@ def apk_tickets(request):
     except TripData.DoesNotExist:
         return Response({'error': 'Trip not found'}, status=404)
 
+    fragment = cached_trip_fragment(trip, 'tickets', lambda: _trip_tickets(user.company, trip))
+
+    return Response({
+        'bus_no': bus_no,
+        'schedule_no': schedule_no,
+        'trip_no': trip_no,
+        'date': date_str,
+        'passenger_totals': fragment['passenger_totals'],
+        'tickets': fragment['tickets'],
+    })
+
+
+def _trip_tickets(company, trip):
+    """Ticket list and passenger totals of one trip (apk_tickets payload)."""
     # Stage map keyed by RouteStage PK — derived from the trip's own route
     stage_map = {}
     if trip.route_id:
@@ -388,7 +322,7 @@ def apk_tickets(request):
     # trip_id already resolves to this exact trip row; all its tickets belong to
     # it regardless of which calendar date they were punched on.
     qs = TransactionData.objects.filter(
-        company_code=user.company,
+        company_code=company,
         trip_id=trip,
     ).order_by('ticket_time')
 
@@ -416,21 +350,16 @@ def apk_tickets(request):
             'lugg_count': t.lugg_count,
         })
 
-    return Response({
-        'bus_no': bus_no,
-        'schedule_no': schedule_no,
-        'trip_no': trip_no,
-        'date': date_str,
-        'passenger_totals': totals,
-        'tickets': ticket_list,
-    })
+    return {'passenger_totals': totals, 'tickets': ticket_list}
 
 
 # GET /apk/passengers
 # Stage-wise boarded/deboarded table for a trip; live header for open trips.
 # Params: bus_no, schedule_no, trip_no, date (YYYY-MM-DD)
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def apk_passengers(request):
     user = request.user
 
@@ -477,48 +406,84 @@ def apk_passengers(request):
         trip_id=trip,
     )
 
-    # Route stages ordered by sequence — derived from the trip's own route
-    route_stages = []
-    if trip.route_id:
-        route_stages = list(
-            RouteStage.objects.filter(route=trip.route_id)
-            .select_related('stage')
-            .order_by('sequence_no')
-        )
-
-    # ── Header ────────────────────────────────────────────────────────────────
+    # ── Header + passenger totals ─────────────────────────────────────────────
+    # Open trips read the live counters maintained at ingest; closed trips
+    # are served from the report cache once built.
     status = 'open' if not trip.is_closed else 'closed'
     if status == 'open':
-        last_ticket = qs.order_by('-ticket_time').values('to_stage_id_id', 'passenger_count').first()
-        if last_ticket and last_ticket['to_stage_id_id']:
-            try:
-                rs = RouteStage.objects.select_related('stage').get(id=last_ticket['to_stage_id_id'])
-                current_stage = rs.stage.stage_name
-            except RouteStage.DoesNotExist:
-                current_stage = None
-        else:
-            current_stage = None
-        passengers_in_bus = last_ticket['passenger_count'] if last_ticket else None
-
-        live = qs.aggregate(
-            total=Sum('ticket_amount'),
-            upi=Sum('ticket_amount', filter=Q(ticket_status='UPI')),
-        )
-        total_collection = live['total'] or 0
+        route_stages = _route_stages(trip)
+        current_stage = None
+        if trip.last_to_stage_id_id:
+            current_stage = next(
+                (rs.stage.stage_name for rs in route_stages if rs.id == trip.last_to_stage_id_id),
+                None,
+            )
+            if current_stage is None:
+                # Last ticket's stage isn't on the trip's current route
+                current_stage = (
+                    RouteStage.objects.filter(id=trip.last_to_stage_id_id)
+                    .values_list('stage__stage_name', flat=True).first()
+                )
+        passengers_in_bus = trip.last_passenger_count
+        total_collection = trip.live_collection
+
+        passenger_totals = {
+            'full': trip.live_full_count, 'half': trip.live_half_count,
+            'st': trip.live_st_count, 'phy': trip.live_phy_count,
+            'lugg': trip.live_lugg_count, 'ladies': trip.live_ladies_count,
+            'senior': trip.live_senior_count,
+        }
+        stage_table = _stage_table(qs, route_stages)
     else:
         current_stage = None
         passengers_in_bus = None
         total_collection = trip.total_collection or 0
 
-    # ── Passenger totals ──────────────────────────────────────────────────────
-    agg = qs.aggregate(
-        full=Sum('full_count'), half=Sum('half_count'),
-        st=Sum('st_count'), phy=Sum('phy_count'),
-        lugg=Sum('lugg_count'), ladies=Sum('ladies_count'), senior=Sum('senior_count'),
+        def build():
+            agg = qs.aggregate(
+                full=Sum('full_count'), half=Sum('half_count'),
+                st=Sum('st_count'), phy=Sum('phy_count'),
+                lugg=Sum('lugg_count'), ladies=Sum('ladies_count'), senior=Sum('senior_count'),
+            )
+            return {
+                'passenger_totals': {k: v or 0 for k, v in agg.items()},
+                'stage_table': _stage_table(qs, _route_stages(trip)),
+            }
+
+        fragment = cached_trip_fragment(trip, 'passengers', build)
+        passenger_totals = fragment['passenger_totals']
+        stage_table = fragment['stage_table']
+
+    return Response({
+        'bus_no': bus_no,
+        'schedule_no': schedule_no,
+        'trip_no': trip_no,
+        'date': date_str,
+        'header': {
+            'status': status,
+            'current_stage': current_stage,
+            'passengers_in_bus': passengers_in_bus,
+            'total_collection': str(total_collection),
+        },
+        'passenger_totals': passenger_totals,
+        'stage_table': stage_table,
+    })
+
+
+def _route_stages(trip):
+    """Route stages ordered by sequence — derived from the trip's own route."""
+    if not trip.route_id:
+        return []
+    return list(
+        RouteStage.objects.filter(route=trip.route_id)
+        .select_related('stage')
+        .order_by('sequence_no')
     )
-    passenger_totals = {k: v or 0 for k, v in agg.items()}
 
-    # ── Stage table: keyed by RouteStage PK (from_stage_id_id / to_stage_id_id) ──
+
+def _stage_table(qs, route_stages):
+    """Stage-wise boarded/deboarded counts of the tickets in `qs`."""
+    # Keyed by RouteStage PK (from_stage_id_id / to_stage_id_id)
     empty = {'f': 0, 'h': 0, 'st': 0, 'ph': 0}
 
     boarded = {
@@ -546,7 +511,7 @@ def apk_passengers(request):
     }
 
     if route_stages:
-        stage_table = [
+        return [
             {
                 'stage_name': rs.stage.stage_name,
                 'boarded': boarded.get(rs.id, empty),
@@ -554,39 +519,26 @@ def apk_passengers(request):
             }
             for rs in route_stages
         ]
-    else:
-        # No route linked — fall back to raw stage IDs
-        all_ids = sorted(set(boarded.keys()) | set(deboarded.keys()))
-        stage_table = [
-            {
-                'stage_name': str(sid),
-                'boarded': boarded.get(sid, empty),
-                'deboarded': deboarded.get(sid, empty),
-            }
-            for sid in all_ids
-        ]
 
-    return Response({
-        'bus_no': bus_no,
-        'schedule_no': schedule_no,
-        'trip_no': trip_no,
-        'date': date_str,
-        'header': {
-            'status': status,
-            'current_stage': current_stage,
-            'passengers_in_bus': passengers_in_bus,
-            'total_collection': str(total_collection),
-        },
-        'passenger_totals': passenger_totals,
-        'stage_table': stage_table,
-    })
+    # No route linked — fall back to raw stage IDs
+    all_ids = sorted(set(boarded.keys()) | set(deboarded.keys()))
+    return [
+        {
+            'stage_name': str(sid),
+            'boarded': boarded.get(sid, empty),
+            'deboarded': deboarded.get(sid, empty),
+        }
+        for sid in all_ids
+    ]
 
 
 # GET /reports/duty
 # Duty report: all closed trips for a bus on a date, with crew and ticket range.
 # Params: bus_no, date (YYYY-MM-DD)
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def duty_report(request):
     user = request.user
     if not _meets_tier(user, 'intermediate'):
@@ -604,7 +556,8 @@ def duty_report(request):
         company_code=user.company,
     ).order_by('trip_no').values(
         'id', 'trip_no', 'start_time', 'start_ticket_no', 'end_ticket_no',
-        'total_collection', 'is_closed', 'driver', 'conductor'
+        'total_collection', 'is_closed', 'driver', 'conductor',
+        'live_collection', 'last_ticket_no',
     )
 
     driver_name = None
@@ -633,16 +586,8 @@ def duty_report(request):
             #     ticket_date=date_str,
             # ).order_by('-ticket_time').values_list('ticket_number', flat=True).first()
 
-            live = TransactionData.objects.filter(
-                company_code=user.company,
-                trip_id=t['id'],
-            ).aggregate(live_collection=Sum('ticket_amount'))
-            last_ticket = TransactionData.objects.filter(
-                company_code=user.company,
-                trip_id=t['id'],
-            ).order_by('-ticket_time').values_list('ticket_number', flat=True).first()
-            end_ticket = last_ticket
-            collection = str(live['live_collection'] or '0.00')
+            end_ticket = t['last_ticket_no']
+            collection = str(t['live_collection'])
 
         trip_list.append({
             'trip_no': t['trip_no'],
@@ -664,8 +609,10 @@ def duty_report(request):
 # GET /reports/bus-summary
 # Per-date revenue and distance for a bus over a date range.
 # Params: bus_no, from_date (YYYY-MM-DD), to_date (YYYY-MM-DD)
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def bus_summary_report(request):
     user = request.user
     if not _meets_tier(user, 'intermediate'):
@@ -678,30 +625,20 @@ def bus_summary_report(request):
     if not bus_no or not from_date or not to_date:
         return Response({'error': 'bus_no, from_date and to_date are required'}, status=400)
 
-    closed_qs = TripData.objects.filter(
-        company_code=user.company,
-        bus_no=bus_no,
-        start_date__range=[from_date, to_date],
-        is_closed=True,
-    ).values('start_date').annotate(
-        revenue=Sum('total_collection'),
-        distance=Sum('total_km'),
-    )
-    closed_map = {
-        str(r['start_date']): {'revenue': r['revenue'] or 0, 'distance': r['distance'] or 0}
-        for r in closed_qs
-    }
-
-    open_revenue = {
-        str(r['ticket_date']): r['collection'] or 0
-        for r in TransactionData.objects.filter(
-            company_code=user.company,
+    # Revenue by ticket date and closed-trip km by trip start date
+    summary_map = {
+        str(r['date']): {'revenue': r['revenue'] or 0, 'distance': r['distance'] or 0}
+        for r in DailyBusRevenue.objects.filter(
+            company=user.company,
             bus_no=bus_no,
-            ticket_date__range=[from_date, to_date],
-            trip_id__is_closed=False,
-        ).values('ticket_date').annotate(collection=Sum('ticket_amount'))
+            date__range=[from_date, to_date],
+        ).values('date').annotate(
+            revenue=Sum('collection'),
+            distance=Sum('total_km'),
+        )
     }
 
+    # Open trips: distance to the last ticket's destination stage (live counter)
     open_distance = {}
     for trip in TripData.objects.filter(
         company_code=user.company,
@@ -709,26 +646,18 @@ def bus_summary_report(request):
         start_date__range=[from_date, to_date],
         is_closed=False,
         route_id__isnull=False,
-    ).select_related('route_id'):
-        last = TransactionData.objects.filter(
-            company_code=user.company,
-            trip_id=trip,
-        ).order_by('-ticket_time').values('to_stage_id_id').first()
-        if last and last['to_stage_id_id'] is not None:
-            try:
-                rs = RouteStage.objects.get(id=last['to_stage_id_id'])
-                date_key = str(trip.start_date)
-                open_distance[date_key] = open_distance.get(date_key, 0) + (rs.distance or 0)
-            except RouteStage.DoesNotExist:
-                pass
-
-    all_dates = sorted(set(closed_map.keys()) | set(open_revenue.keys()) | set(open_distance.keys()))
+        last_to_stage_id__isnull=False,
+    ).values('start_date', 'last_to_stage_id__distance'):
+        date_key = str(trip['start_date'])
+        open_distance[date_key] = open_distance.get(date_key, 0) + (trip['last_to_stage_id__distance'] or 0)
+
+    all_dates = sorted(set(summary_map.keys()) | set(open_distance.keys()))
 
     rows = [
         {
             'date': date,
-            'revenue': str((closed_map.get(date, {}).get('revenue', 0)) + open_revenue.get(date, 0)),
-            'distance': str((closed_map.get(date, {}).get('distance', 0)) + open_distance.get(date, 0)),
+            'revenue': str(summary_map.get(date, {}).get('revenue', 0)),
+            'distance': str((summary_map.get(date, {}).get('distance', 0)) + open_distance.get(date, 0)),
         }
         for date in all_dates
     ]
@@ -740,8 +669,10 @@ def bus_summary_report(request):
 # Per-date cash/UPI breakdown for a bus over a date range.
 # Params: bus_no, from_date (YYYY-MM-DD), to_date (YYYY-MM-DD),
 #         payment_mode (cash | upi) — optional, returns both if omitted
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def payment_type_report(request):
     user = request.user
     if not _meets_tier(user, 'intermediate'):
@@ -758,45 +689,20 @@ def payment_type_report(request):
     want_cash = payment_mode in ('', 'cash')
     want_upi = payment_mode in ('', 'upi')
 
-    closed_map = {}
-    for r in TripData.objects.filter(
-        company_code=user.company,
-        bus_no=bus_no,
-        start_date__range=[from_date, to_date],
-        is_closed=True,
-    ).values('start_date').annotate(
-        total=Sum('total_collection'),
-        upi=Sum('upi_ticket_amount'),
-    ):
-        date = str(r['start_date'])
-        upi = r['upi'] or 0
-        total = r['total'] or 0
-        closed_map[date] = {'cash': total - upi, 'upi': upi}
-
-    open_map = {}
-    for r in TransactionData.objects.filter(
-        company_code=user.company,
-        bus_no=bus_no,
-        ticket_date__range=[from_date, to_date],
-        trip_id__is_closed=False,
-        ticket_status__in=['Cash', 'UPI'],
-    ).values('ticket_date', 'ticket_status').annotate(amount=Sum('ticket_amount')):
-        date = str(r['ticket_date'])
-        if date not in open_map:
-            open_map[date] = {'cash': 0, 'upi': 0}
-        if r['ticket_status'] == 'Cash':
-            open_map[date]['cash'] += r['amount'] or 0
-        else:
-            open_map[date]['upi'] += r['amount'] or 0
-
-    all_dates = sorted(set(closed_map.keys()) | set(open_map.keys()))
-
     rows = []
     total_cash = 0
     total_upi = 0
-    for date in all_dates:
-        cash = closed_map.get(date, {}).get('cash', 0) + open_map.get(date, {}).get('cash', 0)
-        upi = closed_map.get(date, {}).get('upi', 0) + open_map.get(date, {}).get('upi', 0)
+    for r in DailyBusRevenue.objects.filter(
+        company=user.company,
+        bus_no=bus_no,
+        date__range=[from_date, to_date],
+    ).values('date').annotate(
+        cash=Sum('cash_amount'),
+        upi=Sum('upi_amount'),
+    ).order_by('date'):
+        date = str(r['date'])
+        cash = r['cash'] or 0
+        upi = r['upi'] or 0
         total_cash += cash
         total_upi += upi
         row = {'date': date}
@@ -818,8 +724,10 @@ def payment_type_report(request):
 # GET /reports/farewise
 # Fare-wise ticket count/revenue and per-trip passenger counts for a date range.
 # Params: bus_no, from_date (YYYY-MM-DD), to_date (YYYY-MM-DD)
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def farewise_report(request):
     user = request.user
     if not _meets_tier(user, 'intermediate'):
@@ -854,18 +762,6 @@ def farewise_report(request):
         start_date__range=[from_date, to_date],
     ).order_by('start_date', 'trip_no')
 
-    open_trip_ids = [t.id for t in trips if not t.is_closed]
-    open_agg = {}
-    if open_trip_ids:
-        for row in TransactionData.objects.filter(
-            trip_id__in=open_trip_ids,
-        ).values('trip_id').annotate(
-            full=Sum('full_count'), half=Sum('half_count'),
-            st=Sum('st_count'), phy=Sum('phy_count'),
-            lugg=Sum('lugg_count'), ladies=Sum('ladies_count'), senior=Sum('senior_count'),
-        ):
-            open_agg[row['trip_id']] = row
-
     passenger_counts = []
     for t in trips:
         if t.is_closed:
@@ -882,18 +778,17 @@ def farewise_report(request):
                 'senior': t.senior_count or 0,
             })
         else:
-            agg = open_agg.get(t.id, {})
             passenger_counts.append({
                 'trip_no': t.trip_no,
                 'date': str(t.start_date),
-                'full': agg.get('full') or 0,
-                'half': agg.get('half') or 0,
-                'st': agg.get('st') or 0,
-                'phy': agg.get('phy') or 0,
-                'lugg': agg.get('lugg') or 0,
+                'full': t.live_full_count,
+                'half': t.live_half_count,
+                'st': t.live_st_count,
+                'phy': t.live_phy_count,
+                'lugg': t.live_lugg_count,
                 'pass': 0,
-                'ladies': agg.get('ladies') or 0,
-                'senior': agg.get('senior') or 0,
+                'ladies': t.live_ladies_count,
+                'senior': t.live_senior_count,
             })
 
     return Response({
@@ -905,8 +800,10 @@ def farewise_report(request):
 # GET /reports/expense
 # Returns expense data for a bus over a date range.
 # Params: bus_no, from_date (YYYY-MM-DD), to_date (YYYY-MM-DD)
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def expense_report(request):
     user = request.user
     if not _meets_tier(user, 'intermediate'):
@@ -919,29 +816,14 @@ def expense_report(request):
     if not bus_no or not from_date or not to_date:
         return Response({'error': 'bus_no, from_date and to_date are required'}, status=400)
 
-    closed_revenue = {
-        str(r['start_date']): r['collection'] or 0
-        for r in TripData.objects.filter(
-            company_code=user.company,
-            bus_no=bus_no,
-            start_date__range=[from_date, to_date],
-            is_closed=True,
-        ).values('start_date').annotate(collection=Sum('total_collection'))
-    }
-
-    open_revenue = {
-        str(r['ticket_date']): r['collection'] or 0
-        for r in TransactionData.objects.filter(
-            company_code=user.company,
-            bus_no=bus_no,
-            ticket_date__range=[from_date, to_date],
-            trip_id__is_closed=False,
-        ).values('ticket_date').annotate(collection=Sum('ticket_amount'))
-    }
-
     revenue_map = {
-        date: closed_revenue.get(date, 0) + open_revenue.get(date, 0)
-        for date in set(closed_revenue.keys()) | set(open_revenue.keys())
+        str(r['date']): r['collection'] or 0
+        for r in DailyBusRevenue.objects.filter(
+            company=user.company,
+            bus_no=bus_no,
+            date__range=[from_date, to_date],
+        ).values('date').annotate(collection=Sum('collection'))
+        if r['collection']
     }
 
     expense_map = {
@@ -970,8 +852,10 @@ def expense_report(request):
 # GET /reports/aggregator-transactions
 # Payment aggregator transaction posting data for the company on a given date.
 # Params: date (YYYY-MM-DD)
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def aggregator_transaction_report(request):
     user = request.user
     date_str = request.GET.get('date')
@@ -7,9 +7,11 @@ from django.http import HttpResponse
 from django.utils.timezone import make_aware
 from django.views.decorators.csrf import csrf_exempt
 
-from ...models import RawDataLog, OdometerData, ExpenseData, Employee, VehicleType, TripData, ScheduleData, ExpenseMaster
+from ...models import RawDataLog, OdometerData, ExpenseData, TripData, ScheduleData, TransactionData
+from ...master_snapshot import employee_pk_by_name, vehicle_pk, expense_master_pk
+from ...trip_identity import latest_on_or_before
 from ...tasks import (
-    process_transaction_data,
+    process_transaction_data, process_transaction_batch,
     process_trip_open_data, process_trip_close_data, process_trip_close_summary_data,
     process_schedule_open_data, process_schedule_close_data, process_schedule_close_summary_data,
 )
@@ -27,25 +29,33 @@ log_expense          = logging.getLogger('ticket.palmtec.expense')
 
 
 def _resolve_trip_by_palmtec(palmtec_id, company, trip_no, record_date):
+    """TripData pk of the latest trip started on or before record_date."""
     if not trip_no or not record_date:
         return None
-    return TripData.objects.filter(
-        palmtec_id=palmtec_id,
-        company_code=company,
-        trip_no=trip_no,
-        start_date__lte=record_date,
-    ).order_by('-start_date').first()
+    return latest_on_or_before(
+        'trip', company.pk, palmtec_id, trip_no, record_date,
+        lambda: TripData.objects.filter(
+            palmtec_id=palmtec_id,
+            company_code=company,
+            trip_no=trip_no,
+            start_date__lte=record_date,
+        ).order_by('-start_date').values_list('pk', flat=True).first(),
+    )
 
 
 def _resolve_schedule_by_palmtec(palmtec_id, company, schedule_no, record_date):
+    """ScheduleData pk of the latest schedule started on or before record_date."""
     if not schedule_no or not record_date:
         return None
-    return ScheduleData.objects.filter(
-        palmtec_id=palmtec_id,
-        company_code=company,
-        schedule_no=schedule_no,
-        start_date__lte=record_date,
-    ).order_by('-start_date').first()
+    return latest_on_or_before(
+        'schedule', company.pk, palmtec_id, schedule_no, record_date,
+        lambda: ScheduleData.objects.filter(
+            palmtec_id=palmtec_id,
+            company_code=company,
+            schedule_no=schedule_no,
+            start_date__lte=record_date,
+        ).order_by('-start_date').values_list('pk', flat=True).first(),
+    )
 
 
 @csrf_exempt
@@ -180,6 +190,93 @@ def getTicketDataFromDevice(request):
         return HttpResponse("ERROR", status=500, content_type="text/plain")
 
 
+# Upper bound on frames per getTicketBatch request. Keeps a single request
+# (one INSERT, one task) bounded; devices with a bigger backlog send several.
+_MAX_BATCH_FRAMES = 500
+
+
+@csrf_exempt
+def getTicketBatchFromDevice(request):
+    # Body: one Ticket|...| frame per line, each carrying its own checksum
+    # computed exactly as for getTicket (endpoint string 'getTicket').
+    # Response: one ack per line, in the same order as the frames:
+    #   OK#SUCCESS#fn=<unique_code>#    queued for processing
+    #   OK#DUPLICATE#fn=<unique_code>#  already stored / repeated in this batch
+    #   INVALID_CHECKSUM | MISSING_DATA | INVALID | INVALID_COMPANY
+    if request.method != "POST":
+        return HttpResponse("METHOD_NOT_ALLOWED", status=405, content_type="text/plain")
+
+    frames = [f.strip() for f in request.body.decode('utf-8', errors='replace').splitlines() if f.strip()]
+    if not frames:
+        return HttpResponse("NO_DATA", status=400, content_type="text/plain")
+    if len(frames) > _MAX_BATCH_FRAMES:
+        return HttpResponse("BATCH_TOO_LARGE", status=413, content_type="text/plain")
+
+    log_ticket.debug("RECV batch frames=%d", len(frames))
+
+    acks      = [None] * len(frames)
+    accepted  = []   # (index, raw, parts, company_instance)
+    companies = {}
+    try:
+        for i, raw in enumerate(frames):
+            parts = raw.split("|")
+            if len(parts) < 48:
+                acks[i] = "MISSING_DATA"
+                continue
+            if parts[0] != 'Ticket':
+                acks[i] = "INVALID"
+                continue
+            if not _validate_checksum('getTicket', raw):
+                acks[i] = "INVALID_CHECKSUM"
+                continue
+            license_code = parts[46]
+            if license_code not in companies:
+                companies[license_code] = _get_company_for_palmtec(license_code) if license_code else None
+            if not companies[license_code]:
+                acks[i] = "INVALID_COMPANY"
+                continue
+            accepted.append((i, raw, parts, companies[license_code]))
+
+        # Replayed backlog: drop frames already stored as tickets (one query),
+        # and frames repeated within this same batch.
+        stored = set()
+        keyed  = [(p[2], p[1]) for _, _, p, _ in accepted if p[1]]
+        if keyed:
+            stored = set(TransactionData.objects.filter(
+                palmtec_id__in  = {k[0] for k in keyed},
+                unique_code__in = {k[1] for k in keyed},
+            ).values_list('palmtec_id', 'unique_code'))
+
+        logs = []
+        for i, raw, parts, company_instance in accepted:
+            key = (parts[2], parts[1])
+            if parts[1] and key in stored:
+                acks[i] = f'OK#DUPLICATE#fn={parts[1]}#'
+                continue
+            stored.add(key)
+            acks[i] = f'OK#SUCCESS#fn={parts[1]}#'
+            logs.append(RawDataLog(
+                raw_payload  = raw,
+                company_code = company_instance,
+                source       = RawDataLog.typeChoices.TRANSACTION,
+            ))
+
+        if logs:
+            with transaction.atomic():
+                logs = RawDataLog.objects.bulk_create(logs)
+                # MariaDB 10.5+ returns PKs from bulk INSERT. Without them the
+                # rows stay PENDING and scan_pending_raw_logs picks them up.
+                log_ids = [log.id for log in logs if log.id]
+                if log_ids:
+                    transaction.on_commit(lambda: process_transaction_batch.delay(log_ids))
+
+        return HttpResponse("\n".join(acks), content_type="text/plain", status=200)
+
+    except Exception as e:
+        log_ticket.exception("TicketBatch failed frames=%d err=%s", len(frames), e)
+        return HttpResponse("ERROR", status=500, content_type="text/plain")
+
+
 
 @csrf_exempt
 def getScheduleCloseDataFromDevice(request):
@@ -392,16 +489,16 @@ def getOdometerDataFromDevice(request):
 
         errors = []
 
-        driver_instance = None
+        driver_pk = None
         if _p(10):
-            driver_instance = Employee.objects.filter(employee_name=_p(10), company=company_instance).first()
-            if not driver_instance:
+            driver_pk = employee_pk_by_name(company_instance.pk, _p(10))
+            if not driver_pk:
                 errors.append(f"driver not matched: {_p(10)}")
 
-        bus_instance = None
+        bus_pk = None
         if _p(11):
-            bus_instance = VehicleType.objects.filter(bus_reg_num=_p(11), company=company_instance).first()
-            if not bus_instance:
+            bus_pk = vehicle_pk(company_instance.pk, _p(11), include_deleted=True)
+            if not bus_pk:
                 errors.append(f"bus not matched: {_p(11)}")
 
         start_date     = datetime.strptime(_p(6), "%Y-%m-%d").date() if _p(6) else None
@@ -414,8 +511,8 @@ def getOdometerDataFromDevice(request):
         schedule_no = int(_p(4)) if _p(4) else None
         trip_no     = int(_p(5)) if _p(5) else None
 
-        trip_obj     = _resolve_trip_by_palmtec(_p(2), company_instance, trip_no, start_date)
-        schedule_obj = _resolve_schedule_by_palmtec(_p(2), company_instance, schedule_no, start_date)
+        trip_pk      = _resolve_trip_by_palmtec(_p(2), company_instance, trip_no, start_date)
+        schedule_pk  = _resolve_schedule_by_palmtec(_p(2), company_instance, schedule_no, start_date)
 
         OdometerData.objects.create(
             unique_code    = _p(1),
@@ -423,8 +520,8 @@ def getOdometerDataFromDevice(request):
             company_code   = company_instance,
             schedule_no    = schedule_no,
             trip_no        = trip_no,
-            trip_id        = trip_obj,
-            schedule_id    = schedule_obj,
+            trip_id_id     = trip_pk,
+            schedule_id_id = schedule_pk,
             start_date     = start_date,
             start_time     = start_time,
             start_datetime = start_datetime,
@@ -432,9 +529,9 @@ def getOdometerDataFromDevice(request):
             end_time       = end_time,
             end_datetime   = end_datetime,
             driver         = _p(10),
-            driver_id      = driver_instance,
+            driver_id_id   = driver_pk,
             bus_no         = _p(11),
-            bus_id         = bus_instance,
+            bus_id_id      = bus_pk,
             start_reading  = Decimal(_p(12, '0')),
             end_reading    = Decimal(_p(13, '0')),
             source         = OdometerData.SourceType.API,
@@ -489,16 +586,16 @@ def getExpenseDataFromDevice(request):
 
         errors = []
 
-        driver_instance = None
+        driver_pk = None
         if _p(8):
-            driver_instance = Employee.objects.filter(employee_name=_p(8), company=company_instance).first()
-            if not driver_instance:
+            driver_pk = employee_pk_by_name(company_instance.pk, _p(8))
+            if not driver_pk:
                 errors.append(f"driver not matched: {_p(8)}")
 
-        bus_instance = None
+        bus_pk = None
         if _p(9):
-            bus_instance = VehicleType.objects.filter(bus_reg_num=_p(9), company=company_instance).first()
-            if not bus_instance:
+            bus_pk = vehicle_pk(company_instance.pk, _p(9), include_deleted=True)
+            if not bus_pk:
                 errors.append(f"bus not matched: {_p(9)}")
 
         expense_date     = datetime.strptime(_p(6), "%Y-%m-%d").date() if _p(6) else None
@@ -508,8 +605,8 @@ def getExpenseDataFromDevice(request):
         schedule_no = int(_p(4)) if _p(4) else None
         trip_no     = int(_p(5)) if _p(5) else None
 
-        trip_obj     = _resolve_trip_by_palmtec(_p(2), company_instance, trip_no, expense_date)
-        schedule_obj = _resolve_schedule_by_palmtec(_p(2), company_instance, schedule_no, expense_date)
+        trip_pk      = _resolve_trip_by_palmtec(_p(2), company_instance, trip_no, expense_date)
+        schedule_pk  = _resolve_schedule_by_palmtec(_p(2), company_instance, schedule_no, expense_date)
 
         ExpenseData.objects.create(
             unique_code      = _p(1),
@@ -517,19 +614,19 @@ def getExpenseDataFromDevice(request):
             company_code     = company_instance,
             schedule_no      = schedule_no,
             trip_no          = trip_no,
-            trip_id          = trip_obj,
-            schedule_id      = schedule_obj,
+            trip_id_id       = trip_pk,
+            schedule_id_id   = schedule_pk,
             expense_date     = expense_date,
             expense_time     = expense_time,
             expense_datetime = expense_datetime,
             driver           = _p(8),
-            driver_id        = driver_instance,
+            driver_id_id     = driver_pk,
             bus_no           = _p(9),
-            bus_id           = bus_instance,
+            bus_id_id        = bus_pk,
             expense_amount   = Decimal(_p(10, '0')),
             diesel_amount    = Decimal(_p(11, '0')),
             expense_type      = int(_p(12)) if _p(12) else None,
-            expense_master_id = ExpenseMaster.objects.filter(company=company_instance, expense_code=str(int(_p(12)))).first() if _p(12) else None,
+            expense_master_id_id = expense_master_pk(company_instance.pk, str(int(_p(12)))) if _p(12) else None,
             expense_name      = _p(13),
             source           = ExpenseData.SourceType.API,
             checksum         = _p(14),
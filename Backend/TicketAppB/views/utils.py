@@ -159,31 +159,3 @@ def _validate_checksum(endpoint: str, raw: str) -> bool:
             total -= 30000
 
     return total == received
-    
-
-
-def _get_route_for_palmtec(route_code: str, company_instance):
-    from ..models import Route
-    cache_key=f"route:{company_instance.pk}:{route_code}"
-    cached_pk=cache.get(cache_key)
-
-    if cached_pk == CACHE_MISS_SENTINEL:
-        # cache returned "__not_found__"
-        # we stored this before — route doesn't exist
-        return None
-    
-    if cached_pk is not None:
-        # cache returned an actual PK like 7
-        # use it to fetch from DB
-        return Route.objects.filter(pk=cached_pk).first()
-    else:
-        # cache returned None — key was never stored
-        # we have no choice, so ask the database
-        route=Route.objects.filter(route_code=route_code, company=company_instance).first()
-
-        if route:
-            cache.set(key=cache_key,value=route.pk,timeout=3600)
-            return route
-        else:
-            cache.set(key=cache_key, value=CACHE_MISS_SENTINEL, timeout=300) 
-            return None
\ No newline at end of file
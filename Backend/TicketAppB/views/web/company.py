@@ -20,7 +20,7 @@ from rest_framework.permissions import IsAuthenticated
 from ...permissions import LicensePermission
 from django.db.utils import OperationalError, ProgrammingError
 from django.db.models import Sum, Q, Count, Case, When, IntegerField
-from ...models import Company, TransactionData, TripData, ScheduleData, Route, VehicleType, AggregatorTransaction, Dealer, ETMDevice, UserSession, UserRole, UserTier
+from ...models import Company, TripData, ScheduleData, Route, VehicleType, AggregatorTransaction, Dealer, ETMDevice, UserSession, UserRole, UserTier, DailyCompanyRevenue
 from ..utils import _is_superadmin, _is_executive, _is_dealer_admin, _is_company_admin
 from .audit_logs import log_action
 from ...models import AuditLog
@@ -1188,37 +1188,30 @@ def get_company_dashboard_metrics(request):
         "failed": 0,
     }
     
-    #  Section 1: Collections (from TransactionData) 
+    #  Section 1: Collections (from DailyCompanyRevenue — one row per day) 
     try:
-        transaction_base = TransactionData.objects.filter(
-            company_code=company,
-            ticket_date=selected_date
-        )
-        
-        # Daily cash collection
-        daily_cash = transaction_base.filter(
-            ticket_status=TransactionData.PaymentMode.CASH
-        ).aggregate(total=Sum('ticket_amount'))['total'] or 0
-        
-        # Daily UPI collection
-        daily_upi = transaction_base.filter(
-            ticket_status=TransactionData.PaymentMode.UPI
-        ).aggregate(total=Sum('ticket_amount'))['total'] or 0
+        day = DailyCompanyRevenue.objects.filter(
+            company=company,
+            date=selected_date
+        ).values('cash_amount', 'upi_amount', 'passenger_count').first() or {}
+
+        # Daily cash / UPI collection
+        daily_cash = day.get('cash_amount') or 0
+        daily_upi = day.get('upi_amount') or 0
         
         # Monthly total (all transactions in the same month)
-        monthly_total = TransactionData.objects.filter(
-            company_code=company,
-            ticket_date__year=selected_date.year,
-            ticket_date__month=selected_date.month
-        ).aggregate(total=Sum('ticket_amount'))['total'] or 0
+        month_start = selected_date.replace(day=1)
+        monthly_total = DailyCompanyRevenue.objects.filter(
+            company=company,
+            date__range=[month_start, month_start + relativedelta(months=1, days=-1)]
+        ).aggregate(total=Sum('collection'))['total'] or 0
         
         # Previous month total (for month-over-month comparison)
-        prev_month_date = selected_date - relativedelta(months=1)
-        prev_month_total = TransactionData.objects.filter(
-            company_code=company,
-            ticket_date__year=prev_month_date.year,
-            ticket_date__month=prev_month_date.month
-        ).aggregate(total=Sum('ticket_amount'))['total'] or 0
+        prev_month_start = month_start - relativedelta(months=1)
+        prev_month_total = DailyCompanyRevenue.objects.filter(
+            company=company,
+            date__range=[prev_month_start, month_start - relativedelta(days=1)]
+        ).aggregate(total=Sum('collection'))['total'] or 0
 
         collections = {
             "daily_cash": float(daily_cash),
@@ -1228,10 +1221,7 @@ def get_company_dashboard_metrics(request):
         }
         
         # Total passengers (from ticket counts)
-        total_passengers = transaction_base.aggregate(
-            total=Sum('total_tickets')
-        )['total'] or 0
-        operations["total_passengers"] = int(total_passengers)
+        operations["total_passengers"] = int(day.get('passenger_count') or 0)
         
     except (OperationalError, ProgrammingError) as e:
         logger.warning(f"Collection metrics unavailable: {str(e)}")
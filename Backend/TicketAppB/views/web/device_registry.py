@@ -21,6 +21,7 @@ import logging
 import re
 import openpyxl
 
+from django.db import transaction
 from django.db.models import Count
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -32,6 +33,8 @@ from rest_framework.views import APIView
 from ...models import ETMDevice, Company, Dealer, AuditLog, UserRole, SettingsProfile
 from ...serializers.devices import ETMDeviceSerializer
 from ...permissions import LicensePermission
+from ...device_heartbeat import overlay_heartbeats, forget_heartbeat
+from ...device_busdat import invalidate_busdat
 from ..utils import (
     _is_superadmin,
     _is_executive,
@@ -182,8 +185,9 @@ def list_devices(request):
     if filter_dealer and _is_superadmin_or_executive(user):
         qs = qs.filter(dealer_id=filter_dealer)
 
-    qs = qs.order_by('-created_at')
-    return Response({'message': 'Success', 'data': ETMDeviceSerializer(qs, many=True).data}, status=status.HTTP_200_OK)
+    # last_seen_at is buffered in Redis between flushes — show the fresh value
+    devices = overlay_heartbeats(list(qs.order_by('-created_at')))
+    return Response({'message': 'Success', 'data': ETMDeviceSerializer(devices, many=True).data}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -609,6 +613,8 @@ def unmap_device(request, device_id):
             'has_fetched_setup', 'setup_fetched_at', 'last_seen_at',
             'updated_at',
         ])
+        # A buffered heartbeat would otherwise be flushed back onto the unmapped row
+        forget_heartbeat(device.pk)
 
     log_action(
         actor=user, action=AuditLog.ActionType.DEVICE_DEALLOCATE,
@@ -740,6 +746,8 @@ def set_palmtec_id(request, device_id):
     # unmap's cascade-delete never fires here; without this the profile would
     # silently go stale and later match whichever device inherits the old ID.
     SettingsProfile.objects.filter(device=device).update(palmtec_id=palmtec_id)
+    # update() skips signals — BUS.DAT carries the profile's palmtec_id
+    transaction.on_commit(lambda: invalidate_busdat(device.company_id))
 
     log_action(
         actor=user, action=AuditLog.ActionType.UPDATE,
@@ -3,23 +3,31 @@ mdb_views.py — MDB import service
 
 Import uses non-DUP MDB tables only.
 
-Response is streamed as Server-Sent Events (SSE) so the UI gets live per-table
-progress via axios onDownloadProgress:
-  data: {"type": "table_done", "table": "BusType", "imported": 5, "existing": 3, "skipped": 0, "errors": []}
-  data: {"type": "done", "total_imported": 50, "total_existing": 20, "total_skipped": 2, "errors": [...], "read_errors": {}}
-  data: {"type": "error", "message": "..."}   ← fatal errors only
+The upload enqueues a Celery job (mdb_import_jobs.py) and returns its id at
+once. The page then polls GET import-mdb/<job_id>/events?after=<id>, which
+answers straight away with the events recorded since that id as JSON
+  {"events": [{"id": "...", "type": ...}, ...], "last_event_id": "...", "finished": false}
+and sends last_event_id back as the next ?after= until finished is true.
+A client that drops out picks up where it left off. Event types:
+  {"type": "queued"} / {"type": "started"}
+  {"type": "table_done", "table": "BusType", "imported": 5, "existing": 3, "skipped": 0, "errors": []}
+  {"type": "done", "total_imported": 50, "total_existing": 20, "total_skipped": 2, "errors": [...], "read_errors": {}, "read_timings": {"FARE": 812, ...}}
+  {"type": "error", "message": "..."}   ← fatal errors only
 """
 
 import os
 import sys
-import json
+import logging
 import subprocess
 import csv
-import io
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
 
 from django.conf import settings as django_settings
-from django.db import transaction
-from django.http import StreamingHttpResponse
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -34,6 +42,11 @@ from ....models.master_data import (
 from ....models.operations import ExpenseMaster, Expense, CrewAssignment, InspectorDetails
 from ....models.company import Company
 from ...utils import _is_superadmin
+from ....master_snapshot import invalidate_master_snapshot
+from ....device_masterdata import invalidate_device_masterdata
+from .... import mdb_import_jobs
+
+logger = logging.getLogger(__name__)
 
 
 # ================================================================
@@ -59,11 +72,11 @@ class MdbImportView(APIView):
         company_id  — which company to link all records to
         password    — (optional) mdb file password
 
-    Returns text/event-stream (SSE). Each completed table yields one event.
-    Final event has type "done". Fatal errors yield type "error".
+    Saves the file, enqueues the import job and returns 202 {"job_id": ...}.
+    Progress is read from MdbImportEventsView.
 
-    Pre-stream validation failures (missing file, bad company) still return
-    normal JSON 4xx so the frontend can check response status before reading.
+    Validation failures (missing file, bad company) return JSON 4xx; 409 if
+    an import for the company is already running.
     """
     parser_classes = [MultiPartParser, FormParser]
 
@@ -88,40 +101,48 @@ class MdbImportView(APIView):
         except Company.DoesNotExist:
             return Response({'message': 'Company not found.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Save to permanent backup before streaming — chunked reads can't happen inside a generator.
+        # Save to permanent backup — the Celery worker reads it from here.
         # Path: uploads/{company_code}/mdb/{YYYY-MM-DD}/{HH-MM-SS}.mdb
-        tmp_path = None
         try:
             now        = timezone.now()
             backup_dir = os.path.join(
                 django_settings.MEDIA_ROOT, company.company_id, 'mdb', now.strftime('%Y-%m-%d')
             )
             os.makedirs(backup_dir, exist_ok=True)
-            tmp_path = os.path.join(backup_dir, f"{now.strftime('%H-%M-%S')}.mdb")
-            with open(tmp_path, 'wb') as f:
+            mdb_path = os.path.join(backup_dir, f"{now.strftime('%H-%M-%S')}.mdb")
+            with open(mdb_path, 'wb') as f:
                 for chunk in mdb_file.chunks():
                     f.write(chunk)
         except Exception as e:
             return Response({'message': f'Failed to save upload: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        def sse_stream():
-            try:
-                for event in MdbImportService.run_stream(tmp_path, company, user, password):
-                    yield f"data: {json.dumps(event)}\n\n"
-            except MdbPasswordError:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Could not open file. Password incorrect or unsupported encryption.'})}\n\n"
-            except MdbReadError as e:
-                yield f"data: {json.dumps({'type': 'error', 'message': f'Failed to read MDB: {str(e)}'})}\n\n"
-            except Exception as e:
-                yield f"data: {json.dumps({'type': 'error', 'message': f'Unexpected error: {str(e)}'})}\n\n"
-            # NOTE: tmp_path is intentionally NOT deleted here.
-            # The file was saved as a permanent backup at the start of the request.
-            # Path: MEDIA_ROOT/<company_code>/mdb/<YYYY-MM-DD>/<HH-MM-SS>.mdb
+        # NOTE: the file is intentionally never deleted — it is the permanent
+        # backup of what was imported.
+        job_id = mdb_import_jobs.start(mdb_path, company, user, password)
+        if job_id is None:
+            return Response(
+                {'message': 'Another import is already in progress for this company. Please wait and try again.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response({'job_id': job_id}, status=status.HTTP_202_ACCEPTED)
+
+
+class MdbImportEventsView(APIView):
+    """
+    GET /import-mdb/<job_id>/events
+
+    The job's events recorded after ?after=<event id> (or from the
+    start), answered at once — the page polls until `finished`. 404 once
+    the job has expired.
+    """
+
+    def get(self, request, job_id):
+        if not _is_superadmin(request.user):
+            return Response({'message': 'Superadmin only.'}, status=status.HTTP_403_FORBIDDEN)
+        if not mdb_import_jobs.exists(job_id):
+            return Response({'message': 'Import job not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        response = StreamingHttpResponse(sse_stream(), content_type='text/event-stream')
-        response['Cache-Control'] = 'no-cache'
-        response['X-Accel-Buffering'] = 'no'  # prevent nginx from buffering the stream
-        return response
+        return Response(mdb_import_jobs.events(job_id, request.GET.get('after') or None))
 
 
 # ================================================================
@@ -133,44 +154,27 @@ class MdbImportService:
     @staticmethod
     def run_stream(mdb_path, company, user, password=None):
         """
-        Generator — yields one SSE event dict per completed table, then a final
-        'done' event. The view wraps each dict in "data: <json>\\n\\n".
+        Generator — yields one event dict per completed table, then a final
+        'done' event. The import job (mdb_import_jobs.run) records each one
+        for the progress endpoint. The caller holds the company's import lock.
 
         Processor return signature: (imported, existing, skipped, errors)
           imported — rows newly written to the DB
-          existing — rows already present (get_or_create found a match, no write)
-          skipped  — rows that failed validation or FK lookup
+          existing — rows already present (key matched, no write)
+          skipped  — rows that failed validation, FK lookup or a DB constraint
           errors   — human-readable skip reasons
 
         Each table runs in its own atomic block. If a table crashes, only that
         table rolls back — all previously committed tables stay saved.
-        Re-importing the same file is safe: get_or_create prevents duplicates
-        and the existing counter shows what was already there.
+        Re-importing the same file is safe: keyed tables only insert rows whose
+        key is missing (_bulk_get_or_create) and the existing counter shows
+        what was already there.
         """
-        from django.db import connection
-
-        lock_name = f"mdb_import_{company.id}"
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT GET_LOCK(%s, 0)", [lock_name])
-            row = cursor.fetchone()
-            lock_acquired = bool(row and row[0] == 1)
-
-        if not lock_acquired:
-            yield {
-                'type': 'error',
-                'message': 'Another import is already in progress for this company. Please wait and try again.',
-            }
-            return
-
-        try:
-            yield from MdbImportService._run_stream_inner(mdb_path, company, user, password)
-        finally:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT RELEASE_LOCK(%s)", [lock_name])
-
-    @staticmethod
-    def _run_stream_inner(mdb_path, company, user, password=None):
-        raw_tables, read_errors = MdbReader.read_all_tables(mdb_path, password)
+        raw_tables, read_errors, read_timings = MdbReader.read_all_tables(mdb_path, password)
+        logger.info(
+            "MDB read for company %s: %s", company.id,
+            ', '.join(f'{table} {ms} ms' for table, ms in read_timings.items()),
+        )
         bus_type_source_map = MdbImportService._build_bus_type_source_map(raw_tables.get('bustype', []))
 
         total_imported = 0
@@ -212,13 +216,11 @@ class MdbImportService:
 
         total_replaced = 0
 
+        lookups = MdbImportService._build_lookups(company, bus_type_source_map)
+
         for table_name, raw_key, processor_fn in processors:
             rows = raw_tables.get(raw_key, [])
 
-            # Rebuild lookups AFTER each table so newly saved rows are findable
-            # e.g. BusType rows saved above are now in lookups when Route runs
-            lookups = MdbImportService._build_lookups(company, bus_type_source_map)
-
             try:
                 # Each table gets its OWN atomic block (savepoint).
                 # If THIS table fails, only THIS table rolls back.
@@ -237,6 +239,12 @@ class MdbImportService:
                 replaced = 0
                 errors   = [f"Table {table_name} failed entirely: {str(e)}"]
 
+            # Reload the lookups this table feeds so its new rows are findable
+            # e.g. BusType rows saved above are in lookups when Route runs
+            if imported:
+                for name in MdbImportService._LOOKUPS_BY_TABLE.get(table_name, ()):
+                    lookups.update(getattr(MdbImportService, f'_load_{name}')(company))
+
             all_errors.extend(errors)
             total_imported += imported
             total_existing += existing
@@ -254,8 +262,13 @@ class MdbImportService:
                 'errors':   errors,
             }
 
+        # Master data went in through bulk_create (no signals) — make devices
+        # download fresh route / stage / fare files.
+        if total_imported or total_replaced:
+            invalidate_device_masterdata(company.id)
+
         # ── Audit log — written before the final yield so it's always recorded
-        # even if the SSE connection drops after the last event.
+        # even if the consumer stops iterating after the last table.
         try:
             from ....models.audit import AuditLog
             from ..audit_logs import log_action
@@ -284,17 +297,31 @@ class MdbImportService:
             'total_replaced':  total_replaced,
             'errors':          all_errors,
             'read_errors':     read_errors,
+            'read_timings':    read_timings,
         }
 
 
     # ================================================================
     # LOOKUP BUILDER
     # Loads all existing DB objects into dicts for O(1) access per row.
-    # Called after each table so new inserts are immediately available.
+    # Built once per import; after each table only the lookups that table
+    # feeds are reloaded (_LOOKUPS_BY_TABLE), so new inserts are available
+    # to the tables after it.
     # ================================================================
 
+    # Lookups (by _load_<name>) to reload after a table has inserted rows
+    _LOOKUPS_BY_TABLE = {
+        'BusType':       ('bus_types',),
+        'EmployeeType':  ('emp_types',),
+        'Employee':      ('employees',),
+        'Stage':         ('stages',),
+        'Route':         ('routes',),
+        'VehicleType':   ('vehicles',),
+        'ExpenseMaster': ('expense_masters',),
+    }
+
     @staticmethod
-    def _build_lookups(company, bus_type_source_map=None):
+    def _load_bus_types(company):
         return {
             # BusType: keyed by name lowercase
             # Used by: Route, VehicleType, RouteBusType
@@ -302,62 +329,88 @@ class MdbImportService:
                 bt.name.strip().lower(): bt
                 for bt in BusType.objects.filter(company=company)
             },
+        }
 
+    @staticmethod
+    def _load_emp_types(company):
+        return {
             # EmployeeType: keyed by normalized code string ("1.0" → "1")
             # Used by: Employee
             'emp_types_by_code': {
                 str(et.emp_type_code).strip(): et
                 for et in EmployeeType.objects.filter(company=company)
             },
+        }
 
+    @staticmethod
+    def _load_employees(company):
+        employees = list(Employee.objects.filter(company=company, is_deleted=False))
+        return {
             # Employee: keyed by name lowercase
             # Used by: Expense, CrewAssignment, InspectorDetails
-            'employees_by_name': {
-                e.employee_name.strip().lower(): e
-                for e in Employee.objects.filter(company=company, is_deleted=False)
-            },
+            'employees_by_name': {e.employee_name.strip().lower(): e for e in employees},
 
             # Employee: keyed by employee_code string
             # Used by: InspectorDetails (MDB stores InspectorID as code)
-            'employees_by_code': {
-                str(e.employee_code).strip(): e
-                for e in Employee.objects.filter(company=company, is_deleted=False)
-            },
+            'employees_by_code': {str(e.employee_code).strip(): e for e in employees},
+        }
 
+    @staticmethod
+    def _load_stages(company):
+        stages = list(Stage.objects.filter(company=company, is_deleted=False))
+        return {
             # Stage: keyed by stage_code string
             # Used by: RouteStage, Fare
-            'stages_by_code': {
-                str(s.stage_code).strip(): s
-                for s in Stage.objects.filter(company=company, is_deleted=False)
-            },
+            'stages_by_code': {str(s.stage_code).strip(): s for s in stages},
 
             # Stage: keyed by stage_name lowercase
             # Used as fallback if code lookup fails
-            'stages_by_name': {
-                s.stage_name.strip().lower(): s
-                for s in Stage.objects.filter(company=company, is_deleted=False)
-            },
+            'stages_by_name': {s.stage_name.strip().lower(): s for s in stages},
+        }
 
+    @staticmethod
+    def _load_routes(company):
+        return {
             # Route: keyed by route_code string
             # Used by: RouteStage, RouteBusType, Fare
             'routes_by_code': {
                 r.route_code.strip(): r
                 for r in Route.objects.filter(company=company)
             },
+        }
 
+    @staticmethod
+    def _load_vehicles(company):
+        return {
             # VehicleType: keyed by bus_reg_num lowercase
             # Used by: CrewAssignment
             'vehicles': {
                 v.bus_reg_num.strip().lower(): v
                 for v in VehicleType.objects.filter(company=company, is_deleted=False)
             },
+        }
 
+    @staticmethod
+    def _load_expense_masters(company):
+        return {
             # ExpenseMaster: keyed by expense_code string
             # Used by: Expense (optional cross-reference)
             'expense_masters': {
                 str(em.expense_code).strip(): em
                 for em in ExpenseMaster.objects.filter(company=company)
             },
+        }
+
+    @staticmethod
+    def _build_lookups(company, bus_type_source_map=None):
+        return {
+            **MdbImportService._load_bus_types(company),
+            **MdbImportService._load_emp_types(company),
+            **MdbImportService._load_employees(company),
+            **MdbImportService._load_stages(company),
+            **MdbImportService._load_routes(company),
+            **MdbImportService._load_vehicles(company),
+            **MdbImportService._load_expense_masters(company),
 
             # MDB bustype source ID ("1") -> bustype name lowercase ("ordinary")
             'bus_type_source_map': bus_type_source_map or {},
@@ -468,6 +521,75 @@ class MdbImportService:
         raise ValueError(f"Cannot parse time: '{raw}'")
 
 
+    # ================================================================
+    # BULK INSERT-IF-MISSING
+    # Bulk equivalent of one get_or_create per row for the keyed master
+    # tables. Existing rows are left untouched, as before.
+    # ================================================================
+
+    BULK_BATCH_SIZE = 1000
+
+    # bulk_create skips post_save, so these invalidate the ingest snapshot
+    # explicitly (same models as signals.invalidate_master_snapshot_on_change)
+    _SNAPSHOT_MODELS = (Employee, VehicleType, Route, ExpenseMaster)
+
+    @staticmethod
+    def _db_key(key):
+        """key as the case-insensitive MariaDB collation compares it."""
+        if isinstance(key, tuple):
+            return tuple(MdbImportService._db_key(part) for part in key)
+        return key.strip().casefold() if isinstance(key, str) else key
+
+    @staticmethod
+    def _bulk_get_or_create(model, company, key_fields, candidates):
+        """
+        candidates — unsaved instances in file order
+        key_fields — attnames forming the model's unique key within company
+
+        One SELECT loads every existing key of the company. A candidate whose
+        key already exists — or appeared earlier in the file — counts as
+        existing; keys are compared stripped and casefolded, like the DB does.
+        The rest are inserted in batches of BULK_BATCH_SIZE. A batch that hits
+        any other constraint is retried row by row, and each row the DB still
+        rejects is reported as a conflict instead of being dropped silently.
+        imported is re-counted from the DB after the inserts.
+        Returns (imported, existing, conflicts).
+        """
+        key_of = attrgetter(*key_fields)
+        db_key = MdbImportService._db_key
+        company_rows = model.objects.filter(company=company)
+        existing_keys = list(company_rows.values_list(*key_fields, flat=len(key_fields) == 1))
+        seen = {db_key(key) for key in existing_keys}
+
+        to_create = []
+        for obj in candidates:
+            key = db_key(key_of(obj))
+            if key not in seen:
+                seen.add(key)
+                to_create.append(obj)
+
+        conflicts = []
+        size = MdbImportService.BULK_BATCH_SIZE
+        for start in range(0, len(to_create), size):
+            batch = to_create[start:start + size]
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch)
+            except IntegrityError:
+                for obj in batch:
+                    try:
+                        with transaction.atomic():
+                            model.objects.bulk_create([obj])
+                    except IntegrityError as e:
+                        conflicts.append(f"{model.__name__} {key_of(obj)}: {e}")
+
+        imported = company_rows.count() - len(existing_keys) if to_create else 0
+        if imported and model in MdbImportService._SNAPSHOT_MODELS:
+            transaction.on_commit(lambda: invalidate_master_snapshot(company.pk))
+
+        return imported, len(candidates) - len(to_create), conflicts
+
+
     # ================================================================
     # PASS 1 — No dependencies
     # ================================================================
@@ -479,26 +601,25 @@ class MdbImportService:
         Django BusType: bustype_code, name, company
         Uses name as code since MDB has no separate code field.
         """
-        imported, existing, skipped, errors = 0, 0, 0, []
+        skipped, errors, candidates = 0, [], []
         for i, row in enumerate(rows):
             try:
                 name = str(row.get('name', '') or '').strip()
                 if not name:
                     raise ValueError("Missing name")
 
-                _, created = BusType.objects.get_or_create(
-                    company=company,
-                    bustype_code=name[:50],
-                    defaults={'name': name, 'created_by': user}
-                )
-                if created:
-                    imported += 1
-                else:
-                    existing += 1
+                candidates.append(BusType(
+                    company=company, bustype_code=name[:50], name=name, created_by=user,
+                ))
             except Exception as e:
                 skipped += 1
                 errors.append(f"Row {i+1} bustype: {str(e)}")
-        return imported, existing, skipped, errors
+
+        imported, existing, conflicts = MdbImportService._bulk_get_or_create(
+            BusType, company, ('bustype_code',), candidates
+        )
+        errors.extend(conflicts)
+        return imported, existing, skipped + len(conflicts), errors
 
 
     @staticmethod
@@ -509,7 +630,7 @@ class MdbImportService:
 
         EmployeeTypeId may export as "1.0" from mdbtools — normalize to "1".
         """
-        imported, existing, skipped, errors = 0, 0, 0, []
+        skipped, errors, candidates = 0, [], []
         for i, row in enumerate(rows):
             try:
                 raw_id    = str(row.get('EmployeeTypeId', '') or '').strip()
@@ -520,19 +641,18 @@ class MdbImportService:
 
                 type_code = MdbImportService._normalize_id(raw_id)
 
-                _, created = EmployeeType.objects.get_or_create(
-                    company=company,
-                    emp_type_code=type_code,
-                    defaults={'emp_type_name': type_name, 'created_by': user}
-                )
-                if created:
-                    imported += 1
-                else:
-                    existing += 1
+                candidates.append(EmployeeType(
+                    company=company, emp_type_code=type_code, emp_type_name=type_name, created_by=user,
+                ))
             except Exception as e:
                 skipped += 1
                 errors.append(f"Row {i+1} EMPLOYEETYPE: {str(e)}")
-        return imported, existing, skipped, errors
+
+        imported, existing, conflicts = MdbImportService._bulk_get_or_create(
+            EmployeeType, company, ('emp_type_code',), candidates
+        )
+        errors.extend(conflicts)
+        return imported, existing, skipped + len(conflicts), errors
 
 
     @staticmethod
@@ -541,7 +661,7 @@ class MdbImportService:
         MDB CURRENCY: CURRENCY, COUNTRY, RECORDID
         Django Currency: currency, country, company
         """
-        imported, existing, skipped, errors = 0, 0, 0, []
+        skipped, errors, candidates = 0, [], []
         for i, row in enumerate(rows):
             try:
                 currency_code = str(row.get('CURRENCY', '') or '').strip()
@@ -550,19 +670,18 @@ class MdbImportService:
                 if not currency_code:
                     raise ValueError("Missing CURRENCY code")
 
-                _, created = Currency.objects.get_or_create(
-                    company=company,
-                    currency=currency_code[:3],
-                    defaults={'country': country or '', 'created_by': user}
-                )
-                if created:
-                    imported += 1
-                else:
-                    existing += 1
+                candidates.append(Currency(
+                    company=company, currency=currency_code[:3], country=country or '', created_by=user,
+                ))
             except Exception as e:
                 skipped += 1
                 errors.append(f"Row {i+1} CURRENCY: {str(e)}")
-        return imported, existing, skipped, errors
+
+        imported, existing, conflicts = MdbImportService._bulk_get_or_create(
+            Currency, company, ('currency',), candidates
+        )
+        errors.extend(conflicts)
+        return imported, existing, skipped + len(conflicts), errors
 
 
     @staticmethod
@@ -574,7 +693,7 @@ class MdbImportService:
         Number is used as stage_code.
         Distance and route are stored in RouteStage (processed later).
         """
-        imported, existing, skipped, errors = 0, 0, 0, []
+        skipped, errors, candidates = 0, [], []
         for i, row in enumerate(rows):
             try:
                 raw_num    = str(row.get('Number', '') or '').strip()
@@ -587,19 +706,18 @@ class MdbImportService:
 
                 stage_code = MdbImportService._normalize_id(raw_num)
 
-                _, created = Stage.objects.get_or_create(
-                    company=company,
-                    stage_code=stage_code,
-                    defaults={'stage_name': stage_name, 'created_by': user}
-                )
-                if created:
-                    imported += 1
-                else:
-                    existing += 1
+                candidates.append(Stage(
+                    company=company, stage_code=stage_code, stage_name=stage_name, created_by=user,
+                ))
             except Exception as e:
                 skipped += 1
                 errors.append(f"Row {i+1} STAGE: {str(e)}")
-        return imported, existing, skipped, errors
+
+        imported, existing, conflicts = MdbImportService._bulk_get_or_create(
+            Stage, company, ('stage_code',), candidates
+        )
+        errors.extend(conflicts)
+        return imported, existing, skipped + len(conflicts), errors
 
 
     # ================================================================
@@ -614,7 +732,7 @@ class MdbImportService:
 
         EMPLOYEETYPEID → looked up in emp_types_by_code
         """
-        imported, existing, skipped, errors = 0, 0, 0, []
+        skipped, errors, candidates = 0, [], []
         for i, row in enumerate(rows):
             try:
                 raw_emp_id  = str(row.get('EMPLOYEEID',    '') or '').strip()
@@ -637,24 +755,23 @@ class MdbImportService:
                         f"Available codes: {list(lookups['emp_types_by_code'].keys())}"
                     )
 
-                _, created = Employee.objects.get_or_create(
+                candidates.append(Employee(
                     company=company,
                     employee_code=emp_code,
-                    defaults={
-                        'employee_name': emp_name,
-                        'emp_type':      emp_type,
-                        'password':      password,
-                        'created_by':    user,
-                    }
-                )
-                if created:
-                    imported += 1
-                else:
-                    existing += 1
+                    employee_name=emp_name,
+                    emp_type=emp_type,
+                    password=password,
+                    created_by=user,
+                ))
             except Exception as e:
                 skipped += 1
                 errors.append(f"Row {i+1} CREW: {str(e)}")
-        return imported, existing, skipped, errors
+
+        imported, existing, conflicts = MdbImportService._bulk_get_or_create(
+            Employee, company, ('employee_code',), candidates
+        )
+        errors.extend(conflicts)
+        return imported, existing, skipped + len(conflicts), errors
 
 
     @staticmethod
@@ -669,7 +786,7 @@ class MdbImportService:
         Bus type is resolved through:
           ROUTE.bustype (source id) -> bustype.id/name map -> DB BusType.
         """
-        imported, existing, skipped, errors = 0, 0, 0, []
+        skipped, errors, candidates = 0, [], []
         for i, row in enumerate(rows):
             try:
                 route_code     = str(row.get('rutcode', '') or '').strip()
@@ -693,32 +810,31 @@ class MdbImportService:
                         f"Available: {list(lookups['bus_types'].keys())}"
                     )
 
-                _, created = Route.objects.get_or_create(
+                candidates.append(Route(
                     company=company,
                     route_code=route_code,
-                    defaults={
-                        'route_name': route_name,
-                        'min_fare':   MdbImportService._to_float(row.get('minfare')),
-                        'fare_type':  MdbImportService._to_int(row.get('faretype')),
-                        'bus_type':   bus_type_obj,
-                        'half':       MdbImportService._to_bool(row.get('Half')),
-                        'luggage':    MdbImportService._to_bool(row.get('luggage')),
-                        'adjust':     MdbImportService._to_bool(row.get('adjust')),
-                        'conc':       MdbImportService._to_bool(row.get('conc')),
-                        'ph':         MdbImportService._to_bool(row.get('ph')),
-                        'pass_allow': MdbImportService._to_bool(row.get('PASSALLOW')),
-                        'start_from': MdbImportService._to_int(row.get('startfrom')),
-                        'created_by': user,
-                    }
-                )
-                if created:
-                    imported += 1
-                else:
-                    existing += 1
+                    route_name=route_name,
+                    min_fare=MdbImportService._to_float(row.get('minfare')),
+                    fare_type=MdbImportService._to_int(row.get('faretype')),
+                    bus_type=bus_type_obj,
+                    half=MdbImportService._to_bool(row.get('Half')),
+                    luggage=MdbImportService._to_bool(row.get('luggage')),
+                    adjust=MdbImportService._to_bool(row.get('adjust')),
+                    conc=MdbImportService._to_bool(row.get('conc')),
+                    ph=MdbImportService._to_bool(row.get('ph')),
+                    pass_allow=MdbImportService._to_bool(row.get('PASSALLOW')),
+                    start_from=MdbImportService._to_int(row.get('startfrom')),
+                    created_by=user,
+                ))
             except Exception as e:
                 skipped += 1
                 errors.append(f"Row {i+1} ROUTE: {str(e)}")
-        return imported, existing, skipped, errors
+
+        imported, existing, conflicts = MdbImportService._bulk_get_or_create(
+            Route, company, ('route_code',), candidates
+        )
+        errors.extend(conflicts)
+        return imported, existing, skipped + len(conflicts), errors
 
 
     # ================================================================
@@ -799,6 +915,8 @@ class MdbImportService:
         if to_create:
             RouteStage.objects.bulk_create(to_create, ignore_conflicts=True)
             imported = len(to_create)
+            # bulk_create skips post_save — refresh the ingest snapshot explicitly
+            transaction.on_commit(lambda: invalidate_master_snapshot(company.pk))
 
         return imported, existing, skipped, errors
 
@@ -812,7 +930,7 @@ class MdbImportService:
         One RouteBusType entry per route using ROUTE.bustype source id.
         This records which bus types are allowed on each route.
         """
-        imported, existing, skipped, errors = 0, 0, 0, []
+        skipped, errors, candidates = 0, [], []
         for i, row in enumerate(rows):
             try:
                 route_code        = str(row.get('rutcode', '') or '').strip()
@@ -831,20 +949,18 @@ class MdbImportService:
                 if not bus_type:
                     raise ValueError(f"BusType '{bustype_name}' not found")
 
-                _, created = RouteBusType.objects.get_or_create(
-                    company=company,
-                    route=route,
-                    bus_type=bus_type,
-                    defaults={'created_by': user}
-                )
-                if created:
-                    imported += 1
-                else:
-                    existing += 1
+                candidates.append(RouteBusType(
+                    company=company, route=route, bus_type=bus_type, created_by=user,
+                ))
             except Exception as e:
                 skipped += 1
                 errors.append(f"Row {i+1} RouteBusType: {str(e)}")
-        return imported, existing, skipped, errors
+
+        imported, existing, conflicts = MdbImportService._bulk_get_or_create(
+            RouteBusType, company, ('route_id', 'bus_type_id'), candidates
+        )
+        errors.extend(conflicts)
+        return imported, existing, skipped + len(conflicts), errors
 
 
     @staticmethod
@@ -929,7 +1045,7 @@ class MdbImportService:
         MDB VEHICLETYPE: BUSID, BUSNO, BUSTYPE(name string)
         Django VehicleType: bus_reg_num, bus_type(FK), company
         """
-        imported, existing, skipped, errors = 0, 0, 0, []
+        skipped, errors, candidates = 0, [], []
         for i, row in enumerate(rows):
             try:
                 bus_no       = str(row.get('BUSNO',   '') or '').strip()
@@ -945,19 +1061,18 @@ class MdbImportService:
                         f"Available: {list(lookups['bus_types'].keys())}"
                     )
 
-                _, created = VehicleType.objects.get_or_create(
-                    company=company,
-                    bus_reg_num=bus_no,
-                    defaults={'bus_type': bus_type_obj, 'created_by': user}
-                )
-                if created:
-                    imported += 1
-                else:
-                    existing += 1
+                candidates.append(VehicleType(
+                    company=company, bus_reg_num=bus_no, bus_type=bus_type_obj, created_by=user,
+                ))
             except Exception as e:
                 skipped += 1
                 errors.append(f"Row {i+1} VEHICLETYPE: {str(e)}")
-        return imported, existing, skipped, errors
+
+        imported, existing, conflicts = MdbImportService._bulk_get_or_create(
+            VehicleType, company, ('bus_reg_num',), candidates
+        )
+        errors.extend(conflicts)
+        return imported, existing, skipped + len(conflicts), errors
 
 
     @staticmethod
@@ -1089,7 +1204,7 @@ class MdbImportService:
         MDB EXPMASTER: EXP_CODE, EXP_NAME, PalmID, ID
         Django ExpenseMaster: expense_code, expense_name, palmtec_id, company
         """
-        imported, existing, skipped, errors = 0, 0, 0, []
+        skipped, errors, candidates = 0, [], []
         for i, row in enumerate(rows):
             try:
                 raw_code = str(row.get('EXP_CODE', '') or '').strip()
@@ -1101,23 +1216,22 @@ class MdbImportService:
 
                 exp_code = MdbImportService._normalize_id(raw_code)
 
-                _, created = ExpenseMaster.objects.get_or_create(
+                candidates.append(ExpenseMaster(
                     company=company,
                     expense_code=exp_code,
-                    defaults={
-                        'expense_name': exp_name,
-                        'palmtec_id':   palm_id or None,
-                        'created_by':   user,
-                    }
-                )
-                if created:
-                    imported += 1
-                else:
-                    existing += 1
+                    expense_name=exp_name,
+                    palmtec_id=palm_id or None,
+                    created_by=user,
+                ))
             except Exception as e:
                 skipped += 1
                 errors.append(f"Row {i+1} EXPMASTER: {str(e)}")
-        return imported, existing, skipped, errors
+
+        imported, existing, conflicts = MdbImportService._bulk_get_or_create(
+            ExpenseMaster, company, ('expense_code',), candidates
+        )
+        errors.extend(conflicts)
+        return imported, existing, skipped + len(conflicts), errors
 
 
     @staticmethod
@@ -1355,8 +1469,23 @@ class MdbImportService:
 
 class MdbReader:
 
+    # Tables are read concurrently, one mdb-export process each. The big
+    # FARE / EXPENSE tables dominate, so a few workers is enough.
+    READ_WORKERS = 4
+    READ_TIMEOUT = 30  # seconds per table
+
+    # Deletes NUL and other control characters except tab (see _strip_control_chars)
+    _CONTROL_CHARS = dict.fromkeys(c for c in range(32) if c != ord('\t'))
+
     @staticmethod
     def read_all_tables(mdb_path, password=None):
+        """
+        Returns (tables, read_errors, read_timings):
+          tables        — table name → list of row dicts ([] if the read failed)
+          read_errors   — table name → error message
+          read_timings  — table name → wall time of the read in ms
+        Raises MdbPasswordError as soon as any table reports a password problem.
+        """
         tables_to_read = [
             'bustype',
             'EMPLOYEETYPE',
@@ -1375,17 +1504,30 @@ class MdbReader:
 
         result = {}
         read_errors = {}
-        for table in tables_to_read:
-            try:
-                rows = MdbReader._read_table(mdb_path, table, password)
-                result[table] = rows
-            except MdbPasswordError:
-                raise
-            except Exception as e:
-                result[table] = []
-                read_errors[table] = str(e)
+        read_timings = {}
 
-        return result, read_errors
+        def timed_read(table):
+            start = time.perf_counter()
+            try:
+                return MdbReader._read_table(mdb_path, table, password)
+            finally:
+                read_timings[table] = round((time.perf_counter() - start) * 1000)
+
+        # The Access ODBC driver is not reliably thread-safe — read serially on Windows.
+        workers = 1 if sys.platform == 'win32' else MdbReader.READ_WORKERS
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mdb-read') as pool:
+            futures = {table: pool.submit(timed_read, table) for table in tables_to_read}
+            for table, future in futures.items():
+                try:
+                    result[table] = future.result()
+                except MdbPasswordError:
+                    pool.shutdown(cancel_futures=True)
+                    raise
+                except Exception as e:
+                    result[table] = []
+                    read_errors[table] = str(e)
+
+        return result, read_errors, {t: read_timings[t] for t in tables_to_read if t in read_timings}
 
     @staticmethod
     def _read_table(mdb_path, table_name, password=None):
@@ -1395,40 +1537,64 @@ class MdbReader:
 
     @staticmethod
     def _read_table_mdbtools(mdb_path, table_name, password=None):
-        """Linux path: shells out to mdb-export (mdbtools)."""
+        """
+        Linux path: shells out to mdb-export (mdbtools) and parses the CSV
+        straight off the pipe, so a large table is never held in memory as
+        one string. stderr goes to a temp file — it is only read on failure
+        and must not fill its pipe while stdout is being drained.
+        """
         cmd = ['mdb-export', mdb_path, table_name]
 
         env = os.environ.copy()
         if password:
             env['MDB_JET_PASSWORD'] = password
 
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                env=env
-            )
-        except FileNotFoundError:
-            raise MdbReadError("mdbtools not installed. Run: sudo apt install mdbtools")
-        except subprocess.TimeoutExpired:
-            raise MdbReadError(f"Timed out reading table '{table_name}'")
-
-        if result.returncode != 0:
-            stderr = result.stderr.lower()
-            if 'password' in stderr or 'encrypt' in stderr or 'access denied' in stderr:
-                raise MdbPasswordError()
-            raise MdbReadError(f"mdb-export failed for '{table_name}': {result.stderr}")
+        with tempfile.TemporaryFile(mode='w+') as stderr_file:
+            try:
+                proc = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file,
+                    text=True,
+                    env=env
+                )
+            except FileNotFoundError:
+                raise MdbReadError("mdbtools not installed. Run: sudo apt install mdbtools")
 
-        if not result.stdout.strip():
-            return []
+            timed_out = threading.Event()
 
-        reader = csv.DictReader(io.StringIO(result.stdout))
-        return [
-            {k: MdbReader._strip_control_chars(v) for k, v in row.items()}
-            for row in reader
-        ]
+            def kill():
+                timed_out.set()
+                proc.kill()
+
+            timer = threading.Timer(MdbReader.READ_TIMEOUT, kill)
+            timer.start()
+            try:
+                with proc.stdout:
+                    strip = MdbReader._strip_control_chars
+                    rows = [
+                        {k: strip(v) for k, v in row.items()}
+                        for row in csv.DictReader(proc.stdout)
+                    ]
+                returncode = proc.wait()
+            finally:
+                timer.cancel()
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+
+            if timed_out.is_set():
+                raise MdbReadError(f"Timed out reading table '{table_name}'")
+
+            if returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read()
+                lowered = stderr.lower()
+                if 'password' in lowered or 'encrypt' in lowered or 'access denied' in lowered:
+                    raise MdbPasswordError()
+                raise MdbReadError(f"mdb-export failed for '{table_name}': {stderr}")
+
+        return rows
 
     @staticmethod
     def _strip_control_chars(value):
@@ -1437,7 +1603,7 @@ class MdbReader:
         invisible tofu glyph in the UI."""
         if not isinstance(value, str):
             return value
-        return ''.join(ch for ch in value if ch == '\t' or ch >= ' ')
+        return value.translate(MdbReader._CONTROL_CHARS)
 
     @staticmethod
     def _read_table_pyodbc(mdb_path, table_name, password=None):
@@ -1,6 +1,9 @@
+import hashlib
 import io
+import itertools
 import openpyxl
 from openpyxl import Workbook
+from django.core.cache import cache
 from django.db import transaction
 from django.http import HttpResponse
 from rest_framework import status
@@ -8,6 +11,8 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from ....device_masterdata import invalidate_device_masterdata
+from ....master_snapshot import invalidate_master_snapshot
 from ....models import BusType, Stage, Route, RouteStage, RouteBusType, Fare, UserRole
 
 
@@ -23,6 +28,13 @@ REQUIRED_COLS = {
 FLAG_COLS = ['half', 'adjust', 'luggage', 'ph', 'concession', 'pass']
 IGNORED_COLS = {'ladies', 'senior'}
 
+BULK_BATCH_SIZE = 1000
+
+# Validate caches the parsed route groups under the file's hash, so Confirm
+# (which re-uploads the same file) skips straight to the import.
+PARSED_CACHE_PREFIX = 'route_import:parsed:'
+PARSED_CACHE_TTL    = 30 * 60  # seconds
+
 
 # ── Auth helper ───────────────────────────────────────────────────────────────
 
@@ -52,9 +64,12 @@ def _to_float(val):
 # ── Core parser/validator ─────────────────────────────────────────────────────
 
 def _load_worksheet(file_bytes):
-    """Load openpyxl worksheet from bytes. Returns (ws, error_msg)."""
+    """
+    Open the worksheet from bytes in read-only (streaming) mode.
+    Returns (ws, error_msg); close ws.parent when done.
+    """
     try:
-        wb = openpyxl.load_workbook(io.BytesIO(file_bytes), data_only=True)
+        wb = openpyxl.load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
     except Exception as e:
         return None, f'Cannot read file: {str(e)}'
     ws = wb['SRE_Import'] if 'SRE_Import' in wb.sheetnames else wb.active
@@ -73,11 +88,14 @@ def _parse_and_validate(ws, company):
     errors = []
     warnings = []
 
-    rows = list(ws.iter_rows(values_only=True))
-    if len(rows) < 2:
+    # Rows are streamed; only the header and the current row are in memory.
+    rows = ws.iter_rows(values_only=True)
+    header_row = next(rows, None)
+    first_row = next(rows, None)
+    if header_row is None or first_row is None:
         return None, [{'route_code': None, 'row': None, 'message': 'File has no data rows.'}], [], []
 
-    raw_headers = [str(h or '').strip() for h in rows[0]]
+    raw_headers = [str(h or '').strip() for h in header_row]
     headers_lower = [h.lower() for h in raw_headers]
     header_set = set(headers_lower)
 
@@ -93,12 +111,13 @@ def _parse_and_validate(ws, company):
         cols_str = ', '.join(f'"{c.title()}"' for c in sorted(ignored))
         warnings.append({'message': f'Excel columns {cols_str} are not supported and will be ignored during import.'})
 
-    # Locate column indices
+    # Locate column indices (first occurrence wins)
+    col_indices = {}
+    for i, h in enumerate(headers_lower):
+        col_indices.setdefault(h, i)
+
     def col_idx(name):
-        try:
-            return headers_lower.index(name.lower())
-        except ValueError:
-            return -1
+        return col_indices.get(name.lower(), -1)
 
     fare_cidx = col_idx('fare')
 
@@ -126,7 +145,7 @@ def _parse_and_validate(ws, company):
 
     route_groups = {}
 
-    for row_num, row_values in enumerate(rows[1:], start=2):
+    for row_num, row_values in enumerate(itertools.chain([first_row], rows), start=2):
         # Skip fully empty rows
         if all(v is None or str(v).strip() == '' for v in row_values):
             continue
@@ -273,6 +292,16 @@ def _parse_and_validate(ws, company):
     if not route_groups:
         return None, errors + [{'route_code': None, 'row': None, 'message': 'No valid route data found.'}], warnings, []
 
+    # D. Soft-deleted stages — one query for the whole file
+    deleted_stages = set(
+        Stage.objects.filter(
+            company=company,
+            stage_code__in={s['stage_name'] for rg in route_groups.values()
+                            for s in rg['stages'] if s['stage_name']},
+            is_deleted=True
+        ).values_list('stage_code', flat=True)
+    )
+
     # C. Route-level consistency checks
     for route_code, rg in route_groups.items():
         stages = sorted(rg['stages'], key=lambda s: s['stage_order'])
@@ -318,15 +347,8 @@ def _parse_and_validate(ws, company):
                                                 f'values but found {actual}. Missing fares will default to 0.'})
 
         # D. Soft-deleted stages
-        stage_names = [s['stage_name'] for s in stages if s['stage_name']]
-        deleted_stages = set(
-            Stage.objects.filter(
-                company=company,
-                stage_code__in=stage_names,
-                is_deleted=True
-            ).values_list('stage_code', flat=True)
-        )
-        for sname in deleted_stages:
+        stage_names = {s['stage_name'] for s in stages if s['stage_name']}
+        for sname in sorted(deleted_stages & stage_names):
             errors.append({'route_code': route_code, 'row': None,
                            'message': f'Stage "{sname}" exists but is soft-deleted. Restore it before importing.'})
 
@@ -359,7 +381,117 @@ def _build_preview(route_groups):
     return preview
 
 
+def _parse_file(file_bytes, company):
+    """
+    Load and validate an uploaded workbook.
+    Returns (parsed, load_err); parsed is _parse_and_validate's 4-tuple.
+    """
+    ws, load_err = _load_worksheet(file_bytes)
+    if load_err:
+        return None, load_err
+    try:
+        return _parse_and_validate(ws, company), None
+    finally:
+        ws.parent.close()
+
+
+def _parsed_cache_key(company, file_bytes):
+    return f'{PARSED_CACHE_PREFIX}{company.id}:{hashlib.sha256(file_bytes).hexdigest()}'
+
+
+def _build_fares(route, rg, stages_sorted, company, user):
+    """Unsaved Fare rows for one route."""
+    fares = []
+    if rg['fare_type_int'] == 1:  # TABLE
+        # Convention: (row=1, col=stage_i) for each non-zero stage fare
+        for s_data in stages_sorted:
+            i = s_data['stage_order']
+            f = s_data['fare']
+            if f is None or f == 0:
+                continue
+            fares.append(Fare(
+                route=route,
+                row=1, col=i,
+                fare_amount=round(f),
+                route_name=route.route_name,
+                company=company,
+                created_by=user,
+            ))
+
+    else:  # GRAPH
+        # Convention: (row=from_stage, col=to_stage-1)
+        # Excel: for stage i, Fare col = fare(1→i), MatrixColK = fare(K→i)
+        for s_data in stages_sorted:
+            i = s_data['stage_order']
+            if i == 1:
+                continue  # stage 1 row is diagonal only (fare=0)
+
+            # Fare column → fare from stage 1 to stage i
+            f_main = s_data['fare']
+            if f_main and f_main != 0:
+                fares.append(Fare(
+                    route=route,
+                    row=1, col=i - 1,
+                    fare_amount=round(f_main),
+                    route_name=route.route_name,
+                    company=company,
+                    created_by=user,
+                ))
+
+            # MatrixColK → fare from stage K to stage i
+            for k, fv in s_data.get('extra_fares', {}).items():
+                if fv == 0:
+                    continue
+                fares.append(Fare(
+                    route=route,
+                    row=k, col=i - 1,
+                    fare_amount=round(fv),
+                    route_name=route.route_name,
+                    company=company,
+                    created_by=user,
+                ))
+    return fares
+
+
+def _resolve_stages(route_groups, company, user):
+    """
+    stage_code.lower() → Stage pk for every stage named in route_groups,
+    creating the missing ones. Codes match case-insensitively, as the
+    per-stage lookup this replaces did under MySQL's collation.
+    Returns (stage_ids, created_count).
+    """
+    names = {}
+    for rg in route_groups.values():
+        for s in rg['stages']:
+            if s['stage_name']:
+                names.setdefault(s['stage_name'].lower(), s['stage_name'])
+
+    def load(codes):
+        return {
+            code.lower(): pk
+            for code, pk in Stage.objects.filter(
+                company=company, stage_code__in=codes, is_deleted=False
+            ).order_by('-pk').values_list('stage_code', 'pk')
+        }
+
+    stage_ids = load(list(names.values()))
+    missing = [name for key, name in names.items() if key not in stage_ids]
+    if missing:
+        Stage.objects.bulk_create(
+            [Stage(stage_code=name, stage_name=name, company=company, created_by=user) for name in missing],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        # bulk_create doesn't return pks on MySQL — read them back
+        stage_ids.update(load(missing))
+    return stage_ids, len(missing)
+
+
 def _execute_import(route_groups, company, user, skip_duplicates):
+    """
+    Create the routes with their bus type, stages, route stages and fares.
+    Every model is written with bulk_create; the query count no longer
+    grows with the number of routes or stages in the sheet.
+    """
     existing_codes = set(
         Route.objects.filter(
             company=company,
@@ -368,31 +500,31 @@ def _execute_import(route_groups, company, user, skip_duplicates):
         ).values_list('route_code', flat=True)
     )
 
-    imported_count = 0
-    skipped_count  = 0
-    stages_created = 0
+    to_import = {}
+    skipped_count = 0
+    for route_code, rg in route_groups.items():
+        if route_code in existing_codes:
+            if skip_duplicates:
+                skipped_count += 1
+                continue
+            raise ValueError(f'Route "{route_code}" already exists.')
+        if not rg['bus_type_obj']:
+            raise ValueError(f'BusType for route "{route_code}" not found.')
+        to_import[route_code] = rg
+
+    if not to_import:
+        return 0, skipped_count, 0
 
     with transaction.atomic():
-        for route_code, rg in route_groups.items():
-
-            if route_code in existing_codes:
-                if skip_duplicates:
-                    skipped_count += 1
-                    continue
-                else:
-                    raise ValueError(f'Route "{route_code}" already exists.')
-
-            bus_type_obj = rg['bus_type_obj']
-            if not bus_type_obj:
-                raise ValueError(f'BusType for route "{route_code}" not found.')
-
+        new_routes = []
+        for route_code, rg in to_import.items():
             flags = rg.get('flags', {})
-            route = Route.objects.create(
+            new_routes.append(Route(
                 route_code=route_code,
                 route_name=rg['route_name'],
                 min_fare=rg['min_fare'] or 0,
                 fare_type=rg['fare_type_int'],
-                bus_type=bus_type_obj,
+                bus_type=rg['bus_type_obj'],
                 half=flags.get('half', False),
                 luggage=flags.get('luggage', False),
                 adjust=flags.get('adjust', False),
@@ -404,102 +536,50 @@ def _execute_import(route_groups, company, user, skip_duplicates):
                 company=company,
                 created_by=user,
                 updated_by=user,
-            )
-
-            RouteBusType.objects.create(
-                route=route, bus_type=bus_type_obj,
-                company=company, created_by=user,
-            )
-
+            ))
+        Route.objects.bulk_create(new_routes, batch_size=BULK_BATCH_SIZE)
+
+        # bulk_create doesn't return pks on MySQL — read them back
+        routes = {
+            r.route_code: r
+            for r in Route.objects.filter(company=company, route_code__in=list(to_import))
+        }
+
+        RouteBusType.objects.bulk_create([
+            RouteBusType(route=routes[code], bus_type=rg['bus_type_obj'], company=company, created_by=user)
+            for code, rg in to_import.items()
+        ], batch_size=BULK_BATCH_SIZE)
+
+        stage_ids, stages_created = _resolve_stages(to_import, company, user)
+
+        route_stages = []
+        fares = []
+        for route_code, rg in to_import.items():
+            route = routes[route_code]
             stages_sorted = sorted(rg['stages'], key=lambda s: s['stage_order'])
-
             for s_data in stages_sorted:
                 sname = s_data['stage_name']
                 if not sname:
                     continue
-
-                # Resolve or create stage
-                existing_stage = Stage.objects.filter(
-                    company=company, stage_code=sname, is_deleted=False
-                ).first()
-
-                if existing_stage:
-                    stage_obj = existing_stage
-                else:
-                    stage_obj = Stage.objects.create(
-                        stage_code=sname,
-                        stage_name=sname,
-                        company=company,
-                        created_by=user,
-                    )
-                    stages_created += 1
-
-                RouteStage.objects.create(
+                route_stages.append(RouteStage(
                     route=route,
-                    stage=stage_obj,
+                    stage_id=stage_ids[sname.lower()],
                     sequence_no=s_data['stage_order'],
                     distance=s_data['distance'] or 0,
                     company=company,
                     created_by=user,
-                )
-
-            # Build fare records
-            fares_to_create = []
-            if rg['fare_type_int'] == 1:  # TABLE
-                # Convention: (row=1, col=stage_i) for each non-zero stage fare
-                for s_data in stages_sorted:
-                    i = s_data['stage_order']
-                    f = s_data['fare']
-                    if f is None or f == 0:
-                        continue
-                    fares_to_create.append(Fare(
-                        route=route,
-                        row=1, col=i,
-                        fare_amount=round(f),
-                        route_name=route.route_name,
-                        company=company,
-                        created_by=user,
-                    ))
-
-            else:  # GRAPH
-                # Convention: (row=from_stage, col=to_stage-1)
-                # Excel: for stage i, Fare col = fare(1→i), MatrixColK = fare(K→i)
-                for s_data in stages_sorted:
-                    i = s_data['stage_order']
-                    if i == 1:
-                        continue  # stage 1 row is diagonal only (fare=0)
-
-                    # Fare column → fare from stage 1 to stage i
-                    f_main = s_data['fare']
-                    if f_main and f_main != 0:
-                        fares_to_create.append(Fare(
-                            route=route,
-                            row=1, col=i - 1,
-                            fare_amount=round(f_main),
-                            route_name=route.route_name,
-                            company=company,
-                            created_by=user,
-                        ))
-
-                    # MatrixColK → fare from stage K to stage i
-                    for k, fv in s_data.get('extra_fares', {}).items():
-                        if fv == 0:
-                            continue
-                        fares_to_create.append(Fare(
-                            route=route,
-                            row=k, col=i - 1,
-                            fare_amount=round(fv),
-                            route_name=route.route_name,
-                            company=company,
-                            created_by=user,
-                        ))
-
-            if fares_to_create:
-                Fare.objects.bulk_create(fares_to_create, ignore_conflicts=True)
-
-            imported_count += 1
-
-    return imported_count, skipped_count, stages_created
+                ))
+            fares.extend(_build_fares(route, rg, stages_sorted, company, user))
+
+        RouteStage.objects.bulk_create(route_stages, batch_size=BULK_BATCH_SIZE)
+        if fares:
+            Fare.objects.bulk_create(fares, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+
+        # bulk_create skips the snapshot and device-file signals
+        transaction.on_commit(lambda: invalidate_master_snapshot(company.pk))
+        transaction.on_commit(lambda: invalidate_device_masterdata(company.pk))
+
+    return len(to_import), skipped_count, stages_created
 
 
 # ── Views ─────────────────────────────────────────────────────────────────────
@@ -523,12 +603,15 @@ class RouteImportValidateView(APIView):
         if not excel_file.name.lower().endswith('.xlsx'):
             return Response({'message': 'Only .xlsx files are accepted.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        ws, load_err = _load_worksheet(excel_file.read())
+        file_bytes = excel_file.read()
+        parsed, load_err = _parse_file(file_bytes, company)
         if load_err:
             return Response({'message': load_err}, status=status.HTTP_400_BAD_REQUEST)
 
-        route_groups, errors, warnings, duplicate_codes = _parse_and_validate(ws, company)
+        route_groups, errors, warnings, duplicate_codes = parsed
         routes_preview = _build_preview(route_groups) if route_groups else []
+        if route_groups and not errors:
+            cache.set(_parsed_cache_key(company, file_bytes), route_groups, timeout=PARSED_CACHE_TTL)
 
         return Response({
             'errors':           errors,
@@ -542,6 +625,8 @@ class RouteImportConfirmView(APIView):
     """
     POST /masterdata/routes/import/confirm
     Accepts .xlsx file + skip_duplicates flag, runs import inside transaction.atomic().
+    Reuses the route groups Validate cached for the same file; parses again
+    only when they have expired.
     """
     parser_classes = [MultiPartParser, FormParser]
 
@@ -557,18 +642,23 @@ class RouteImportConfirmView(APIView):
         skip_duplicates_raw = request.data.get('skip_duplicates', 'true')
         skip_duplicates = str(skip_duplicates_raw).lower() in ('true', '1', 'yes')
 
-        ws, load_err = _load_worksheet(excel_file.read())
-        if load_err:
-            return Response({'message': load_err}, status=status.HTTP_400_BAD_REQUEST)
+        file_bytes = excel_file.read()
+        cache_key = _parsed_cache_key(company, file_bytes)
+        route_groups = cache.get(cache_key)
+
+        if route_groups is None:
+            parsed, load_err = _parse_file(file_bytes, company)
+            if load_err:
+                return Response({'message': load_err}, status=status.HTTP_400_BAD_REQUEST)
 
-        route_groups, errors, warnings, duplicate_codes = _parse_and_validate(ws, company)
+            route_groups, errors, warnings, duplicate_codes = parsed
 
-        # Block hard errors
-        if errors:
-            return Response({
-                'message': 'Import blocked due to validation errors.',
-                'errors': errors,
-            }, status=status.HTTP_400_BAD_REQUEST)
+            # Block hard errors
+            if errors:
+                return Response({
+                    'message': 'Import blocked due to validation errors.',
+                    'errors': errors,
+                }, status=status.HTTP_400_BAD_REQUEST)
 
         if not route_groups:
             return Response({'message': 'No valid routes found in file.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -578,6 +668,8 @@ class RouteImportConfirmView(APIView):
         except Exception as e:
             return Response({'message': f'Import failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        cache.delete(cache_key)
+
         return Response({
             'message': f'{imported} route(s) imported successfully.',
             'imported_count': imported,
@@ -11,6 +11,8 @@ from ....models import BusType, Stage, Route, VehicleType, RouteStage, RouteBusT
 from django.db.models import Count
 from ....serializers.masterdata import BusTypeSerializer, StageSerializer, RouteSerializer, RouteListSerializer, VehicleTypeSerializer
 from ...utils import _get_authenticated_company_admin, _get_object_or_404
+from ....master_snapshot import invalidate_master_snapshot
+from ....device_masterdata import invalidate_device_masterdata
 
 
 logger = logging.getLogger(__name__)
@@ -299,6 +301,9 @@ def _save_route_stages(route, stages_data, company, user):
 
     if route_stages_to_create:
         RouteStage.objects.bulk_create(route_stages_to_create)
+        # bulk_create skips post_save — refresh the ingest snapshot and device files explicitly
+        transaction.on_commit(lambda: invalidate_master_snapshot(company.pk))
+        transaction.on_commit(lambda: invalidate_device_masterdata(company.pk))
 
 
 def _save_route_bus_types(route, bus_type_ids, company, user):
@@ -530,6 +535,8 @@ def update_fare_table(request, route_id):
         return Response({'message': 'No stages defined for this route. Add stops before creating fares.'}, status=status.HTTP_400_BAD_REQUEST)
 
     Fare.objects.filter(route=route).delete()
+    # Neither the delete nor bulk_create below sends signals — devices must re-download RTE.DAT
+    transaction.on_commit(lambda: invalidate_device_masterdata(company.pk))
     fares_to_create = []
 
     if route.fare_type == 1:
@@ -758,6 +765,8 @@ def create_route_wizard(request):
 
             if fares_to_create:
                 Fare.objects.bulk_create(fares_to_create)
+                # bulk_create skips post_save — devices must re-download RTE.DAT
+                transaction.on_commit(lambda: invalidate_device_masterdata(company.pk))
 
             depot_ids = data.get('depot_ids', [])
             if depot_ids and isinstance(depot_ids, list):
@@ -1,21 +1,40 @@
+import base64
+import csv
+import json
 import logging
-from datetime import datetime
+import tempfile
+from datetime import date, datetime
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
-from django.http import JsonResponse
-from django.db.models import Count
-from django.db import OperationalError
+from django.http import JsonResponse, StreamingHttpResponse, FileResponse
+from django.views.decorators.gzip import gzip_page
+from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import OperationalError, connection
 from django.utils.dateparse import parse_datetime
 import pytz
 
 from ...models import TransactionData, TripData, ScheduleData
 from ...permissions import LicensePermission
-from ...serializers.transactions import TicketDataSerializer,TripDataSerializer,ScheduleDataSerializer
+from ...report_cache import response_key, get_response, set_response
+from ...live_feed import event_stream, poll
+from ...columnar import ColumnarJSONRenderer, encode as columnar_encode, wants_columnar
+from ...serializers.transactions import ticket_report_rows, trip_report_rows, schedule_report_rows
 
 logger = logging.getLogger('ticket.ticket_report')
 
+# Keyset pagination — newest first on (created_at, id). Every page is an
+# index range scan from the cursor, so page 400 costs the same as page 1.
+# Pages requested without since= are cached per date data-version
+# (report_cache.py), so past dates never reach the database twice.
+# ?format=columnar returns the rows in columnar form (columnar.py).
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE     = 5000
+
 
 def _parse_since(since_timestamp):
     """Parse a since= cursor timestamp. Returns aware datetime or None."""
@@ -32,8 +51,86 @@ def _parse_since(since_timestamp):
         return None
 
 
+def _ticket_queryset(company, from_date, to_date):
+    return TransactionData.objects.filter(
+        company_code=company,
+        ticket_date__gte=from_date,
+        ticket_date__lte=to_date,
+    )
+
+
+def _trip_queryset(company, from_date, to_date):
+    return TripData.objects.filter(
+        company_code=company,
+        start_date__gte=from_date,
+        start_date__lte=to_date,
+    )
+
+
+def _schedule_queryset(company, from_date, to_date):
+    return ScheduleData.objects.filter(
+        company_code=company,
+        start_date__gte=from_date,
+        start_date__lte=to_date,
+    )
+
+
+def _encode_cursor(row) -> str:
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    """Returns (created_at, id) or raises ValueError."""
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _after(qs, created_at, pk):
+    """Rows strictly after (created_at, pk) in newest-first order."""
+    return qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+
+def _json_response(request, payload):
+    """200 JsonResponse for the trip/schedule reports, columnar if asked."""
+    if wants_columnar(request):
+        payload = columnar_encode(payload)
+    return JsonResponse(payload, status=status.HTTP_200_OK)
+
+
+def _page_size(request) -> int:
+    try:
+        size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _keyset_page(qs, request):
+    """
+    One page of the values() queryset `qs` ordered newest first on
+    (created_at, id), continuing after ?cursor= if given. Returns (rows,
+    next_cursor); next_cursor is None on the last page. Raises ValueError
+    on a malformed cursor.
+    """
+    cursor = request.GET.get('cursor')
+    if cursor:
+        qs = _after(qs, *_decode_cursor(cursor))
+
+    size = _page_size(request)
+    rows = list(qs.order_by('-created_at', '-pk')[:size + 1])
+    if len(rows) > size:
+        return rows[:size], _encode_cursor(rows[size - 1])
+    return rows, None
+
+
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def get_all_transaction_data(request):
     """
     Ticket transactions for the web report page.
@@ -42,6 +139,9 @@ def get_all_transaction_data(request):
         from_date  YYYY-MM-DD  required
         to_date    YYYY-MM-DD  required
         since      ISO ts      optional — incremental polling cursor
+        cursor     str         optional — next_cursor from the previous page
+        page_size  int         optional — default 500, max 5000
+        format     columnar    optional — columnar rows (columnar.py)
     """
     user = request.user
 
@@ -54,18 +154,16 @@ def get_all_transaction_data(request):
             return Response({'error': 'from_date and to_date are required'},
                             status=status.HTTP_400_BAD_REQUEST)
 
+        cache_key = None
+        if user.company and not since_ts:
+            cache_key = response_key(user.company_id, 'tickets', from_date, to_date,
+                                     request.GET.get('cursor'), _page_size(request))
+            cached = get_response(cache_key)
+            if cached is not None:
+                return Response(cached, status=status.HTTP_200_OK)
+
         if user.company:
-            qs = TransactionData.objects.filter(
-                company_code=user.company,
-                ticket_date__gte=from_date,
-                ticket_date__lte=to_date,
-            ).select_related(
-                'route_id',
-                'from_stage_id__stage',
-                'to_stage_id__stage',
-                'trip_id',
-                'schedule_id',
-            ).prefetch_related('route_id__route_depots__depot')
+            qs = _ticket_queryset(user.company, from_date, to_date)
         else:
             qs = TransactionData.objects.none()
 
@@ -78,14 +176,20 @@ def get_all_transaction_data(request):
             qs = qs.filter(created_at__gt=since_dt)
             logger.info(f"Ticket polling: since={since_ts}")
 
-        qs = qs.order_by('-created_at')[:500]
+        try:
+            rows, next_cursor = _keyset_page(ticket_report_rows.values(qs), request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = TicketDataSerializer(qs, many=True)
-        return Response({
+        data = ticket_report_rows.format(rows)
+        payload = {
             "message": "success",
-            "data": serializer.data,
-            "count": len(serializer.data),
-        }, status=status.HTTP_200_OK)
+            "data": data,
+            "count": len(data),
+            "next_cursor": next_cursor,
+        }
+        set_response(cache_key, payload)
+        return Response(payload, status=status.HTTP_200_OK)
 
     except OperationalError:
         return Response({"message": "Database error"},
@@ -96,8 +200,10 @@ def get_all_transaction_data(request):
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def get_all_trip_data(request):
     """
     Combined trip open+close data for the Trip Data report page.
@@ -107,6 +213,9 @@ def get_all_trip_data(request):
         from_date  YYYY-MM-DD  required  — filters on start_date
         to_date    YYYY-MM-DD  required
         since      ISO ts      optional  — incremental polling cursor (uses updated_at)
+        cursor     str         optional  — next_cursor from the previous page
+        page_size  int         optional  — default 500, max 5000
+        format     columnar    optional  — columnar rows (columnar.py)
     """
     user = request.user
 
@@ -119,16 +228,16 @@ def get_all_trip_data(request):
             return JsonResponse({'error': 'from_date and to_date are required'},
                                 status=status.HTTP_400_BAD_REQUEST)
 
+        cache_key = None
+        if user.company and not since_ts:
+            cache_key = response_key(user.company_id, 'trips', from_date, to_date,
+                                     request.GET.get('cursor'), _page_size(request))
+            cached = get_response(cache_key)
+            if cached is not None:
+                return _json_response(request, cached)
+
         if user.company:
-            qs = TripData.objects.filter(
-                company_code=user.company,
-                start_date__gte=from_date,
-                start_date__lte=to_date,
-            ).select_related(
-                'route_id',
-            ).prefetch_related(
-                'route_id__route_depots__depot',
-            )
+            qs = _trip_queryset(user.company, from_date, to_date)
         else:
             qs = TripData.objects.none()
 
@@ -142,14 +251,20 @@ def get_all_trip_data(request):
             qs = qs.filter(updated_at__gt=since_dt)
             logger.info(f"Trip polling: since={since_ts}")
 
-        qs = qs.order_by('-start_datetime')[:500]
+        try:
+            rows, next_cursor = _keyset_page(trip_report_rows.values(qs), request)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = TripDataSerializer(qs, many=True)
-        return JsonResponse({
+        data = trip_report_rows.format(rows)
+        payload = {
             "message": "success",
-            "data": serializer.data,
-            "count": len(serializer.data),
-        }, status=status.HTTP_200_OK)
+            "data": data,
+            "count": len(data),
+            "next_cursor": next_cursor,
+        }
+        set_response(cache_key, payload)
+        return _json_response(request, payload)
 
     except OperationalError:
         return JsonResponse({"message": "Database error"},
@@ -160,8 +275,10 @@ def get_all_trip_data(request):
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@gzip_page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, ColumnarJSONRenderer])
 def get_all_schedule_data(request):
     """
     Combined schedule open+close data for the Schedule Data report page.
@@ -171,6 +288,9 @@ def get_all_schedule_data(request):
         from_date  YYYY-MM-DD  required  — filters on start_date
         to_date    YYYY-MM-DD  required
         since      ISO ts      optional  — incremental polling cursor (uses updated_at)
+        cursor     str         optional  — next_cursor from the previous page
+        page_size  int         optional  — default 500, max 5000
+        format     columnar    optional  — columnar rows (columnar.py)
     """
     user = request.user
 
@@ -183,18 +303,16 @@ def get_all_schedule_data(request):
             return JsonResponse({'error': 'from_date and to_date are required'},
                                 status=status.HTTP_400_BAD_REQUEST)
 
+        cache_key = None
+        if user.company and not since_ts:
+            cache_key = response_key(user.company_id, 'schedules', from_date, to_date,
+                                     request.GET.get('cursor'), _page_size(request))
+            cached = get_response(cache_key)
+            if cached is not None:
+                return _json_response(request, cached)
+
         if user.company:
-            qs = ScheduleData.objects.filter(
-                company_code=user.company,
-                start_date__gte=from_date,
-                start_date__lte=to_date,
-            ).select_related(
-                'route_id',
-            ).prefetch_related(
-                'route_id__route_depots__depot',
-            ).annotate(
-                _trips_count=Count('trips'),
-            )
+            qs = _schedule_queryset(user.company, from_date, to_date)
         else:
             qs = ScheduleData.objects.none()
 
@@ -207,19 +325,20 @@ def get_all_schedule_data(request):
             qs = qs.filter(updated_at__gt=since_dt)
             logger.info(f"Schedule polling: since={since_ts}")
 
-        qs = qs.order_by('-start_datetime')[:500]
-
-        # Attach annotated trips_count so serializer uses it without extra query
-        objects = list(qs)
-        for obj in objects:
-            obj._trips_count = obj._trips_count  # annotation already on obj
+        try:
+            rows, next_cursor = _keyset_page(schedule_report_rows.values(qs), request)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = ScheduleDataSerializer(objects, many=True)
-        return JsonResponse({
+        data = schedule_report_rows.format(rows)
+        payload = {
             "message": "success",
-            "data": serializer.data,
-            "count": len(serializer.data),
-        }, status=status.HTTP_200_OK)
+            "data": data,
+            "count": len(data),
+            "next_cursor": next_cursor,
+        }
+        set_response(cache_key, payload)
+        return _json_response(request, payload)
 
     except OperationalError:
         return JsonResponse({"message": "Database error"},
@@ -228,3 +347,362 @@ def get_all_schedule_data(request):
         logger.exception("Error fetching schedule data")
         return JsonResponse({"message": str(e)},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ── Streaming export ──────────────────────────────────────────────────────────
+#
+# GET reports/{tickets,trips,schedules}/export?from_date=&to_date=&format=csv|xlsx
+#
+# Rows are read in keyset chunks of EXPORT_CHUNK_SIZE and formatted by the
+# same flat row builders as the JSON endpoints, so a month-long export never
+# holds more than one chunk in memory. CSV is written straight into the
+# response stream; XLSX goes through openpyxl's write-only workbook into a
+# temp file that is then streamed back.
+
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# (header, serializer key, xlsx column width) — same columns as the
+# report pages' client-side Excel export.
+TICKET_EXPORT_COLUMNS = (
+    ('Company',          'company_name',          20),
+    ('Palmtec ID',       'palmtec_id',            14),
+    ('Trip No',          'trip_no',               14),
+    ('Schedule No',      'schedule_no',           14),
+    ('Ticket Number',    'ticket_number',         16),
+    ('Unique Code',      'unique_code',           30),
+    ('Date',             'formatted_ticket_date', 14),
+    ('Time',             'ticket_time',           12),
+    ('Trip Start Date',  'trip_start_date',       16),
+    ('Trip Start Time',  'trip_start_time',       16),
+    ('Route Code',       'route_code',            14),
+    ('From Stage',       'from_stage_name',       18),
+    ('To Stage',         'to_stage_name',         18),
+    ('Total Tickets',    'total_tickets',         14),
+    ('Passenger Count',  'passenger_count',       14),
+    ('Amount',           'ticket_amount',         14),
+    ('Payment Mode',     'ticket_status',         14),
+    ('Ticket Type',      'ticket_type_display',   14),
+    ('Full Count',       'full_count',            12),
+    ('Half Count',       'half_count',            12),
+    ('ST Count',         'st_count',              12),
+    ('Physical Count',   'phy_count',             14),
+    ('Luggage Count',    'lugg_count',            14),
+    ('Ladies Count',     'ladies_count',          14),
+    ('Senior Count',     'senior_count',          14),
+    ('Full Amount',      'full_total_amount',     14),
+    ('Student Amount',   'st_total_amount',       14),
+    ('Luggage Amount',   'lugg_amount',           14),
+    ('Adjust Amount',    'adjust_amount',         14),
+    ('Warrant Amount',   'warrant_amount',        14),
+    ('Refund Amount',    'refund_amount',         14),
+    ('Transaction ID',   'transaction_id',        22),
+    ('Reference No',     'reference_number',      20),
+    ('BQR Merchant ID',  'bqr_merchant_id',       22),
+    ('UPI Verification', 'manual_verified_upi',   16),
+    ('Battery %',        'battery_percentage',    12),
+    ('Pass ID',          'pass_id',               18),
+    ('Refund Status',    'refund_status',         14),
+)
+
+TRIP_EXPORT_COLUMNS = (
+    ('Company',           'company_name',       20),
+    ('Palmtec ID',        'palmtec_id',         14),
+    ('Depot Code',        'depot_code',         14),
+    ('Route',             'route_code',         14),
+    ('Schedule No',       'schedule_no',        14),
+    ('Trip No',           'trip_no',            10),
+    ('Direction',         'up_down_trip',       12),
+    ('Status',            'status',             12),
+    ('Auto Opened',       'auto_opened',        12),
+    ('Bus No',            'bus_no',             16),
+    ('Driver',            'driver',             18),
+    ('Conductor',         'conductor',          18),
+    ('Battery %',         'battery_percentage', 12),
+    ('Start DateTime',    'start_datetime',     20),
+    ('End DateTime',      'end_datetime',       20),
+    ('Start Ticket No',   'start_ticket_no',    16),
+    ('End Ticket No',     'end_ticket_no',      14),
+    ('Total KM',          'total_km',           12),
+    ('Total Tickets',     'total_tickets',      14),
+    ('Total Passengers',  'total_passengers',   16),
+    ('UPI Tickets',       'upi_ticket_count',   14),
+    ('Cash Tickets',      'total_cash_tickets', 14),
+    ('UPI Amount',        'upi_ticket_amount',  14),
+    ('Cash Amount',       'total_cash_amount',  14),
+    ('Expense Amount',    'expense_amount',     14),
+    ('Total Collection',  'total_collection',   16),
+    ('Open Unique Code',  'open_unique_code',   32),
+    ('Close Unique Code', 'close_unique_code',  32),
+)
+
+SCHEDULE_EXPORT_COLUMNS = (
+    ('Company',           'company_name',         20),
+    ('Palmtec ID',        'palmtec_id',           14),
+    ('Schedule No',       'schedule_no',          14),
+    ('Depot Code',        'depot_code',           14),
+    ('Route Code',        'route_code',           14),
+    ('Status',            'status',               12),
+    ('Auto Opened',       'auto_opened',          12),
+    ('Bus No',            'bus_no',               16),
+    ('Driver',            'driver',               18),
+    ('Conductor',         'conductor',            18),
+    ('Start DateTime',    'start_datetime',       20),
+    ('End DateTime',      'end_datetime',         20),
+    ('Battery Start',     'battery_start',        14),
+    ('Battery End',       'battery_end',          14),
+    ('Trips Count',       'trips_count',          14),
+    ('Total Tickets',     'total_tickets',        14),
+    ('UPI Collection',    'upi_total_collection', 16),
+    ('Total Collection',  'total_collection',     16),
+    ('Full Count',        'full_count',           12),
+    ('Half Count',        'half_count',           12),
+    ('Student Count',     'st_count',             14),
+    ('Physical Count',    'physical_count',       14),
+    ('Ladies Count',      'ladies_count',         14),
+    ('Senior Count',      'senior_count',         14),
+    ('Luggage Count',     'luggage_count',        14),
+    ('UPI Full',          'upi_full_count',       12),
+    ('UPI Half',          'upi_half_count',       12),
+    ('UPI Student',       'upi_st_count',         12),
+    ('UPI Physical',      'upi_physical_count',   14),
+    ('UPI Ladies',        'upi_ladies_count',     12),
+    ('UPI Senior',        'upi_senior_count',     12),
+    ('UPI Luggage',       'upi_luggage_count',    14),
+    ('Open Unique Code',  'open_unique_code',     32),
+    ('Close Unique Code', 'close_unique_code',    32),
+)
+
+
+class _CSVRenderer(BaseRenderer):
+    """
+    Registers ?format=csv with DRF's content negotiation (the export views
+    build their own response). Only used to render error bodies.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode()
+
+
+class _XLSXRenderer(_CSVRenderer):
+    media_type = XLSX_CONTENT_TYPE
+    format = 'xlsx'
+    charset = None
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer."""
+    def write(self, value):
+        return value
+
+
+def _export_value(key, value):
+    if key == 'manual_verified_upi':
+        return 'Manual' if value is True else 'Auto' if value is False else ''
+    if key in ('start_datetime', 'end_datetime'):
+        return datetime.fromisoformat(value).strftime('%Y-%m-%d %H:%M:%S') if value else '—'
+    return '' if value is None else value
+
+
+def _export_rows(qs, flat_rows, columns):
+    """Yield one list of cell values per row, newest first, chunk by chunk."""
+    qs = flat_rows.values(qs).order_by('-created_at', '-pk')
+    last = None
+    while True:
+        chunk = list((_after(qs, last['created_at'], last['id']) if last else qs)[:EXPORT_CHUNK_SIZE])
+        for data in flat_rows.format(chunk):
+            yield [_export_value(key, data.get(key)) for _, key, _ in columns]
+        if len(chunk) < EXPORT_CHUNK_SIZE:
+            return
+        last = chunk[-1]
+
+
+def _csv_response(rows, columns, filename):
+    writer = csv.writer(_Echo())
+
+    def stream():
+        yield '\ufeff'  # BOM so Excel opens the file as UTF-8
+        yield writer.writerow([header for header, _, _ in columns])
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def _xlsx_response(rows, columns, filename, title):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    for index, (_, _, width) in enumerate(columns, start=1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+    ws.freeze_panes = 'A2'
+
+    header = []
+    for text, _, _ in columns:
+        cell = WriteOnlyCell(ws, value=text)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+
+    tmp = tempfile.TemporaryFile()
+    wb.save(tmp)
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=f'{filename}.xlsx', content_type=XLSX_CONTENT_TYPE)
+
+
+def _export(request, queryset_builder, flat_rows, columns, name, filters):
+    """
+    Shared body of the export views.
+
+    Query params:
+        from_date  YYYY-MM-DD  required
+        to_date    YYYY-MM-DD  required
+        format     csv | xlsx  optional — default csv; DRF answers any other
+                               format with 404 during content negotiation
+        plus the per-report `filters` (param name → queryset lookup)
+    """
+    from_date = request.GET.get('from_date')
+    to_date   = request.GET.get('to_date')
+    fmt       = request.GET.get('format', 'csv')
+
+    if not from_date or not to_date:
+        return JsonResponse({'error': 'from_date and to_date are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+    try:
+        from_date = date.fromisoformat(from_date)
+        to_date   = date.fromisoformat(to_date)
+    except ValueError:
+        return JsonResponse({'error': 'from_date and to_date must be YYYY-MM-DD'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+    if request.user.company:
+        qs = queryset_builder(request.user.company, from_date, to_date)
+    else:
+        qs = queryset_builder(None, from_date, to_date).none()
+
+    for param, lookup in filters.items():
+        value = request.GET.get(param)
+        if value:
+            try:
+                qs = qs.filter(**{lookup: value})
+            except (ValueError, ValidationError):
+                return JsonResponse({'error': f'Invalid {param}: {value}'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+    logger.info(f"{name} export: company={request.user.company_id} {from_date}..{to_date} format={fmt}")
+    rows = _export_rows(qs, flat_rows, columns)
+    filename = f'{name}_{from_date}_{to_date}'
+    if fmt == 'xlsx':
+        return _xlsx_response(rows, columns, filename, title=name)
+    return _csv_response(rows, columns, filename)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, _CSVRenderer, _XLSXRenderer])
+def export_transaction_data(request):
+    """Ticket report export. Extra filters: palmtec_id, route_code, ticket_status."""
+    return _export(
+        request, _ticket_queryset, ticket_report_rows, TICKET_EXPORT_COLUMNS, 'ticket_data',
+        filters={
+            'palmtec_id':    'palmtec_id',
+            'route_code':    'route_id__route_code',
+            'ticket_status': 'ticket_status',
+        },
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, _CSVRenderer, _XLSXRenderer])
+def export_trip_data(request):
+    """Trip report export. Extra filters: palmtec_id, route_code, schedule_no."""
+    return _export(
+        request, _trip_queryset, trip_report_rows, TRIP_EXPORT_COLUMNS, 'trip_data',
+        filters={
+            'palmtec_id':  'palmtec_id',
+            'route_code':  'route_id__route_code',
+            'schedule_no': 'schedule_no',
+        },
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, _CSVRenderer, _XLSXRenderer])
+def export_schedule_data(request):
+    """Schedule report export. Extra filters: palmtec_id, route_code, schedule_no."""
+    return _export(
+        request, _schedule_queryset, schedule_report_rows, SCHEDULE_EXPORT_COLUMNS, 'schedule_data',
+        filters={
+            'palmtec_id':  'palmtec_id',
+            'route_code':  'route_id__route_code',
+            'schedule_no': 'schedule_no',
+        },
+    )
+
+
+# ── Live feed ─────────────────────────────────────────────────────────────────
+#
+# GET live/feed — server-sent events for the caller's company (live_feed.py),
+# or with ?after= the events since an id as JSON (works under WSGI too).
+# The report pages refetch with since= when an event touches their date
+# range, instead of re-running their queries on a timer.
+
+class _EventStreamRenderer(BaseRenderer):
+    """Accepts EventSource's Accept header; only used to render error bodies."""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, LicensePermission])
+@renderer_classes([JSONRenderer, _EventStreamRenderer])
+def live_feed(request):
+    """
+    Live ticket / trip / schedule events for the user's company.
+
+    Resumes after the Last-Event-ID header (sent by EventSource on
+    reconnect) or ?last_event_id=.
+
+    ?after=<event id> (empty on the first call) answers at once with the
+    events since that id instead — live_feed.poll(). The stream itself
+    needs ASGI; under WSGI it answers 501 and the pages poll ?after=.
+    """
+    company_id = request.user.company_id
+    if not company_id:
+        return JsonResponse({'error': 'No company linked to this user'},
+                            status=status.HTTP_400_BAD_REQUEST)
+    if 'after' in request.GET:
+        return JsonResponse(poll(company_id, request.GET['after'] or None))
+    if not isinstance(request._request, ASGIRequest):
+        return JsonResponse({'error': 'Live feed stream requires the ASGI server; poll with ?after='},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+
+    # Nothing below touches the database; don't hold a connection for the
+    # life of the stream.
+    connection.close()
+
+    response = StreamingHttpResponse(event_stream(company_id, last_event_id),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # prevent nginx from buffering the stream
+    return response
@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { fromColumnar } from './columnar';
 
 const BASE_URL = import.meta.env.VITE_API_BASE_URL;
 
@@ -92,5 +93,20 @@ api.interceptors.response.use(
     }
 );
 
+// ── Keyset-paginated report endpoints ─────────────────────────────────────────
+// Follows next_cursor until the last page and returns the final response with
+// `data` holding every row fetched, so callers read it like a single page.
+// Pages are requested in the compact columnar form and decoded here.
+export const getAllPages = async (url) => {
+    const base = `${url}${url.includes('?') ? '&' : '?'}format=columnar`;
+    let response = await api.get(base);
+    let rows = fromColumnar(response.data.data) || [];
+    while (response.data.message === 'success' && response.data.next_cursor) {
+        response = await api.get(`${base}&cursor=${encodeURIComponent(response.data.next_cursor)}`);
+        rows = rows.concat(fromColumnar(response.data.data) || []);
+    }
+    return { ...response, data: { ...response.data, data: rows, count: rows.length, next_cursor: null } };
+};
+
 export default api;
 export { BASE_URL };
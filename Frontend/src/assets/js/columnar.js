@@ -0,0 +1,42 @@
+// ── Columnar report rows ──────────────────────────────────────────────────────
+// Report endpoints called with ?format=columnar send each list of rows as
+// { columns, rows, dicts } (see Backend/TicketAppB/columnar.py): one array of
+// cells per row, with repeated strings replaced by indexes into dicts[column].
+// The same shape is used to keep report data compact in localStorage.
+
+export const isColumnar = (value) =>
+    !!value && !Array.isArray(value) && Array.isArray(value.columns) && Array.isArray(value.rows);
+
+export const fromColumnar = (value) => {
+    if (!isColumnar(value)) return value;
+    const { columns, rows, dicts = {} } = value;
+    const lookups = columns.map(c => dicts[c]);
+    return rows.map(cells => {
+        const row = {};
+        columns.forEach((c, j) => {
+            const cell = cells[j];
+            row[c] = lookups[j] && cell !== null ? lookups[j][cell] : cell;
+        });
+        return row;
+    });
+};
+
+export const toColumnar = (rows) => {
+    if (!Array.isArray(rows) || !rows.length) return rows;
+    const columns = [...new Set(rows.flatMap(Object.keys))];
+    const table = rows.map(row => columns.map(c => (row[c] === undefined ? null : row[c])));
+    const dicts = {};
+    columns.forEach((c, j) => {
+        const present = table.map(cells => cells[j]).filter(v => v !== null);
+        const distinct = new Set(present);
+        if (present.length < 2 || present.some(v => typeof v !== 'string') || distinct.size * 2 > present.length) return;
+        const index = new Map();
+        table.forEach(cells => {
+            if (cells[j] === null) return;
+            if (!index.has(cells[j])) index.set(cells[j], index.size);
+            cells[j] = index.get(cells[j]);
+        });
+        dicts[c] = [...index.keys()];
+    });
+    return { columns, rows: table, dicts };
+};
@@ -0,0 +1,82 @@
+import api, { BASE_URL } from './axiosConfig';
+
+// ── Live report feed ──────────────────────────────────────────────────────────
+// Server-sent events from GET /live/feed (tickets, trip and schedule changes
+// for the user's company). Calls onChange() when an event of one of `types`
+// touches a date in [fromDate, toDate]; bursts are coalesced into one call per
+// second. If the stream can't be opened (EventSource missing, or the backend
+// is served over WSGI, which answers 501) it polls GET /live/feed?after=<id>
+// every FEED_POLL_MS instead — a Redis read, no report query. Only if that
+// fails too does it fall back to calling onChange every fallbackMs.
+// Returns an unsubscribe function, suitable as a useEffect cleanup.
+
+const FEED_POLL_MS = 3000;
+
+const inRange = (date, fromDate, toDate) => date >= fromDate && date <= toDate;
+
+const touchesRange = (type, data, fromDate, toDate) => {
+    if (type === 'reset') return true;
+    if (type === 'tickets') return (data.dates || []).some(d => inRange(d, fromDate, toDate));
+    return !!data.start_date && inRange(data.start_date, fromDate, toDate);
+};
+
+export const subscribeLiveFeed = (types, fromDate, toDate, onChange, fallbackMs) => {
+    let fallbackId = null;
+    let pendingId = null;
+    let pollId = null;
+    let source = null;
+    let stopped = false;
+
+    const fallback = () => {
+        if (!fallbackId && !stopped) fallbackId = setInterval(onChange, fallbackMs);
+    };
+
+    const notify = (type, data) => {
+        if (!touchesRange(type, data, fromDate, toDate)) return;
+        if (pendingId) return;
+        pendingId = setTimeout(() => { pendingId = null; onChange(); }, 1000);
+    };
+
+    // Short polling of the same stream: the first call (after='') only
+    // returns the current tail id; each later one the events since then.
+    const startPolling = () => {
+        let after = '';
+        const poll = async () => {
+            try {
+                const { data } = await api.get(`${BASE_URL}/live/feed`, { params: { after } });
+                if (stopped) return;
+                if (after && data.reset) notify('reset', {});
+                data.events.forEach(event => {
+                    if ([...types, 'reset'].includes(event.type)) notify(event.type, event.data);
+                });
+                after = data.last_event_id;
+                pollId = setTimeout(poll, FEED_POLL_MS);
+            } catch (_) {
+                fallback();
+            }
+        };
+        poll();
+    };
+
+    if (typeof EventSource === 'undefined') {
+        startPolling();
+    } else {
+        source = new EventSource(`${BASE_URL}/live/feed`, { withCredentials: true });
+        const handle = (type) => (event) => notify(type, JSON.parse(event.data || '{}'));
+        [...types, 'reset'].forEach(type => source.addEventListener(type, handle(type)));
+
+        // EventSource retries network drops on its own (resuming via Last-Event-ID);
+        // CLOSED means the server refused the stream outright (501 under WSGI).
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED) startPolling();
+        };
+    }
+
+    return () => {
+        stopped = true;
+        if (source) source.close();
+        clearTimeout(pendingId);
+        clearTimeout(pollId);
+        clearInterval(fallbackId);
+    };
+};
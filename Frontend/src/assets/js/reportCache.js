@@ -1,5 +1,9 @@
 // Cache manager for trip and ticket reports
 // Stores data and date filters with TTL-based expiration
+// Row arrays are stored in columnar form (see columnar.js) to fit more
+// reports within the localStorage quota.
+
+import { fromColumnar, toColumnar } from './columnar';
 
 class CacheManager {
   constructor() {
@@ -26,6 +30,7 @@ class CacheManager {
    * Store data in cache with TTL
    */
   set(cacheKey, data, ttl = this.TTL_MS) {
+    data = toColumnar(data);
     try {
       const cacheEntry = {
         data,
@@ -67,7 +72,7 @@ class CacheManager {
         return null;
       }
 
-      return parsed.data;
+      return fromColumnar(parsed.data);
     } catch (error) {
       console.error('Error retrieving from cache:', error);
       return null;
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import ExcelJS from 'exceljs';
-import api, { BASE_URL } from '../../assets/js/axiosConfig';
+import { BASE_URL, getAllPages } from '../../assets/js/axiosConfig';
+import { subscribeLiveFeed } from '../../assets/js/liveFeed';
 import cacheManager from '../../assets/js/reportCache';
 import { Card, CardContent } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
@@ -427,7 +428,6 @@ export default function ScheduleDataPage() {
   const [itemsPerPage]                          = useState(8);
   const [selectedSchedule, setSelectedSchedule] = useState(null);
 
-  const pollingIntervalRef = useRef(null);
   const latestTimestampRef = useRef(null);
 
   const hasPendingChanges =
@@ -471,10 +471,8 @@ export default function ScheduleDataPage() {
 
   useEffect(() => {
     if (isPolling && !pollingPaused && isPageVisible && appliedFilters.startDate && appliedFilters.endDate) {
-      pollingIntervalRef.current = setInterval(pollForUpdates, 8000);
-      return () => clearInterval(pollingIntervalRef.current);
+      return subscribeLiveFeed(['schedule', 'trip'], appliedFilters.startDate, appliedFilters.endDate, pollForUpdates, 8000);
     }
-    clearInterval(pollingIntervalRef.current);
   }, [isPolling, pollingPaused, isPageVisible, appliedFilters.startDate, appliedFilters.endDate]);
 
   useEffect(() => {
@@ -494,7 +492,7 @@ export default function ScheduleDataPage() {
       let url = `${BASE_URL}/get_all_schedule_data?from_date=${startDate}&to_date=${endDate}`;
       if (sinceTimestamp) url += `&since=${encodeURIComponent(sinceTimestamp)}`;
 
-      const response = await api.get(url);
+      const response = await getAllPages(url);
       const duration = Date.now() - t0;
 
       if (response.data.message === 'success') {
@@ -598,7 +596,7 @@ export default function ScheduleDataPage() {
     setDateError('');
     const user = JSON.parse(localStorage.getItem('user') || '{}');
     cacheManager.invalidate(cacheManager.getCacheKey('schedule', user.id, appliedFilters.startDate, appliedFilters.endDate));
-    setIsPolling(false); clearInterval(pollingIntervalRef.current);
+    setIsPolling(false);
     setAppliedFilters({ startDate: filters.startDate, endDate: filters.endDate });
     latestTimestampRef.current = null;
     fetchScheduleData(filters.startDate, filters.endDate);
@@ -618,7 +616,7 @@ export default function ScheduleDataPage() {
     setFilters(reset);
     setAppliedFilters({ startDate: today, endDate: today });
     setDateError('');
-    setIsPolling(false); clearInterval(pollingIntervalRef.current);
+    setIsPolling(false);
     latestTimestampRef.current = null;
     fetchScheduleData(today, today);
     setCurrentPage(1);
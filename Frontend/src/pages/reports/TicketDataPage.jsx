@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import ExcelJS from 'exceljs';
-import api, { BASE_URL } from '../../assets/js/axiosConfig';
+import { BASE_URL, getAllPages } from '../../assets/js/axiosConfig';
+import { subscribeLiveFeed } from '../../assets/js/liveFeed';
 import cacheManager from '../../assets/js/reportCache';
 import { Card, CardContent } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
@@ -378,7 +379,6 @@ export default function TicketDataPage() {
   const [itemsPerPage] = useState(10);
   const [selectedTx,   setSelectedTx]   = useState(null);
 
-  const pollingIntervalRef = useRef(null);
   const latestTimestampRef = useRef(null);
 
   const hasPendingChanges =
@@ -422,13 +422,11 @@ export default function TicketDataPage() {
     }
   }, []);
 
-  // Polling
+  // Live updates — live feed, with polling as the fallback
   useEffect(() => {
     if (isPolling && !pollingPaused && isPageVisible && appliedFilters.startDate && appliedFilters.endDate) {
-      pollingIntervalRef.current = setInterval(pollForNew, 10000);
-      return () => clearInterval(pollingIntervalRef.current);
+      return subscribeLiveFeed(['tickets'], appliedFilters.startDate, appliedFilters.endDate, pollForNew, 10000);
     }
-    clearInterval(pollingIntervalRef.current);
   }, [isPolling, pollingPaused, isPageVisible, appliedFilters.startDate, appliedFilters.endDate]);
 
   useEffect(() => {
@@ -443,7 +441,7 @@ export default function TicketDataPage() {
       let url = `${BASE_URL}/get_all_transaction_data?from_date=${startDate}&to_date=${endDate}`;
       if (sinceTimestamp) url += `&since=${encodeURIComponent(sinceTimestamp)}`;
 
-      const response = await api.get(url);
+      const response = await getAllPages(url);
       const duration = Date.now() - t0;
 
       if (response.data.message === 'success') {
@@ -561,7 +559,7 @@ export default function TicketDataPage() {
     setDateError('');
     const user = JSON.parse(localStorage.getItem('user') || '{}');
     cacheManager.invalidate(cacheManager.getCacheKey('ticket', user.id, appliedFilters.startDate, appliedFilters.endDate));
-    setIsPolling(false); clearInterval(pollingIntervalRef.current);
+    setIsPolling(false);
     setAppliedFilters({ startDate: filters.startDate, endDate: filters.endDate });
     latestTimestampRef.current = null;
     fetchTransactions(filters.startDate, filters.endDate);
@@ -581,7 +579,7 @@ export default function TicketDataPage() {
     setFilters(reset);
     setAppliedFilters({ startDate: today, endDate: today });
     setDateError('');
-    setIsPolling(false); clearInterval(pollingIntervalRef.current);
+    setIsPolling(false);
     latestTimestampRef.current = null;
     fetchTransactions(today, today);
     setCurrentPage(1);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import ExcelJS from 'exceljs';
-import api, { BASE_URL } from '../../assets/js/axiosConfig';
+import { BASE_URL, getAllPages } from '../../assets/js/axiosConfig';
+import { subscribeLiveFeed } from '../../assets/js/liveFeed';
 import cacheManager from '../../assets/js/reportCache';
 import { Card, CardContent } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
@@ -418,7 +419,6 @@ export default function TripDataPage() {
   const [itemsPerPage] = useState(8);
   const [selectedTrip, setSelectedTrip] = useState(null);
 
-  const pollingIntervalRef = useRef(null);
   const latestTimestampRef = useRef(null);
 
   const hasPendingChanges =
@@ -462,13 +462,11 @@ export default function TripDataPage() {
     }
   }, []);
 
-  // Polling
+  // Live updates — live feed, with polling as the fallback
   useEffect(() => {
     if (isPolling && !pollingPaused && isPageVisible && appliedFilters.startDate && appliedFilters.endDate) {
-      pollingIntervalRef.current = setInterval(pollForUpdates, 8000);
-      return () => clearInterval(pollingIntervalRef.current);
+      return subscribeLiveFeed(['trip'], appliedFilters.startDate, appliedFilters.endDate, pollForUpdates, 8000);
     }
-    clearInterval(pollingIntervalRef.current);
   }, [isPolling, pollingPaused, isPageVisible, appliedFilters.startDate, appliedFilters.endDate]);
 
   // Pause polling when date range has passed
@@ -489,7 +487,7 @@ export default function TripDataPage() {
       let url = `${BASE_URL}/get_all_trip_data?from_date=${startDate}&to_date=${endDate}`;
       if (sinceTimestamp) url += `&since=${encodeURIComponent(sinceTimestamp)}`;
 
-      const response = await api.get(url);
+      const response = await getAllPages(url);
       const duration = Date.now() - t0;
 
       if (response.data.message === 'success') {
@@ -593,7 +591,7 @@ export default function TripDataPage() {
     setDateError('');
     const user = JSON.parse(localStorage.getItem('user') || '{}');
     cacheManager.invalidate(cacheManager.getCacheKey('trip', user.id, appliedFilters.startDate, appliedFilters.endDate));
-    setIsPolling(false); clearInterval(pollingIntervalRef.current);
+    setIsPolling(false);
     setAppliedFilters({ startDate: filters.startDate, endDate: filters.endDate });
     latestTimestampRef.current = null;
     fetchTripData(filters.startDate, filters.endDate);
@@ -613,7 +611,7 @@ export default function TripDataPage() {
     setFilters(reset);
     setAppliedFilters({ startDate: today, endDate: today });
     setDateError('');
-    setIsPolling(false); clearInterval(pollingIntervalRef.current);
+    setIsPolling(false);
     latestTimestampRef.current = null;
     fetchTripData(today, today);
     setCurrentPage(1);
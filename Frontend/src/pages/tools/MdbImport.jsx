@@ -10,6 +10,10 @@ import ImportProgress   from '../../components/ImportProgress';
 import ImportResults    from '../../components/ImportResults';
 
 const IMPORT_TIMEOUT_MS = 10 * 60 * 1000; // 10 minutes
+const ACTIVE_JOB_KEY    = 'mdbImportJob';  // sessionStorage — reattach after reload
+const POLL_INTERVAL_MS  = 1000;
+const RETRY_DELAY_MS    = 3000;
+const MAX_RETRIES       = 20;
 
 // ---------------------------------------------------------------
 // MdbImport — Main Page
@@ -24,11 +28,13 @@ const IMPORT_TIMEOUT_MS = 10 * 60 * 1000; // 10 minutes
 //   3 → ImportProgress   — live per-table progress (while importing)
 //   3 → ImportResults    — final summary (once done event arrives)
 //
-// Streaming approach:
-//   axios onDownloadProgress + responseType:'text'
-//   XHR accumulates responseText as chunks arrive.
-//   We parse SSE lines ("data: {...}") from each new chunk.
-//   This keeps the full axios instance (interceptors, withCredentials, baseURL).
+// Import approach:
+//   POST /import-mdb stores the file and queues a background job → { job_id }.
+//   Progress is polled from GET /import-mdb/<job_id>/events?after=<event id>,
+//   which answers at once with the events recorded since the last poll
+//   (no request is held open, so no web worker is tied up by the import).
+//   The job runs on the server regardless of this page — a failed poll is
+//   retried from the last event id, and a reload reattaches via sessionStorage.
 // ---------------------------------------------------------------
 
 // ---- Small shared UI: Step indicator at the top ----
@@ -79,10 +85,13 @@ export default function MdbImport() {
   const [importError, setImportError]     = useState('');
   const [tableProgress, setTableProgress] = useState([]);    // grows as tables complete
 
-  // Ref to read latest tableProgress inside the onDownloadProgress closure
+  // Ref to read latest tableProgress inside the polling loop
   // (avoids stale closure when building the final importResult)
   const tableProgressRef = useRef([]);
 
+  // Id of the last event handled — the next poll asks for events after it
+  const lastEventIdRef = useRef(null);
+
   // Block in-app (React Router) navigation while import is running
   const blocker = useBlocker(importing);
 
@@ -94,18 +103,14 @@ export default function MdbImport() {
     fetchCompanies();
   }, []);
 
-  // Warn user if they try to leave/reload while an import is in progress
+  // Reattach to an import that was still running when the page was left/reloaded
   useEffect(() => {
-    if (!importing) return;
-
-    const handleBeforeUnload = (e) => {
-      e.preventDefault();
-      e.returnValue = 'Import is in progress. Leaving now will cancel the import.';
-    };
-
-    window.addEventListener('beforeunload', handleBeforeUnload);
-    return () => window.removeEventListener('beforeunload', handleBeforeUnload);
-  }, [importing]);
+    const jobId = sessionStorage.getItem(ACTIVE_JOB_KEY);
+    if (!jobId) return;
+    setStep(3);
+    setImporting(true);
+    followImport(jobId).finally(() => setImporting(false));
+  }, []);
 
   const fetchCompanies = async () => {
     setLoadingCompanies(true);
@@ -147,7 +152,82 @@ export default function MdbImport() {
   };
 
 
-  // ==================== IMPORT (API CALL) ====================
+  // ==================== IMPORT (API CALLS) ====================
+
+  // Handle one parsed event from the job's stream. Returns true on the final event.
+  const handleImportEvent = (event) => {
+    if (event.type === 'started') {
+      // (Re)started by the worker — drop progress from any earlier attempt
+      tableProgressRef.current = [];
+      setTableProgress([]);
+
+    } else if (event.type === 'table_done') {
+      // Accumulate via ref (avoids stale closure) + sync to state for render
+      tableProgressRef.current = [...tableProgressRef.current, event];
+      setTableProgress([...tableProgressRef.current]);
+
+    } else if (event.type === 'done') {
+      // Build the final result object for ImportResults
+      // using ref for table_results to get the latest accumulated list
+      setImportResult({
+        imported:      event.total_imported,
+        existing:      event.total_existing,
+        skipped:       event.total_skipped,
+        replaced:      event.total_replaced ?? 0,
+        table_results: tableProgressRef.current,
+        errors:        event.errors,
+        read_errors:   event.read_errors,
+      });
+      return true;
+
+    } else if (event.type === 'error') {
+      // Fatal backend error
+      setImportError(event.message);
+      return true;
+    }
+    return false;
+  };
+
+  /*
+    Poll the job's events until its done/error event.
+
+    Each poll returns the events after lastEventIdRef. A failed poll
+    (network blip, proxy timeout) is retried from the same id — the import
+    itself keeps running on the server either way.
+  */
+  const followImport = async (jobId) => {
+    lastEventIdRef.current = null;
+    let finished = false;
+    let retries  = 0;
+
+    while (!finished) {
+      try {
+        const response = await api.get(`${BASE_URL}/import-mdb/${jobId}/events`, {
+          params: lastEventIdRef.current ? { after: lastEventIdRef.current } : {},
+        });
+        for (const event of response.data.events) {
+          if (handleImportEvent(event)) finished = true;
+          lastEventIdRef.current = event.id;
+        }
+        retries = 0;
+      } catch (err) {
+        if (err.response?.status === 404) {
+          setImportError('This import is no longer available. Check the audit log for its outcome.');
+          finished = true;
+        } else if (err.response || ++retries > MAX_RETRIES) {
+          setImportError(err.response?.data?.message || 'Lost connection to the import. Reload the page to reattach.');
+          return;  // keep ACTIVE_JOB_KEY so a reload can reattach
+        } else {
+          await new Promise(resolve => setTimeout(resolve, RETRY_DELAY_MS));
+          continue;
+        }
+      }
+
+      if (!finished) await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+    }
+
+    sessionStorage.removeItem(ACTIVE_JOB_KEY);
+  };
 
   const handleImport = async () => {
     if (!selectedFile)      return window.alert('No file selected.');
@@ -171,90 +251,28 @@ export default function MdbImport() {
       formData.append('password', mdbPassword.trim());
     }
 
-    /*
-      Streaming approach: axios + responseType:'text' + onDownloadProgress
-
-      XHR (used by axios in browsers) accumulates responseText as chunks arrive.
-      onDownloadProgress fires each time a new chunk lands.
-      We slice off only the new bytes, parse complete SSE lines ("data: {...}"),
-      and update state incrementally — no fetch, no EventSource needed.
-
-      The existing axios instance is used as-is:
-        - withCredentials: true  → cookies sent automatically
-        - 401 interceptor        → fires if session expires before stream starts,
-                                   auto-refreshes token and retries the import
-        - baseURL / timeout      → inherited from instance
-
-      streamStarted flag: we only move to step 3 after the first chunk arrives.
-      This way, pre-stream validation errors (400/401) stay on step 2 and show
-      normally through the catch block — the user never sees a blank progress screen.
-    */
-    let processedLength = 0;
-    let streamStarted   = false;
-
     try {
-      await api.post(`${BASE_URL}/import-mdb`, formData, {
+      // Upload only — the server queues the import and answers with its job id.
+      // Validation errors (400/409) stay on step 2 and show in ConfigureStep.
+      const response = await api.post(`${BASE_URL}/import-mdb`, formData, {
         headers: { 'Content-Type': undefined },
         timeout: IMPORT_TIMEOUT_MS,
-        responseType: 'text',
-
-        onDownloadProgress: (progressEvent) => {
-          // Move to progress view on first chunk (confirms streaming has started)
-          if (!streamStarted) {
-            streamStarted = true;
-            setStep(3);
-          }
-
-          // Slice only the new bytes from the accumulated responseText
-          const fullText = progressEvent.event.target.responseText;
-          const newChunk = fullText.slice(processedLength);
-          processedLength = fullText.length;
-
-          // Parse each complete SSE line in the new chunk
-          for (const line of newChunk.split('\n')) {
-            if (!line.startsWith('data: ')) continue;
-            try {
-              const event = JSON.parse(line.slice(6));
-
-              if (event.type === 'table_done') {
-                // Accumulate via ref (avoids stale closure) + sync to state for render
-                tableProgressRef.current = [...tableProgressRef.current, event];
-                setTableProgress([...tableProgressRef.current]);
-
-              } else if (event.type === 'done') {
-                // Build the final result object for ImportResults
-                // using ref for table_results to get the latest accumulated list
-                setImportResult({
-                  imported:      event.total_imported,
-                  existing:      event.total_existing,
-                  skipped:       event.total_skipped,
-                  replaced:      event.total_replaced ?? 0,
-                  table_results: tableProgressRef.current,
-                  errors:        event.errors,
-                  read_errors:   event.read_errors,
-                });
-
-              } else if (event.type === 'error') {
-                // Fatal backend error mid-stream
-                setImportError(event.message);
-              }
-
-            } catch (_) {
-              // Incomplete JSON chunk — next onDownloadProgress will have the rest
-            }
-          }
-        },
       });
+      const jobId = response.data.job_id;
+      sessionStorage.setItem(ACTIVE_JOB_KEY, jobId);
+      setStep(3);
+
+      await followImport(jobId);
 
     } catch (err) {
-      // err.response exists when server replied with 4xx/5xx before streaming
+      // err.response exists when server replied with 4xx/5xx
       // err.response is undefined on network errors, CORS failures, or timeouts
       const responseData = err.response?.data;
 
       let errorMessage = 'Import failed. Please try again.';
 
       if (err.code === 'ECONNABORTED') {
-        errorMessage = 'Import timed out. The file is large or server is busy. Please retry and check backend logs.';
+        errorMessage = 'Upload timed out. The file is large or server is busy. Please retry and check backend logs.';
       } else if (responseData) {
         if (typeof responseData === 'object') {
           errorMessage = responseData.message || responseData.error || responseData.detail || JSON.stringify(responseData);
@@ -269,12 +287,6 @@ export default function MdbImport() {
 
       setImportError(errorMessage);
 
-      // If streaming hadn't started yet, stay on step 2 so the error shows inline
-      // If it had started, step 3 is already showing — error displayed there
-      if (!streamStarted) {
-        // step remains 2, error shows in ConfigureStep
-      }
-
     } finally {
       setImporting(false);
     }
@@ -357,7 +369,7 @@ export default function MdbImport() {
             />
           )}
 
-          {/* Step 3a — live progress while import is running or stream errored */}
+          {/* Step 3a — live progress while import is running or after it errored */}
           {step === 3 && !importResult && (
             <ImportProgress
               tableProgress={tableProgress}
@@ -395,7 +407,7 @@ export default function MdbImport() {
               <div>
                 <h3 className="text-sm font-semibold text-slate-900">Import in progress</h3>
                 <p className="text-sm text-slate-500 mt-1">
-                  Leaving this page will cancel the ongoing import. Are you sure you want to leave?
+                  The import keeps running on the server. Come back to this page to see its progress.
                 </p>
               </div>
             </div>